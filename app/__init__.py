@@ -1,36 +1,114 @@
 import os
-import pkgutil
-import importlib
+import re
 import sys
 import cmd
+import shlex
+import argparse
+import functools
 import logging
-import logging.config
-import pandas as pd
-from dotenv import load_dotenv
-from app.commands import CommandHandler, Command
-from app.history_manager import HistoryManager  # Import history manager
+import time
+from collections import deque
+from datetime import datetime
+from app.commands import AsyncCommand, CommandHandler, LazyCommand
+from app.log_tail import tail_lines, grep_lines, follow
+from app.logging_setup import configure_logging, log_operation
+from app.metrics import METRICS, PHASES, UNKNOWN_COMMAND, start_metrics_dump
+from app.plugin_manifest import PluginManifest
+from app.profiling import PhaseTimer
+
+def parse_time(value):
+    """Parse an epoch-seconds number or an ISO 8601 date/time into epoch seconds."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def non_negative_int(value):
+    """argparse type for counts such as logs -n; a negative number is a usage error."""
+    number = int(value)
+    if number < 0:
+        raise ValueError(f"expected a count of 0 or more, got {number}")
+    return number
+
+
+def parse_arguments(parser, args):
+    """Shell-split an argument string and parse it, timed as the running command's parse phase."""
+    start = time.perf_counter()
+    try:
+        return parser.parse_args(shlex.split(args))
+    finally:
+        METRICS.add_time("parse", time.perf_counter() - start)
+
+
+def parse_numbers(args):
+    """The whitespace-separated numbers in an argument string, timed as the running command's parse phase."""
+    start = time.perf_counter()
+    try:
+        return [float(value) for value in args.split()]
+    finally:
+        METRICS.add_time("parse", time.perf_counter() - start)
+
+
+# Extra names accepted for built-in commands
+COMMAND_ALIASES = {
+    "quit": "exit",
+    "q": "exit",
+    "+": "add",
+    "-": "subtract",
+    "*": "multiply",
+    "/": "divide",
+    "?": "help",
+}
+
 
 class App(cmd.Cmd):
     prompt = ">>> "  # REPL prompt
 
-    def __init__(self):
+    def __init__(self, timer=None):
         super().__init__()
+        self.timer = timer or PhaseTimer()
         self.logs_dir = 'logs'
-        os.makedirs(self.logs_dir, exist_ok=True)
-        self.configure_logging()
-        load_dotenv()
-        self.settings = self.load_environment_variables()
-        self.settings.setdefault('ENVIRONMENT', 'PRODUCTION')
+        with self.timer.phase("logging"):
+            os.makedirs(self.logs_dir, exist_ok=True)
+            self.configure_logging()
+        self._settings = None  # dotenv and environment are read on first use
+        self._history_manager = None  # history is loaded on first use
+        self._notifications = None  # NotificationQueues by sink, once history is loaded with NOTIFY_SINKS set
         self.command_handler = CommandHandler()
-        self.history_manager = HistoryManager()  # Singleton for history
-        self.load_plugins()  # Load available plugins
+        with self.timer.phase("plugins"):
+            self.load_plugins()  # Load available plugins
+        self.dispatch_table = {}
+        self._dispatch_version = None  # CommandHandler.version the table was built for
+        if os.getenv("METRICS_FILE"):
+            start_metrics_dump(os.getenv("METRICS_FILE"), float(os.getenv("METRICS_INTERVAL", "15")))
+
+    @property
+    def settings(self):
+        if self._settings is None:
+            with self.timer.phase("settings"):
+                from dotenv import load_dotenv
+                load_dotenv()
+                self._settings = self.load_environment_variables()
+                self._settings.setdefault('ENVIRONMENT', 'PRODUCTION')
+        return self._settings
+
+    @property
+    def history_manager(self):
+        if self._history_manager is None:
+            self.settings  # .env may configure history persistence
+            with self.timer.phase("history"):
+                from app.history_manager import HistoryManager
+                self._history_manager = HistoryManager()  # Singleton for history
+            if os.getenv("NOTIFY_SINKS"):
+                from app.notifications import start_notifications
+                self._notifications = start_notifications(self._history_manager)
+        return self._history_manager
 
     def configure_logging(self):
         log_file_path = os.path.join(self.logs_dir, "app.log")  # Log file inside logs directory
-        for handler in logging.root.handlers[:]:
-            logging.root.removeHandler(handler)
-        logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", handlers=[logging.StreamHandler(sys.stdout), logging.FileHandler(log_file_path, mode="a")])
-        logging.getLogger(__name__).info(f"Logging initialized successfully! Logs saved in {log_file_path}")
+        configure_logging(log_file_path)  # Queue-based, rotating; see app/logging_setup.py
+        logging.getLogger(__name__).info("Logging initialized successfully! Logs saved in %s", log_file_path)
 
     def load_environment_variables(self):
         settings = {key: value for key, value in os.environ.items()}
@@ -41,30 +119,42 @@ class App(cmd.Cmd):
         return self.settings.get(env_var, None)
 
     def load_plugins(self):
+        """Register a lazy stub for every plugin command listed in the cached plugin manifest."""
         plugins_package = 'app.plugins'
-        plugins_path = plugins_package.replace('.', '/')
+        plugins_path = os.path.join(os.path.dirname(__file__), 'plugins')
         if not os.path.exists(plugins_path):
-            logging.warning(f"Plugins directory '{plugins_path}' not found.")
-            return
-        for _, plugin_name, is_pkg in pkgutil.iter_modules([plugins_path]):
-            if is_pkg:
-                try:
-                    plugin_module = importlib.import_module(f'{plugins_package}.{plugin_name}')
-                    self.register_plugin_commands(plugin_module, plugin_name)
-                except ImportError as e:
-                    logging.error(f"Error importing plugin {plugin_name}: {e}")
-
-    def register_plugin_commands(self, plugin_module, plugin_name):
-        for item_name in dir(plugin_module):
-            item = getattr(plugin_module, item_name)
-            if isinstance(item, type) and issubclass(item, Command) and item is not Command:
-                self.command_handler.register_command(plugin_name, item())
-                logging.info(f"✅ Command '{plugin_name}' from plugin '{plugin_name}' registered successfully.")
+            logging.warning("Plugins directory '%s' not found.", plugins_path)
+            return
+        self.plugin_manifest = PluginManifest(plugins_path, plugins_package)
+        self.plugin_manifest.load()
+        self.plugin_manifest.refresh()
+        for plugin_name in self.plugin_manifest.entries:
+            self.register_plugin_stub(plugin_name)
+
+    def register_plugin_stub(self, plugin_name, reload=False):
+        entry = self.plugin_manifest.entries[plugin_name]
+        if entry["classes"]:
+            # With several Command classes in a plugin, the last one by name wins
+            class_name = sorted(entry["classes"])[-1]
+            self.command_handler.register_command(plugin_name, LazyCommand(entry["module"], class_name, reload))
+
+    def do_reload_plugins(self, args):
+        """Usage: reload_plugins - Rescan plugins and reload the ones that changed"""
+        if getattr(self, "plugin_manifest", None) is None:
+            print("No plugins directory found.")
+            return
+        changed = self.plugin_manifest.refresh()
+        for plugin_name in sorted(changed):
+            self.command_handler.unregister_command(plugin_name)
+            if plugin_name in self.plugin_manifest.entries:
+                self.register_plugin_stub(plugin_name, reload=True)
+        logging.info("Plugins reloaded: %s", sorted(changed))
+        print(f"Reloaded {len(changed)} changed plugin(s): {', '.join(sorted(changed)) or 'none'}")
 
     def do_add(self, args):
         """Usage: add x y - Perform addition"""
         try:
-            x, y = map(float, args.split())
+            x, y = parse_numbers(args)
             result = x + y
             self.history_manager.save_to_history("Add", x, y, result)
             print(f"Result: {result}")
@@ -74,7 +164,7 @@ class App(cmd.Cmd):
     def do_subtract(self, args):
         """Usage: subtract x y - Perform subtraction"""
         try:
-            x, y = map(float, args.split())
+            x, y = parse_numbers(args)
             result = x - y
             self.history_manager.save_to_history("Subtract", x, y, result)
             print(f"Result: {result}")
@@ -84,7 +174,7 @@ class App(cmd.Cmd):
     def do_multiply(self, args):
         """Usage: multiply x y - Perform multiplication"""
         try:
-            x, y = map(float, args.split())
+            x, y = parse_numbers(args)
             result = x * y
             self.history_manager.save_to_history("Multiply", x, y, result)
             print(f"Result: {result}")
@@ -94,7 +184,7 @@ class App(cmd.Cmd):
     def do_divide(self, args):
         """Usage: divide x y - Perform division"""
         try:
-            x, y = map(float, args.split())
+            x, y = parse_numbers(args)
             if y == 0:
                 print("Error: Division by zero")
                 return
@@ -104,15 +194,243 @@ class App(cmd.Cmd):
         except Exception as e:
             print(f"Invalid input: {e}")
 
+    def do_calc(self, args):
+        """Usage: calc "<expression>" [name=value ...] - Evaluate an expression with + - * / and parentheses"""
+        from app.expression import compile_expression, evaluate_expression
+        start = time.perf_counter()
+        try:
+            tokens = shlex.split(args)
+        except ValueError as e:
+            print(f"Invalid expression: {e}")
+            return
+        finally:
+            METRICS.add_time("parse", time.perf_counter() - start)
+        values = {}
+        while tokens and re.fullmatch(r"[A-Za-z_]\w*=.+", tokens[-1]):
+            name, value = tokens.pop().split("=", 1)
+            values[name] = value
+        text = " ".join(tokens)
+        if not text:
+            print('Usage: calc "<expression>" [name=value ...]')
+            return
+        try:
+            start = time.perf_counter()
+            try:
+                compile_expression(text)  # cached, so evaluate_expression below does not parse again
+                values = {name: float(value) for name, value in values.items()}
+            finally:
+                METRICS.add_time("parse", time.perf_counter() - start)
+            result = evaluate_expression(text, values, self.history_manager)
+            print(f"Result: {result}")
+            log_operation("Evaluated expression: %s %s = %s", text, values or "", result)
+        except ZeroDivisionError:
+            logging.warning("Division by zero in expression: %s", text)
+            print("Error: Division by zero")
+        except ValueError as e:  # ExpressionError or a non-numeric binding
+            logging.error("Expression failed: %s - Error: %s", args, e)
+            print(f"Invalid expression: {e}")
+
+    def do_batch(self, args):
+        """Usage: batch <file> [--workers N] - Evaluate a file of 'op x y' lines in one vectorized pass"""
+        parser = argparse.ArgumentParser(prog="batch", add_help=False)
+        parser.add_argument("path")
+        parser.add_argument("--workers", type=int, default=1)
+        try:
+            options = parse_arguments(parser, args)
+        except (SystemExit, ValueError):
+            print("Usage: batch <file> [--workers N]")
+            return
+        path = options.path
+        try:
+            if options.workers > 1:
+                from app.parallel import run_parallel
+                summary = run_parallel(path, history_manager=self.history_manager, workers=options.workers)
+                count, division_by_zero = summary.count, summary.division_by_zero
+                errors, error_count = summary.errors, summary.error_count
+            else:
+                from app.batch import run_batch_file
+                batch = run_batch_file(path, self.history_manager)
+                count, division_by_zero = len(batch), batch.division_by_zero
+                errors, error_count = batch.errors, len(batch.errors)
+        except OSError as e:
+            print(f"Could not read batch file: {e}")
+            return
+        logging.info("Batch %s: %d operations evaluated", path, count)
+        print(f"Evaluated {count} operations from {path}.")
+        if division_by_zero:
+            print(f"Error: Division by zero in {division_by_zero} operations (not recorded)")
+        for number, message in errors[:10]:
+            print(f"Invalid input on line {number}: {message}")
+        if error_count > 10:
+            print(f"... {error_count - 10} more invalid lines")
+
     def do_history(self, args):
-        """Usage: history - Show calculation history"""
-        print(self.history_manager.show_history())
+        """Usage: history [--op NAME] [--result-gt X] [--result-lt X] [--since T] [--until T] [--last N] [--page P] [--page-size S] - Show calculation history"""
+        if not args.strip():
+            print(self.history_manager.display())
+            return
+        parser = argparse.ArgumentParser(prog="history", add_help=False)
+        parser.add_argument("--op", default=None)
+        for bound in ("gt", "ge", "lt", "le"):
+            parser.add_argument(f"--result-{bound}", type=float, default=None)
+        parser.add_argument("--since", type=parse_time, default=None)
+        parser.add_argument("--until", type=parse_time, default=None)
+        parser.add_argument("--last", type=int, default=None)
+        parser.add_argument("--page", type=int, default=1)
+        parser.add_argument("--page-size", type=int, default=20)
+        try:
+            options = parse_arguments(parser, args)
+        except (SystemExit, ValueError):
+            print("Usage: history [--op NAME] [--result-gt X] [--result-ge X] [--result-lt X] [--result-le X] "
+                  "[--since T] [--until T] [--last N] [--page P] [--page-size S]")
+            return
+        if options.page < 1 or options.page_size < 1:
+            print("Page and page size must be positive.")
+            return
+        manager = self.history_manager
+        operation = options.op.capitalize() if options.op else None
+        rows = manager.query(operation, options.result_gt, options.result_ge, options.result_lt,
+                             options.result_le, options.since, options.until, options.last)
+        if len(rows) == 0:
+            print("No matching history entries.")
+            return
+        pages = -(-len(rows) // options.page_size)
+        if options.page > pages:
+            print(f"Page {options.page} is out of range ({pages} pages).")
+            return
+        print(f"Page {options.page} of {pages} ({len(rows)} matching entries)")
+        print(manager.page(rows, options.page, options.page_size))
+
+    def do_stats(self, args):
+        """Usage: stats [--op NAME] [--window N] - Show count, sum, mean, min, max and variance of results"""
+        parser = argparse.ArgumentParser(prog="stats", add_help=False)
+        parser.add_argument("--op", default=None)
+        parser.add_argument("--window", type=int, default=None)
+        try:
+            options = parse_arguments(parser, args)
+        except (SystemExit, ValueError):
+            print("Usage: stats [--op NAME] [--window N]")
+            return
+        if options.window is not None and options.window < 1:
+            print("Window must be a positive number of rows.")
+            return
+        operation = options.op.capitalize() if options.op else None
+        summary = self.history_manager.stats(window=options.window)
+        if operation is not None:
+            summary = {operation: summary[operation]} if operation in summary else {}
+        summary = {name: stats for name, stats in summary.items() if stats["count"]}
+        if not summary:
+            print("No calculations recorded.")
+            return
+        title = f"last {options.window} rows" if options.window is not None else "all rows"
+        print(f"==== Result Statistics ({title}) ====")
+        print(f"{'Operation':<10} {'Count':>8} {'Sum':>14} {'Mean':>12} {'Min':>12} {'Max':>12} {'Variance':>12}")
+        for name, stats in summary.items():
+            print(f"{name:<10} {stats['count']:>8} {stats['sum']:>14.6g} {stats['mean']:>12.6g} "
+                  f"{stats['min']:>12.6g} {stats['max']:>12.6g} {stats['variance']:>12.6g}")
+
+    def do_metrics(self, args):
+        """Usage: metrics [COMMAND] [--prometheus] [--reset] - Show command counts, errors and latency"""
+        parser = argparse.ArgumentParser(prog="metrics", add_help=False)
+        parser.add_argument("command", nargs="?", default=None)
+        parser.add_argument("--prometheus", action="store_true")
+        parser.add_argument("--reset", action="store_true")
+        try:
+            options = parse_arguments(parser, args)
+        except (SystemExit, ValueError):
+            print("Usage: metrics [COMMAND] [--prometheus] [--reset]")
+            return
+        if options.reset:
+            METRICS.reset()
+            print("Metrics reset.")
+            return
+        if options.prometheus:
+            print(METRICS.prometheus_text(), end="")
+            return
+        snapshot = METRICS.snapshot()
+        if options.command is not None:
+            name = options.command.lower()
+            if name not in snapshot:
+                print(f"No metrics recorded for {name}.")
+                return
+            stats = snapshot[name]
+            print(f"==== {name}: {stats['count']} calls, {stats['errors']} errors (ms) ====")
+            print(f"{'Phase':<14} {'p50':>10} {'p95':>10} {'p99':>10} {'Mean':>10} {'Max':>10}")
+            for phase, summary in stats["phases"].items():
+                print(f"{phase:<14} {summary['p50'] * 1000:>10.3f} {summary['p95'] * 1000:>10.3f} "
+                      f"{summary['p99'] * 1000:>10.3f} {summary['mean'] * 1000:>10.3f} {summary['max'] * 1000:>10.3f}")
+            return
+        if not snapshot:
+            print("No commands recorded.")
+            return
+        print("==== Command Latency (ms) ====")
+        print(f"{'Command':<16} {'Count':>7} {'Errors':>7} {'p50':>9} {'p95':>9} {'p99':>9} "
+              f"{'Dispatch':>8} {'Parse':>8} {'Compute':>8} {'History':>8} {'Logging':>8}")
+        for name, stats in snapshot.items():
+            phases = stats["phases"]
+            total = phases["total"]
+            print(f"{name:<16} {stats['count']:>7} {stats['errors']:>7} {total['p50'] * 1000:>9.3f} "
+                  f"{total['p95'] * 1000:>9.3f} {total['p99'] * 1000:>9.3f} "
+                  + " ".join(f"{phases[phase]['mean'] * 1000:>8.3f}"
+                             for phase in PHASES))
+        print("Phase columns are means; 'metrics COMMAND' shows their percentiles.")
 
     def do_clear_history(self, args):
         """Usage: clear_history - Clear calculation history"""
         self.history_manager.clear_history()
         print("Calculation history cleared.")
 
+    def do_jobs(self, args):
+        """Usage: jobs [ID] [--wait] [--cancel] - List background plugin jobs, or wait for or cancel one"""
+        parser = argparse.ArgumentParser(prog="jobs", add_help=False)
+        parser.add_argument("id", nargs="?", type=int, default=None)
+        parser.add_argument("--wait", action="store_true")
+        parser.add_argument("--cancel", action="store_true")
+        try:
+            options = parse_arguments(parser, args)
+        except (SystemExit, ValueError):
+            print("Usage: jobs [ID] [--wait] [--cancel]")
+            return
+        runner = self.command_handler.jobs
+        if options.id is None:
+            if options.cancel:
+                print("Usage: jobs ID --cancel")
+                return
+            if options.wait:
+                runner.wait()
+            jobs = runner.list()
+            if not jobs:
+                print("No background jobs.")
+                return
+            print("\nBackground Jobs:")
+            for job in jobs:
+                print(job.describe())
+            return
+        job = runner.get(options.id)
+        if job is None:
+            print(f"No job {options.id}.")
+            return
+        if options.cancel:
+            print(f"Cancelled job {job.id}." if runner.cancel(job.id) else f"Job {job.id} has already finished.")
+            return
+        if options.wait:
+            job.wait()
+        print(job.describe())
+
+    def do_notifications(self, args):
+        """Usage: notifications [--flush] - Show queued, sent, retried and dropped result notifications"""
+        self.history_manager  # notifications start with the history
+        if not self._notifications:
+            print("Result notifications are off; set NOTIFY_SINKS to email and/or discord.")
+            return
+        if args.strip() == "--flush":
+            for notification_queue in self._notifications.values():
+                notification_queue.flush()
+        print("\nResult Notifications:")
+        for name, notification_queue in self._notifications.items():
+            stats = notification_queue.stats()
+            print(f" - {name}: " + ", ".join(f"{key} {value}" for key, value in stats.items()))
+
     def do_menu(self, arg):
         """Display the available calculator commands."""
         commands = {
@@ -120,10 +438,17 @@ class App(cmd.Cmd):
             "subtract": "Subtraction operation",
             "multiply": "Multiplication operation",
             "divide": "Division operation",
+            "calc": "Evaluate an expression, e.g. calc \"2 * (x + 1)\" x=3",
+            "batch": "Evaluate a file of operations",
             "history": "View calculation history",
+            "stats": "Show result statistics per operation",
+            "metrics": "Show command counts, errors and latency percentiles",
             "clear_history": "Clear calculation history",
             "logs": "View application logs",
             "clear_logs": "Clear logs",
+            "reload_plugins": "Reload changed plugins",
+            "jobs": "List, wait for or cancel background plugin jobs",
+            "notifications": "Show result notification delivery counts",
             "exit": "Exit the calculator"
         }
 
@@ -136,6 +461,14 @@ class App(cmd.Cmd):
     def do_exit(self, args):
         """Usage: exit - Exit the application"""
         print("Exiting calculator...")
+        if self.command_handler.running_jobs():
+            print("Waiting for background jobs to finish...")
+        self.command_handler.shutdown()
+        if self._history_manager is not None:
+            self._history_manager.flush()  # Make sure queued history reaches disk
+        if self._notifications:
+            from app.notifications import stop_notifications
+            stop_notifications()  # send the last batch now rather than after the window
         logging.info("Application exited.")
 
         if 'PYTEST_CURRENT_TEST' in os.environ:
@@ -154,30 +487,130 @@ class App(cmd.Cmd):
         print("Welcome to the Calculator App! Type 'menu' to see commands.")  # <-- Add this if missing
         self.cmdloop()  # Starts REPL
 
-    def default(self, line):
-        """Handle unknown commands by converting them to lowercase, avoiding infinite recursion."""
-        line = line.lower()
+    def build_dispatch_table(self):
+        """Map every lowercased command name and alias to a handler taking the argument string.
+
+        Built-in do_* methods win over plugin commands of the same name. The table
+        is rebuilt only when the plugin command registry changes.
+        """
+        table = {}
+        for name in self.command_handler.commands:
+            table[name] = functools.partial(self.run_plugin_command, name)
+        for attr in dir(self.__class__):
+            if attr.startswith("do_"):
+                table[attr[3:].lower()] = getattr(self, attr)
+        for alias, name in COMMAND_ALIASES.items():
+            if name in table:
+                table[alias] = table[name]
+        self.dispatch_table = table
+        self._dispatch_version = self.command_handler.version
+        return table
+
+    def resolve_command(self, line):
+        """Return (handler, argument string) for a non-empty line; handler is None if unknown."""
+        if self._dispatch_version != self.command_handler.version:
+            self.build_dispatch_table()
+        parts = line.split(None, 1)
+        name = parts[0].lower()
+        if name.startswith("?") and len(name) > 1:  # "?add" is help for add
+            return self.dispatch_table["?"], line[1:].strip()
+        return self.dispatch_table.get(name), parts[1] if len(parts) > 1 else ""
+
+    def onecmd(self, line):
+        """Dispatch one line through the dispatch table instead of cmd.Cmd's getattr lookup.
+
+        Each command is timed for the metrics command. The dispatch phase is the
+        table lookup; handlers time their own argument parsing as the parse phase.
+        """
+        line = line.strip()
+        if not line:
+            return self.emptyline()
+        self.lastcmd = line
+        active = METRICS.begin()
+        try:
+            handler, args = self.resolve_command(line)
+            if active is not None:
+                name = line.split(None, 1)[0].lower()
+                name = "help" if name.startswith("?") else COMMAND_ALIASES.get(name, name)
+                active.name = name if handler is not None else UNKNOWN_COMMAND  # keeps label values bounded
+                active.dispatch = time.perf_counter() - active.start
+            if handler is None:
+                if active is not None:
+                    active.error = True
+                return self.default(line)
+            return handler(args)
+        except Exception:
+            if active is not None:
+                active.error = True
+            raise
+        finally:
+            METRICS.end(active)
+
+    def run_plugin_command(self, name, args):
+        """Run a plugin Command with whitespace-separated arguments."""
+        handler = self.command_handler.handler(name)
+        if handler is None:
+            print(f"Command {name} could not be loaded.")
+            return
+        try:
+            result = handler(*args.split())
+        except TypeError as e:
+            logging.error("Plugin command %s failed: %s", name, e)
+            print(f"Invalid input for {name}: {e}")
+            return
+        if isinstance(self.command_handler.commands.get(name), AsyncCommand):
+            print(f"Started job {result.id} ({name}); type 'jobs {result.id}' to check on it.")
 
-        if line in self.get_names():  # Check if the command exists in the registered commands
-            self.onecmd(line)
-        else:
-            print(f"Unknown command: {line}")  # Gracefully handle unknown commands
+    def default(self, line):
+        """Handle commands that are not in the dispatch table."""
+        print(f"Unknown command: {line.split()[0] if line.split() else line}")
 
 
     def do_logs(self, args):
-        """Usage: logs - Show application log history."""
+        """Usage: logs [-n N] [--grep PATTERN] [--follow] - Show application log history."""
+        parser = argparse.ArgumentParser(prog="logs", add_help=False)
+        parser.add_argument("-n", type=non_negative_int, default=None)
+        parser.add_argument("--grep", default=None)
+        parser.add_argument("--follow", "-f", action="store_true")
+        try:
+            options = parse_arguments(parser, args)
+        except (SystemExit, ValueError):
+            print("Usage: logs [-n N] [--grep PATTERN] [--follow]")
+            return
         log_file_path = os.path.join(self.logs_dir, "app.log")
-        if os.path.exists(log_file_path):
-            with open(log_file_path, "r") as log_file:
-                logs = log_file.readlines()
-                if logs:
-                    print("==== Application Log History ====")
-                    for line in logs[-20:]:  # Show only the last 20 logs to avoid flooding the screen
-                        print(line.strip())
-                else:
-                    print("Log file is empty.")
-        else:
+        if not os.path.exists(log_file_path):
             print("No log file found.")
+            return
+        try:
+            if options.grep is not None:
+                lines = grep_lines(log_file_path, options.grep)
+                if options.n is not None:
+                    lines = deque(lines, maxlen=options.n)  # last N matches
+            else:
+                lines = tail_lines(log_file_path, 20 if options.n is None else options.n)
+        except re.error as e:
+            print(f"Invalid pattern: {e}")
+            return
+        printed = False
+        for line in lines:
+            if not printed:
+                print("==== Application Log History ====")
+                printed = True
+            print(line.strip())
+        if not printed and not options.follow:
+            print("No matching log entries." if options.grep is not None else "Log file is empty.")
+        if options.follow:
+            self.follow_logs(log_file_path, options.grep)
+
+    def follow_logs(self, log_file_path, pattern=None, stop=None):
+        """Print lines as they are appended to the log until interrupted."""
+        regex = re.compile(pattern) if pattern else None
+        try:
+            for line in follow(log_file_path, stop=stop):
+                if regex is None or regex.search(line):
+                    print(line.strip(), flush=True)
+        except KeyboardInterrupt:
+            print()
 
     def do_clear_logs(self, args):
         """Usage: clear_logs - Clear application log history."""
@@ -189,56 +622,96 @@ class App(cmd.Cmd):
         else:
             print("No log file found to clear.")
 
+    def vector_operation(self, name, args):
+        """Run an operation over list, range or @file.npy operands.
+
+        Returns False when both operands are plain numbers so the caller can take
+        the scalar path.
+        """
+        from app.operands import apply_vector, format_vector, is_vector_token, parse_operand
+        tokens = args.split()
+        if len(tokens) != 2 or not any(is_vector_token(token) for token in tokens):
+            return False
+        start = time.perf_counter()
+        try:
+            try:
+                x, y = parse_operand(tokens[0]), parse_operand(tokens[1])
+            finally:
+                METRICS.add_time("parse", time.perf_counter() - start)
+            batch = apply_vector(name, x, y, self.history_manager)
+        except ValueError as e:
+            logging.error("Vector %s failed: %s - Error: %s", name, args, e)
+            print(f"Invalid input: {e}")
+            return True
+        except MemoryError:
+            logging.error("Vector %s failed: %s - Error: out of memory", name, args)
+            print("Error: Not enough memory for these operands")
+            return True
+        log_operation("Performed vector %s over %d pairs", name, len(batch))
+        print(f"Result: {format_vector(batch.result)}")
+        if batch.division_by_zero:
+            logging.warning("Division by zero in %d of %d pairs", batch.division_by_zero, len(batch))
+            print(f"Error: Division by zero in {batch.division_by_zero} of {len(batch)} pairs")
+        return True
+
     def do_add(self, args):
-        """Usage: add x y - Perform Addition"""
+        """Usage: add x y - Perform Addition; x and y may be lists (1,2,3), ranges (0:10:2) or @file.npy"""
+        if self.vector_operation("add", args):
+            return
         try:
-            x, y = map(float, args.split())
+            x, y = parse_numbers(args)
             result = x + y
             self.history_manager.save_to_history("Add", x, y, result)
-            logging.info(f"Performed Addition: {x} + {y} = {result}")  # ✅ Log operation
+            log_operation("Performed Addition: %s + %s = %s", x, y, result)  # ✅ Log operation
             print(f"Result: {result}")
         except Exception as e:
-            logging.error(f"Addition failed: {args} - Error: {e}")
+            logging.error("Addition failed: %s - Error: %s", args, e)
             print(f"Invalid input: {e}")
 
     def do_subtract(self, args):
-        """Usage: subtract x y - Perform subtraction"""
+        """Usage: subtract x y - Perform subtraction; x and y may be lists (1,2,3), ranges (0:10:2) or @file.npy"""
+        if self.vector_operation("subtract", args):
+            return
         try:
-            x, y = map(float, args.split())
+            x, y = parse_numbers(args)
             result = x - y
             self.history_manager.save_to_history("Subtract", x, y, result)
-            logging.info(f"Performed Subtraction: {x} - {y} = {result}")  # ✅ Log operation
+            log_operation("Performed Subtraction: %s - %s = %s", x, y, result)  # ✅ Log operation
             print(f"Result: {result}")
         except Exception as e:
-            logging.error(f"Subtraction failed: {args} - Error: {e}")
+            logging.error("Subtraction failed: %s - Error: %s", args, e)
             print(f"Invalid input: {e}")
 
     def do_multiply(self, args):
-        """Usage: multiply x y - Perform multiplication"""
+        """Usage: multiply x y - Perform multiplication; x and y may be lists (1,2,3), ranges (0:10:2) or @file.npy"""
+        if self.vector_operation("multiply", args):
+            return
         try:
-            x, y = map(float, args.split())
+            x, y = parse_numbers(args)
             result = x * y
             self.history_manager.save_to_history("Multiply", x, y, result)
-            logging.info(f"Performed Multiplication: {x} * {y} = {result}")  # ✅ Log operation
+            log_operation("Performed Multiplication: %s * %s = %s", x, y, result)  # ✅ Log operation
             print(f"Result: {result}")
         except Exception as e:
-            logging.error(f"Multiplication failed: {args} - Error: {e}")
+            logging.error("Multiplication failed: %s - Error: %s", args, e)
             print(f"Invalid input: {e}")
 
     def do_divide(self, args):
-        """Usage: divide x y - Perform division"""
+        """Usage: divide x y - Perform division; x and y may be lists (1,2,3), ranges (0:10:2) or @file.npy"""
+        if self.vector_operation("divide", args):
+            return
         try:
-            x, y = map(float, args.split())
+            x, y = parse_numbers(args)
             if y == 0:
-                logging.warning(f"Division by zero attempt: {x} / {y}")  # ✅ Log warning
+                logging.warning("Division by zero attempt: %s / %s", x, y)  # ✅ Log warning
                 print("Error: Division by zero")
                 return
             result = x / y
             self.history_manager.save_to_history("Divide", x, y, result)
-            logging.info(f"Performed Division: {x} / {y} = {result}")  # ✅ Log operation
+            log_operation("Performed Division: %s / %s = %s", x, y, result)  # ✅ Log operation
             print(f"Result: {result}")
         except Exception as e:
-            logging.error(f"Division failed: {args} - Error: {e}")
+            logging.error("Division failed: %s - Error: %s", args, e)
             print(f"Invalid input: {e}")
 
 if __name__ == "__main__":
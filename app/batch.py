@@ -0,0 +1,142 @@
+import numpy as np
+from app.history_buffer import OPERATIONS
+
+# Command name -> (history code, vectorized implementation)
+OPERATORS = {
+    "add": (OPERATIONS.index("Add"), np.add),
+    "subtract": (OPERATIONS.index("Subtract"), np.subtract),
+    "multiply": (OPERATIONS.index("Multiply"), np.multiply),
+    "divide": (OPERATIONS.index("Divide"), np.divide),
+}
+DIVIDE_CODE = OPERATORS["divide"][0]
+# ASCII characters str.split() treats as whitespace, and those str.splitlines() also breaks lines at
+WHITESPACE = np.zeros(256, dtype=bool)
+WHITESPACE[list(b" \t\n\r\v\f\x1c\x1d\x1e\x1f")] = True
+LINE_BREAKS = np.zeros(256, dtype=bool)
+LINE_BREAKS[list(b"\n\r\v\f\x1c\x1d\x1e")] = True
+
+
+class BatchResult:
+    """Parsed operations and their results, one array element per input line."""
+
+    def __init__(self, op_codes, operand1, operand2, result, valid, errors, line_numbers=None):
+        self.op_codes = op_codes
+        self.operand1 = operand1
+        self.operand2 = operand2
+        self.result = result
+        self.valid = valid  # False for division-by-zero rows, which are not recorded
+        self.errors = errors  # (line number, message) for lines that could not be parsed
+        self.line_numbers = line_numbers  # source line of each row, or None when no line was rejected
+
+    def __len__(self):
+        return len(self.op_codes)
+
+    @property
+    def division_by_zero(self):
+        return int(np.count_nonzero(~self.valid))
+
+
+def parse_operations(text):
+    """Parse 'op x y' lines into (op codes, operand1, operand2, line numbers, errors).
+
+    Line numbers are only tracked when some line is rejected; otherwise they are None.
+    """
+    tokens = text.split()
+    if len(tokens) % 3 == 0 and _three_fields_per_line(text):
+        try:
+            return _parse_tokens(tokens)
+        except ValueError:
+            pass  # misaligned or malformed input; fall back to line-by-line parsing
+    return _parse_lines(text)
+
+
+def _three_fields_per_line(text):
+    """True if every non-blank line has exactly three fields, checked over the bytes with NumPy.
+
+    Without this, a token stream that happens to split into threes could pair
+    fields from different lines. Non-ASCII text goes to the line parser.
+    """
+    if not text.isascii():
+        return False
+    data = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    space = WHITESPACE[data]
+    starts = ~space
+    starts[1:] &= space[:-1]  # the first character of each field
+    line = np.cumsum(LINE_BREAKS[data], dtype=np.int64)
+    fields = np.bincount(line[starts])
+    return bool(np.all((fields == 0) | (fields == 3)))
+
+
+def _parse_tokens(tokens):
+    ops = np.asarray(tokens[0::3])
+    names, inverse = np.unique(ops, return_inverse=True)
+    lookup = np.array([OPERATORS[name.lower()][0] if name.lower() in OPERATORS else -1 for name in names],
+                      dtype=np.int32)
+    codes = lookup[inverse.reshape(-1)]
+    if (codes < 0).any():
+        raise ValueError("unknown operation")
+    operand1 = np.array(tokens[1::3], dtype=np.float64)
+    operand2 = np.array(tokens[2::3], dtype=np.float64)
+    return codes.astype(np.uint16), operand1, operand2, None, []
+
+
+def _parse_lines(text):
+    codes, operand1, operand2, line_numbers, errors = [], [], [], [], []
+    for number, line in enumerate(text.splitlines(), start=1):
+        parts = line.split()
+        if not parts:
+            continue
+        try:
+            if len(parts) != 3:
+                raise ValueError(f"expected 'op x y', got {len(parts)} fields")
+            name = parts[0].lower()
+            if name not in OPERATORS:
+                raise ValueError(f"unknown operation '{parts[0]}'")
+            x, y = float(parts[1]), float(parts[2])
+        except ValueError as e:
+            errors.append((number, str(e)))
+            continue
+        codes.append(OPERATORS[name][0])
+        operand1.append(x)
+        operand2.append(y)
+        line_numbers.append(number)
+    return (np.array(codes, dtype=np.uint16), np.array(operand1, dtype=np.float64),
+            np.array(operand2, dtype=np.float64), line_numbers, errors)
+
+
+def evaluate(op_codes, operand1, operand2):
+    """Evaluate each operation class in one vectorized pass.
+
+    Returns (result, valid) where valid is False for division by zero, matching
+    do_divide, which reports those rows instead of recording them.
+    """
+    result = np.empty(len(op_codes), dtype=np.float64)
+    valid = np.ones(len(op_codes), dtype=bool)
+    for code, ufunc in OPERATORS.values():
+        mask = op_codes == code
+        if not mask.any():
+            continue
+        x, y = operand1[mask], operand2[mask]
+        if code == DIVIDE_CODE:
+            zero = y == 0
+            valid[np.flatnonzero(mask)[zero]] = False
+            y = np.where(zero, 1.0, y)
+        result[mask] = ufunc(x, y)
+    result[~valid] = np.nan
+    return result, valid
+
+
+def evaluate_batch(text, history_manager=None):
+    """Parse and evaluate a block of operations, recording valid rows in one bulk write."""
+    op_codes, operand1, operand2, line_numbers, errors = parse_operations(text)
+    result, valid = evaluate(op_codes, operand1, operand2)
+    batch = BatchResult(op_codes, operand1, operand2, result, valid, errors, line_numbers)
+    if history_manager is not None:
+        history_manager.save_many(op_codes[valid], operand1[valid], operand2[valid], result[valid])
+    return batch
+
+
+def run_batch_file(path, history_manager=None):
+    """Evaluate every operation in a file; see evaluate_batch."""
+    with open(path, "r", encoding="utf-8") as operations:
+        return evaluate_batch(operations.read(), history_manager)
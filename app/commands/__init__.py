@@ -1,34 +1,131 @@
+import functools
+import importlib
+import logging
+import sys
+import time
 from abc import ABC, abstractmethod
+from app.metrics import METRICS
 
 class Command(ABC):
     @abstractmethod
     def execute(self):
         pass
 
+class AsyncCommand(Command):
+    """A command that mostly waits on I/O, such as a call to an outside service.
+
+    Subclasses implement the coroutine execute_async(). Dispatched through a
+    CommandHandler it runs as a background job, at most max_concurrency at a
+    time per command and cancelled after timeout seconds, and the caller gets
+    a Job back instead of waiting. execute() runs it to completion directly.
+    """
+
+    max_concurrency = 4
+    timeout = 30.0
+
+    @abstractmethod
+    async def execute_async(self, *args):
+        pass
+
+    def execute(self, *args):
+        import asyncio
+        return asyncio.run(asyncio.wait_for(self.execute_async(*args), self.timeout))
+
+class LazyCommand(Command):
+    """Stand-in for a plugin command that imports its module on first dispatch."""
+
+    def __init__(self, module_name, class_name, reload=False):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.reload = reload
+
+    def load(self):
+        module = importlib.import_module(self.module_name)
+        if self.reload and self.module_name in sys.modules:
+            module = importlib.reload(module)
+        return getattr(module, self.class_name)()
+
+    def execute(self, *args):
+        return self.load().execute(*args)
+
 class CommandHandler:
     def __init__(self):
         self.commands = {}
+        self.version = 0  # bumped whenever a command is added or removed, so dispatch tables know to rebuild
+        self._jobs = None
+
+    @property
+    def jobs(self):
+        """The JobRunner that AsyncCommand executors are submitted to, started on first use."""
+        if self._jobs is None:
+            from app.jobs import JobRunner
+            self._jobs = JobRunner()
+        return self._jobs
+
+    def running_jobs(self):
+        """Jobs that have not finished yet (none if no AsyncCommand has run)."""
+        return self._jobs.active() if self._jobs is not None else []
+
+    def shutdown(self, timeout=5.0):
+        """Let running jobs finish for up to `timeout` seconds, then cancel what is left."""
+        if self._jobs is not None:
+            self._jobs.shutdown(timeout)
 
     def register_command(self, command_name, command_executor):
         self.commands[command_name.lower()] = command_executor
+        self.version += 1
+
+    def unregister_command(self, command_name):
+        if self.commands.pop(command_name.lower(), None) is not None:
+            self.version += 1
+
+    def resolve(self, command_name):
+        """Return the executor for a command, importing lazy plugin commands on first use."""
+        executor = self.commands.get(command_name)
+        if isinstance(executor, LazyCommand):
+            try:
+                executor = executor.load()
+            except (ImportError, AttributeError) as e:
+                logging.error("Error loading command %s: %s", command_name, e)
+                return None
+            self.commands[command_name] = executor
+        return executor
+
+    def handler(self, command_name):
+        """Return a callable taking the command's arguments, or None if it cannot be loaded.
+
+        For an AsyncCommand the callable starts a job and returns its Job.
+        """
+        executor = self.resolve(command_name)
+        if executor is None:
+            return None
+        if isinstance(executor, AsyncCommand):
+            return functools.partial(self.jobs.submit, command_name, executor)
+        # Command objects expose execute(); plain functions are called directly
+        return executor.execute if hasattr(executor, "execute") else executor
 
     def execute_command(self, command_input):
+        """Run a command line; returns False if the command is unknown, the Job for an AsyncCommand, else True."""
         # split the input into command and arguments
         parts = command_input.split()
-        if not parts:
+        if not parts or parts[0].lower() not in self.commands:
             return False
-
-        command_name = parts[0].lower()
-        args = parts[1:]
-
-        if command_name in self.commands:
-            executor = self.commands[command_name]
-            # Handle both callable functions and command objects
-            if callable(executor) and not hasattr(executor, 'execute'):
-                executor(*args) # pass None as the app instance for simple functions
-            else:
-                executor.execute(*args) #for command objects
+        active = METRICS.begin(parts[0].lower())
+        try:
+            handler = self.handler(parts[0].lower())
+            if active is not None:
+                active.dispatch = time.perf_counter() - active.start
+            if handler is None:
+                if active is not None:
+                    active.error = True
+                return False
+            result = handler(*parts[1:])
+            if isinstance(self.commands.get(parts[0].lower()), AsyncCommand):
+                return result  # the Job
             return True
-        return False
-
-
+        except Exception:
+            if active is not None:
+                active.error = True
+            raise
+        finally:
+            METRICS.end(active)
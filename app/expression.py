@@ -0,0 +1,136 @@
+import ast
+import math
+import operator
+from functools import lru_cache
+import numpy as np
+from app.history_buffer import OPERATIONS
+
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+BINARY_OPERATORS = {
+    ast.Add: ("Add", operator.add),
+    ast.Sub: ("Subtract", operator.sub),
+    ast.Mult: ("Multiply", operator.mul),
+    ast.Div: ("Divide", operator.truediv),
+}
+CACHE_SIZE = 256
+MAX_LENGTH = 2000  # characters; longer input can exhaust the parser's recursion limit
+MAX_DEPTH = 100  # syntax tree levels; each chained operator or unary sign adds one
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that cannot be parsed, use unsupported syntax or miss a variable."""
+
+
+def _check_depth(tree):
+    """Raise ExpressionError if the tree is deeper than MAX_DEPTH, walking it without recursion."""
+    stack = [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        if depth > MAX_DEPTH:
+            raise ExpressionError(f"the expression nests or chains more than {MAX_DEPTH} levels deep")
+        stack.extend((child, depth + 1) for child in ast.iter_child_nodes(node))
+
+
+class CompiledExpression:
+    """A validated expression flattened into a list of two-operand steps.
+
+    Values live in numbered slots: constants first, then bound variables, then one
+    slot per step result. Evaluating is a single loop over the steps with no tree
+    walking, and each step maps onto one calculator operation for the history.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.constants = []
+        self.variables = []
+        self.steps = []  # (op code, function, left slot, right slot)
+        if len(text) > MAX_LENGTH:
+            raise ExpressionError(f"the expression is longer than {MAX_LENGTH} characters")
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ExpressionError(f"could not parse {text!r}: {e.msg}") from None
+        except (RecursionError, MemoryError):
+            raise ExpressionError("the expression is nested too deeply to parse") from None
+        _check_depth(tree)
+        self.result_slot = self._compile(tree.body)
+        variable_base = len(self.constants)
+        step_base = variable_base + len(self.variables)
+        # Slots were numbered per kind while compiling; shift them into one register file
+        self.result_slot = self._resolve(self.result_slot, variable_base, step_base)
+        self.steps = [(code, func, self._resolve(left, variable_base, step_base),
+                       self._resolve(right, variable_base, step_base))
+                      for code, func, left, right in self.steps]
+
+    @staticmethod
+    def _resolve(slot, variable_base, step_base):
+        kind, index = slot
+        return index if kind == "const" else (variable_base if kind == "var" else step_base) + index
+
+    def _constant(self, value):
+        try:
+            self.constants.append(float(value))
+        except OverflowError:
+            raise ExpressionError(f"the number {str(value)[:20]}... is too large") from None
+        return ("const", len(self.constants) - 1)
+
+    def _compile(self, node):
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return self._constant(node.value)
+        if isinstance(node, ast.Name):
+            if node.id in CONSTANTS:
+                return self._constant(CONSTANTS[node.id])
+            if node.id not in self.variables:
+                self.variables.append(node.id)
+            return ("var", self.variables.index(node.id))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            # -x is recorded as the calculator step 0 - x
+            return self._step("Subtract", operator.sub, self._constant(0.0), operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            name, func = BINARY_OPERATORS[type(node.op)]
+            left = self._compile(node.left)
+            right = self._compile(node.right)
+            return self._step(name, func, left, right)
+        raise ExpressionError(f"unsupported syntax in {self.text!r}: {type(node).__name__}")
+
+    def _step(self, name, func, left, right):
+        self.steps.append((OPERATIONS.index(name), func, left, right))
+        return ("step", len(self.steps) - 1)
+
+    def evaluate(self, values=None):
+        """Return (result, steps) where steps lists (op code, operand1, operand2, result)."""
+        values = values or {}
+        missing = [name for name in self.variables if name not in values]
+        if missing:
+            raise ExpressionError(f"no value bound for {', '.join(missing)}")
+        slots = self.constants + [float(values[name]) for name in self.variables]
+        trace = []
+        for code, func, left, right in self.steps:
+            a, b = slots[left], slots[right]
+            result = func(a, b)  # ZeroDivisionError propagates to the caller
+            slots.append(result)
+            trace.append((code, a, b, result))
+        return slots[self.result_slot], trace
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(text):
+    """Parse and compile an expression, caching the result by its text."""
+    return CompiledExpression(text)
+
+
+def evaluate_expression(text, values=None, history_manager=None):
+    """Evaluate an expression, recording every step through the history manager.
+
+    Steps are only recorded when the whole expression evaluates, so a division by
+    zero part-way through leaves the history untouched.
+    """
+    result, trace = compile_expression(text).evaluate(values)
+    if history_manager is not None and trace:
+        codes, operand1, operand2, results = zip(*trace)
+        history_manager.save_many(np.array(codes, dtype=np.uint16), np.array(operand1), np.array(operand2),
+                                  np.array(results))
+    return result
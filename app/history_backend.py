@@ -0,0 +1,61 @@
+from abc import ABC, abstractmethod
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+class HistoryBackend(ABC):
+    """Durable storage behind HistoryManager.
+
+    The manager keeps the in-memory buffer, index and statistics, and hands
+    each backend rows to persist in the backend's own record format: it asks
+    for records with format_row()/format_rows(), may queue them for a writer
+    thread, and eventually passes one or more of them, joined, to append().
+    load() returns every stored row as a HistoryBuffer. Backends are chosen
+    with HISTORY_BACKEND; see HistoryManager.
+    """
+
+    fsync_policy = "never"
+    fsync_interval = 1.0
+
+    @abstractmethod
+    def format_row(self, operation, code, operand1, operand2, result, timestamp):
+        """One row as a record that append() accepts, once joined with join_records()."""
+
+    @abstractmethod
+    def format_rows(self, names, op_codes, operand1, operand2, result, timestamp):
+        """Yield records for many rows given encoded operation codes and the code→name table."""
+
+    @abstractmethod
+    def append(self, data):
+        """Persist joined records, in order, after everything appended before."""
+
+    @abstractmethod
+    def load(self):
+        """Every stored row, in insertion order, as a HistoryBuffer."""
+
+    @abstractmethod
+    def truncate(self):
+        """Drop every stored row."""
+
+    @abstractmethod
+    def close(self):
+        """Release the storage; appending afterwards opens it again."""
+
+    def configure_fsync(self, policy, interval=1.0):
+        """Set when appends are forced to disk: always, interval or never."""
+        policy = policy.lower()
+        if policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{policy}', expected one of {FSYNC_POLICIES}")
+        self.fsync_policy = policy
+        self.fsync_interval = interval
+
+    def sync_names(self, names):
+        """Called before appending rows that use operation names added since the last call."""
+
+
+def join_records(records):
+    """Combine records from format_row()/format_rows() into one append() argument."""
+    first = records[0]
+    if isinstance(first, (str, bytes)):
+        return first[:0].join(records)
+    return [row for record in records for row in record]  # lists of row tuples
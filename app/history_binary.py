@@ -0,0 +1,197 @@
+import os
+import struct
+import sys
+import numpy as np
+from app.history_buffer import HistoryBuffer, OPERATIONS, VALUE_COLUMNS
+from app.history_journal import HistoryJournal, format_records, read_records
+
+MAGIC = b"CALCHIST"
+VERSION = 2
+HEADER_SIZE = 256
+HEADER = struct.Struct("<8sHHI")  # magic, version, record size, length of the name table
+RECORD = struct.Struct("<H6xdddd")  # op code, padding, operand1, operand2, result, timestamp
+RECORD_DTYPE = np.dtype({
+    "names": ["op", "operand1", "operand2", "result", "timestamp"],
+    "formats": ["<u2", "<f8", "<f8", "<f8", "<f8"],
+    "offsets": [0, 8, 16, 24, 32],
+    "itemsize": RECORD.size,
+})
+V1_RECORD = struct.Struct("<H6xddd")  # version 1 records had no timestamp
+V1_RECORD_DTYPE = np.dtype({
+    "names": ["op", "operand1", "operand2", "result"],
+    "formats": ["<u2", "<f8", "<f8", "<f8"],
+    "offsets": [0, 8, 16, 24],
+    "itemsize": V1_RECORD.size,
+})
+UPGRADE_CHUNK = 65536  # records converted at a time, so an upgrade never holds the whole file
+
+
+def encode_record(code, operand1, operand2, result, timestamp):
+    return RECORD.pack(code, operand1, operand2, result, timestamp)
+
+
+def encode_header(names):
+    """The fixed-size file header, holding the operation name table."""
+    table = "\n".join(names).encode()
+    if HEADER.size + len(table) > HEADER_SIZE:
+        raise ValueError("Too many operation names for the binary history header")
+    return (HEADER.pack(MAGIC, VERSION, RECORD.size, len(table)) + table).ljust(HEADER_SIZE, b"\0")
+
+
+def encode_records(op_codes, operand1, operand2, result, timestamp):
+    records = np.zeros(len(op_codes), dtype=RECORD_DTYPE)
+    records["op"] = op_codes
+    records["operand1"] = operand1
+    records["operand2"] = operand2
+    records["result"] = result
+    records["timestamp"] = timestamp
+    return records.tobytes()
+
+
+class BinaryHistoryFile(HistoryJournal):
+    """Fixed-width binary history records behind a 256-byte header.
+
+    Each record is 40 bytes: a uint16 operation code (padded to 8 bytes) and four
+    little-endian float64 values (operands, result and epoch timestamp). The
+    header holds the operation name table so codes can be decoded. Records are
+    appended like the CSV journal, and read back through a read-only np.memmap,
+    so opening costs O(1) and analytics work on the mapped pages without parsing
+    or copying.
+    """
+
+    def _open(self):
+        if self._fd is None:
+            self.upgrade()
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                self.write_header(OPERATIONS)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND, 0o644)
+        return self._fd
+
+    def format_row(self, operation, code, operand1, operand2, result, timestamp):
+        return encode_record(code, operand1, operand2, result, timestamp)
+
+    def format_rows(self, names, op_codes, operand1, operand2, result, timestamp):
+        yield encode_records(op_codes, operand1, operand2, result, timestamp)
+
+    def load(self):
+        records = self.records()
+        names = self.read_header() if len(records) else ()
+        return HistoryBuffer.from_arrays(records["op"], records, names or OPERATIONS)
+
+    def sync_names(self, names):
+        self.write_header(names)  # the header carries the operation name table
+
+    def write_header(self, names):
+        mode = "r+b" if os.path.exists(self.path) else "wb"
+        with open(self.path, mode) as history:
+            history.write(encode_header(names))
+
+    def read_header(self):
+        with open(self.path, "rb") as history:
+            header = history.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"{self.path} is too short to be a binary history file")
+        magic, version, record_size, table_size = HEADER.unpack_from(header)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{self.path} is not a version {VERSION} binary history file; convert it with "
+                             f"'python -m app.history_binary to-csv' using the version that wrote it, then "
+                             f"'python -m app.history_binary to-binary'")
+        table = header[HEADER.size:HEADER.size + table_size].decode()
+        return tuple(table.split("\n")) if table else ()
+
+    def upgrade(self):
+        """Rewrite a version 1 file (32-byte records, no timestamp) in the current layout.
+
+        Timestamps are filled with nan, a torn trailing record is dropped, and the
+        new file replaces the old one atomically. Other files are left alone.
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER_SIZE:
+            return
+        with open(self.path, "rb") as history:
+            header = history.read(HEADER_SIZE)
+        magic, version, record_size, table_size = HEADER.unpack_from(header)
+        if magic != MAGIC or version != 1 or record_size != V1_RECORD.size:
+            return
+        self.close()
+        table = header[HEADER.size:HEADER.size + table_size].decode()
+        count = (os.path.getsize(self.path) - HEADER_SIZE) // V1_RECORD.size
+        temporary = f"{self.path}.upgrade"
+        with open(temporary, "wb") as upgraded:
+            upgraded.write(encode_header(table.split("\n") if table else OPERATIONS))
+            if count:
+                old = np.memmap(self.path, dtype=V1_RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+                for start in range(0, count, UPGRADE_CHUNK):
+                    part = old[start:start + UPGRADE_CHUNK]
+                    upgraded.write(encode_records(part["op"], part["operand1"], part["operand2"], part["result"],
+                                                  np.full(len(part), np.nan)))
+                del old
+        os.replace(temporary, self.path)
+
+    def truncate(self):
+        """Start an empty file; the old one is replaced, not shrunk, as memmaps of its records may be in use."""
+        self.close()
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as history:
+            history.write(encode_header(OPERATIONS))
+        os.replace(temporary, self.path)
+
+    def repair(self):
+        """Drop a torn trailing record, returning the number of whole records."""
+        self.upgrade()
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER_SIZE:
+            return 0
+        size = os.path.getsize(self.path)
+        count, torn = divmod(size - HEADER_SIZE, RECORD.size)
+        if torn:
+            with open(self.path, "r+b") as history:
+                history.truncate(HEADER_SIZE + count * RECORD.size)
+        return count
+
+    def records(self):
+        """Return a read-only structured memmap over every record; no data is read up front."""
+        count = self.repair()
+        if count == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def csv_to_binary(csv_path, binary_path):
+    """Losslessly convert a CSV history journal to the binary format."""
+    columns = read_records(csv_path)
+    names = list(OPERATIONS)
+    codes = {name: code for code, name in enumerate(names)}
+    for name in dict.fromkeys(columns["operation"]):
+        if name not in codes:
+            codes[name] = len(names)
+            names.append(name)
+    op_codes = np.array([codes[name] for name in columns["operation"]], dtype=np.uint16)
+    target = BinaryHistoryFile(binary_path)
+    if os.path.exists(binary_path):
+        os.remove(binary_path)
+    target.write_header(names)
+    missing = np.full(len(op_codes), np.nan)
+    target.append(encode_records(op_codes, *(columns.get(name, missing) for name in VALUE_COLUMNS)))
+    target.close()
+    return len(op_codes)
+
+
+def binary_to_csv(binary_path, csv_path):
+    """Losslessly convert a binary history file back to a CSV journal."""
+    source = BinaryHistoryFile(binary_path)
+    names = source.read_header()
+    records = source.records()
+    target = HistoryJournal(csv_path)
+    target.truncate()
+    for chunk in format_records(names, records["op"], *(records[name] for name in VALUE_COLUMNS)):
+        target.append(chunk)
+    target.close()
+    return len(records)
+
+
+if __name__ == "__main__":
+    # python -m app.history_binary to-binary history.csv history.bin
+    # python -m app.history_binary to-csv history.bin history.csv
+    if len(sys.argv) != 4 or sys.argv[1] not in ("to-binary", "to-csv"):
+        sys.exit("Usage: python -m app.history_binary to-binary|to-csv SOURCE TARGET")
+    convert = csv_to_binary if sys.argv[1] == "to-binary" else binary_to_csv
+    print(f"Converted {convert(sys.argv[2], sys.argv[3])} records to {sys.argv[3]}")
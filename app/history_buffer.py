@@ -0,0 +1,164 @@
+import numpy as np
+
+OPERATIONS = ("Add", "Subtract", "Multiply", "Divide")
+VALUE_COLUMNS = ("operand1", "operand2", "result", "timestamp")
+
+
+class HistoryBuffer:
+    """Columnar, array-backed history rows that grow geometrically.
+
+    Operations are dictionary-encoded into a uint16 code column; operands and
+    results, plus the epoch-seconds timestamp, live in preallocated float64
+    arrays, so an append is amortized O(1) and a row costs 34 bytes instead of
+    a pandas object row.
+    """
+
+    def __init__(self, capacity=1024):
+        self._names = list(OPERATIONS)
+        self._codes = {name: code for code, name in enumerate(self._names)}
+        self._base_op = np.empty(0, dtype=np.uint16)
+        self._base_columns = [np.empty(0, dtype=np.float64) for _ in VALUE_COLUMNS]
+        self._size = 0
+        self._allocate(max(1, capacity))
+
+    @classmethod
+    def from_arrays(cls, op_codes, columns, names=OPERATIONS):
+        """Adopt existing arrays, such as memory-mapped record fields, as a read-only base.
+
+        The base is never copied or written: later rows go to a buffer owned by
+        this object, so a large mapped history stays mapped as it grows.
+        """
+        buffer = cls()
+        for name in names:
+            buffer.encode(name)
+        buffer._base_op = op_codes
+        buffer._base_columns = [columns[name] for name in VALUE_COLUMNS]
+        return buffer
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self._op = np.empty(capacity, dtype=np.uint16)
+        self._columns = [np.empty(capacity, dtype=np.float64) for _ in VALUE_COLUMNS]
+
+    def _reserve(self, needed):
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        size = self._size
+        op, columns = self._op, self._columns
+        self._allocate(capacity)
+        self._op[:size] = op[:size]
+        for target, source in zip(self._columns, columns):
+            target[:size] = source[:size]
+
+    def __len__(self):
+        return len(self._base_op) + self._size
+
+    def encode(self, operation):
+        """Return the code for an operation name, adding it to the dictionary if new."""
+        code = self._codes.get(operation)
+        if code is None:
+            code = len(self._names)
+            self._names.append(operation)
+            self._codes[operation] = code
+        return code
+
+    def encode_many(self, operations):
+        """Vectorized encode of a sequence of operation names."""
+        names, inverse = np.unique(np.asarray(operations, dtype=str), return_inverse=True)
+        codes = np.array([self.encode(str(name)) for name in names], dtype=np.uint16)
+        return codes[inverse.reshape(-1)]
+
+    def decode(self, code):
+        return self._names[code]
+
+    @property
+    def operation_names(self):
+        return tuple(self._names)
+
+    def append(self, operation, operand1, operand2, result, timestamp=np.nan):
+        size = self._size
+        self._reserve(size + 1)
+        self._op[size] = self.encode(operation)
+        columns = self._columns
+        columns[0][size] = operand1
+        columns[1][size] = operand2
+        columns[2][size] = result
+        columns[3][size] = timestamp
+        self._size = size + 1
+
+    def extend(self, op_codes, operand1, operand2, result, timestamp=np.nan):
+        """Bulk-append rows given already-encoded operation codes."""
+        count = len(op_codes)
+        start = self._size
+        self._reserve(start + count)
+        self._op[start:start + count] = op_codes
+        for column, values in zip(self._columns, (operand1, operand2, result, timestamp)):
+            column[start:start + count] = values
+        self._size = start + count
+
+    def clear(self):
+        self._size = 0
+        self._base_op = self._base_op[:0]
+        self._base_columns = [column[:0] for column in self._base_columns]
+
+    def _joined(self, base, owned):
+        # Only a buffer with both a base and rows of its own has to copy them into one array
+        if not self._size:
+            view = base[:]
+        elif not len(base):
+            view = owned[:self._size]
+        else:
+            view = np.concatenate([base, owned[:self._size]])
+        view.flags.writeable = False
+        return view
+
+    def op_codes(self):
+        """Return a read-only array of the operation code column."""
+        return self._joined(self._base_op, self._op)
+
+    def column(self, name):
+        """Return a read-only array of one float64 column."""
+        index = VALUE_COLUMNS.index(name)
+        return self._joined(self._base_columns[index], self._columns[index])
+
+    def take(self, rows):
+        """Operation codes and a dict of value columns for the given row numbers, reading only those rows."""
+        rows = np.asarray(rows, dtype=np.int64)
+        in_base = rows < len(self._base_op)
+        owned = rows[~in_base] - len(self._base_op)
+        pairs = [(self._base_op, self._op)] + list(zip(self._base_columns, self._columns))
+        selected = []
+        for base, column in pairs:
+            values = np.empty(len(rows), dtype=column.dtype)
+            values[in_base] = base[rows[in_base]]
+            values[~in_base] = column[owned]
+            selected.append(values)
+        return selected[0], dict(zip(VALUE_COLUMNS, selected[1:]))
+
+    def to_frame(self, rows=None):
+        """Materialize the rows (all, or the given row numbers) as a pandas DataFrame."""
+        if rows is None:
+            op_codes, columns = self.op_codes(), {name: self.column(name) for name in VALUE_COLUMNS}
+        else:
+            op_codes, columns = self.take(rows)
+        names = np.array(self._names, dtype=object)
+        return frame_from_columns(names[op_codes], columns, rows)
+
+
+def frame_from_columns(operations, columns, index=None):
+    """Build the history DataFrame from an operation name array and the VALUE_COLUMNS arrays."""
+    import pandas as pd
+    data = {"operation": operations}
+    for name in VALUE_COLUMNS:
+        data[name] = np.array(columns[name], dtype=np.float64)
+    # Convert epoch seconds in NumPy (NaN becomes NaT); pandas' unit="s" path can
+    # raise a spurious FloatingPointError on NaN-heavy columns
+    with np.errstate(invalid="ignore"):
+        data["timestamp"] = (data["timestamp"] * 1e9).astype("datetime64[ns]")
+    frame = pd.DataFrame(data)
+    if index is not None:
+        frame.index = index
+    return frame
@@ -0,0 +1,129 @@
+import json
+import os
+import struct
+import zlib
+import numpy as np
+from app.history_binary import RECORD, RECORD_DTYPE, encode_records
+from app.history_buffer import HistoryBuffer, VALUE_COLUMNS
+
+MAGIC = b"CALCSNAP"
+VERSION = 2
+PREFIX = struct.Struct("<8sHII")  # magic, version, length and CRC of the JSON metadata that follows
+BLOCK_RECORDS = 65536  # records per CRC block
+JOURNAL_WINDOWS = 16
+WINDOW_BYTES = 4096
+
+
+def _journal_fingerprint(journal_path, offset):
+    """Identify the journal's first `offset` bytes by sampling them, without reading them all.
+
+    The file's device and inode catch a journal replaced by another file. CRCs
+    of JOURNAL_WINDOWS windows of WINDOW_BYTES spread evenly over the prefix
+    (the first and last bytes included) catch one that was cleared, cut short
+    or rewritten in place, but only where the rewrite touches a sampled window:
+    at most JOURNAL_WINDOWS * WINDOW_BYTES bytes are checked, and an edit that
+    falls between windows goes unnoticed.
+    """
+    info = os.stat(journal_path)
+    if info.st_size < offset:
+        raise ValueError("the journal is shorter than the checkpoint offset")
+    crcs = []
+    with open(journal_path, "rb") as journal:
+        span = max(0, offset - WINDOW_BYTES)
+        for index in range(JOURNAL_WINDOWS):
+            start = span * index // (JOURNAL_WINDOWS - 1)
+            journal.seek(start)
+            crcs.append(zlib.crc32(journal.read(min(WINDOW_BYTES, offset - start))))
+    return {"device": info.st_dev, "inode": info.st_ino, "window_crcs": crcs}
+
+
+def write_checkpoint(path, buffer, stats_state, journal_path, offset):
+    """Save the rows and running statistics that the journal's first `offset` bytes hold.
+
+    The rows are stored as binary history records after a JSON header, so
+    loading maps them instead of parsing. The header has its own CRC, and the
+    records one CRC per BLOCK_RECORDS, for verify_checkpoint(). The file is
+    replaced atomically.
+    """
+    records = encode_records(buffer.op_codes(), *(buffer.column(name) for name in VALUE_COLUMNS))
+    block_bytes = BLOCK_RECORDS * RECORD.size
+    meta = {"rows": len(buffer), "names": list(buffer.operation_names), "stats": stats_state,
+            "journal_offset": offset, "journal": _journal_fingerprint(journal_path, offset),
+            "block_crcs": [zlib.crc32(records[start:start + block_bytes])
+                           for start in range(0, len(records), block_bytes)]}
+    meta = json.dumps(meta).encode()
+    head = PREFIX.pack(MAGIC, VERSION, len(meta), zlib.crc32(meta)) + meta
+    head += b"\0" * (-len(head) % 8)  # keep the records 8-byte aligned for the memory map
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as output:
+        output.write(head)
+        output.write(records)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(temporary, path)
+
+
+def _read_meta(path):
+    """The checkpoint's metadata and the offset of its first record; ValueError if damaged."""
+    with open(path, "rb") as source:
+        prefix = source.read(PREFIX.size)
+        if len(prefix) < PREFIX.size:
+            raise ValueError("the checkpoint is truncated")
+        magic, version, meta_size, meta_crc = PREFIX.unpack(prefix)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} history checkpoint")
+        meta = source.read(meta_size)
+    if zlib.crc32(meta) != meta_crc:
+        raise ValueError("the checkpoint header is damaged")
+    meta = json.loads(meta)
+    data_offset = PREFIX.size + meta_size + (-(PREFIX.size + meta_size) % 8)
+    if os.path.getsize(path) != data_offset + meta["rows"] * RECORD.size:
+        raise ValueError("the checkpoint is truncated")
+    return meta, data_offset
+
+
+def read_checkpoint(path, journal_path):
+    """Load a checkpoint as (buffer, stats state, journal offset).
+
+    Only the header and a fixed sample of the journal are read, so this costs
+    the same however many rows the checkpoint holds; the rows themselves are
+    mapped, and checked separately by verify_checkpoint(). Raises ValueError
+    if the header is damaged or the checkpoint no longer matches the journal
+    (it was replaced, cleared or lost rows the checkpoint covers, or was
+    rewritten inside one of the windows _journal_fingerprint samples), in
+    which case the caller should rebuild from the journal instead.
+    """
+    meta, data_offset = _read_meta(path)
+    fingerprint = _journal_fingerprint(journal_path, meta["journal_offset"])
+    if (fingerprint["device"], fingerprint["inode"]) != (meta["journal"]["device"], meta["journal"]["inode"]):
+        raise ValueError("the journal was replaced since the checkpoint was taken")
+    if fingerprint["window_crcs"] != meta["journal"]["window_crcs"]:
+        raise ValueError("the journal has changed since the checkpoint was taken")
+    return _map_rows(path, meta, data_offset), meta["stats"], meta["journal_offset"]
+
+
+def map_checkpoint(path):
+    """The rows of a checkpoint just written, mapped as a read-only HistoryBuffer."""
+    return _map_rows(path, *_read_meta(path))
+
+
+def _map_rows(path, meta, data_offset):
+    if meta["rows"] == 0:
+        buffer = HistoryBuffer()
+        for name in meta["names"]:
+            buffer.encode(name)
+        return buffer
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=data_offset, shape=(meta["rows"],))
+    return HistoryBuffer.from_arrays(records["op"], records, meta["names"])
+
+
+def verify_checkpoint(path):
+    """Check every record block against its CRC; raises ValueError naming the first damaged block."""
+    meta, data_offset = _read_meta(path)
+    if meta["rows"] == 0:
+        return
+    data = np.memmap(path, dtype=np.uint8, mode="r", offset=data_offset, shape=(meta["rows"] * RECORD.size,))
+    block_bytes = BLOCK_RECORDS * RECORD.size
+    for index, crc in enumerate(meta["block_crcs"]):
+        if zlib.crc32(data[index * block_bytes:(index + 1) * block_bytes]) != crc:
+            raise ValueError(f"the checkpoint rows are damaged (block {index})")
@@ -0,0 +1,170 @@
+import numpy as np
+
+
+class GrowableArray:
+    """Append-only int64 array with geometric growth."""
+
+    def __init__(self, values=None, capacity=64):
+        values = np.asarray(values if values is not None else [], dtype=np.int64)
+        self._data = np.empty(max(capacity, len(values)), dtype=np.int64)
+        self._data[:len(values)] = values
+        self._size = len(values)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        self.extend(np.array([value], dtype=np.int64))
+
+    def extend(self, values):
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            capacity = len(self._data)
+            while capacity < needed:
+                capacity *= 2
+            data = np.empty(capacity, dtype=np.int64)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        self._data[self._size:needed] = values
+        self._size = needed
+
+    def view(self):
+        return self._data[:self._size]
+
+
+class SortedIndex:
+    """Rows sorted by a float key, maintained incrementally.
+
+    New rows land in a small unsorted tail that range lookups scan directly; once
+    the tail outgrows merge_threshold it is sorted into a new run. Runs are kept
+    each at least twice the size of the next, merging the smaller ones as they
+    catch up, so a row is copied O(log n) times in all instead of on every merge
+    and there are only O(log n) runs. Lookups are two binary searches per run
+    plus a bounded tail scan.
+    """
+
+    def __init__(self, keys=None, merge_threshold=4096):
+        self.merge_threshold = merge_threshold
+        keys = np.asarray(keys if keys is not None else [], dtype=np.float64)
+        order = np.argsort(keys, kind="stable")
+        self._runs = [(keys[order], order.astype(np.int64))] if len(keys) else []
+        self._tail_keys = []
+        self._tail_rows = []
+
+    def __len__(self):
+        return sum(len(rows) for _, rows in self._runs) + len(self._tail_rows)
+
+    def add(self, row, key):
+        self._tail_keys.append(key)
+        self._tail_rows.append(row)
+        if len(self._tail_rows) > self.merge_threshold:
+            self.merge()
+
+    def add_many(self, rows, keys):
+        self._tail_keys.extend(np.asarray(keys, dtype=np.float64).tolist())
+        self._tail_rows.extend(np.asarray(rows, dtype=np.int64).tolist())
+        if len(self._tail_rows) > self.merge_threshold:
+            self.merge()
+
+    def merge(self):
+        """Sort the tail into a run, merging it with any run not more than twice its size."""
+        if not self._tail_rows:
+            return
+        keys = np.array(self._tail_keys, dtype=np.float64)
+        rows = np.array(self._tail_rows, dtype=np.int64)
+        self._tail_keys, self._tail_rows = [], []
+        while self._runs and len(self._runs[-1][0]) <= 2 * len(keys):
+            run_keys, run_rows = self._runs.pop()
+            keys = np.concatenate([run_keys, keys])
+            rows = np.concatenate([run_rows, rows])
+        order = np.argsort(keys, kind="stable")
+        self._runs.append((keys[order], rows[order]))
+
+    def range(self, low=-np.inf, high=np.inf, low_inclusive=True, high_inclusive=True):
+        """Row numbers whose key lies in the range, in no particular order."""
+        parts = []
+        for keys, rows in self._runs:
+            start = np.searchsorted(keys, low, side="left" if low_inclusive else "right")
+            stop = np.searchsorted(keys, high, side="right" if high_inclusive else "left")
+            parts.append(rows[start:stop])
+        if self._tail_rows:
+            keys = np.array(self._tail_keys, dtype=np.float64)
+            mask = (keys >= low if low_inclusive else keys > low) & (keys <= high if high_inclusive else keys < high)
+            parts.append(np.array(self._tail_rows, dtype=np.int64)[mask])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+
+class HistoryIndex:
+    """Per-operation row lists plus sorted result and timestamp indexes over a HistoryBuffer.
+
+    Built on first query and then kept current on every insert, so loading
+    history stays cheap and lookups never rescan the whole buffer.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.built = False
+        self.by_operation = {}
+        self.by_result = None
+        self.by_timestamp = None
+
+    def build(self, buffer):
+        op_codes = buffer.op_codes()
+        self.by_operation = {}
+        for code in np.unique(op_codes).tolist():
+            self.by_operation[code] = GrowableArray(np.flatnonzero(op_codes == code))
+        self.by_result = SortedIndex(buffer.column("result"))
+        self.by_timestamp = SortedIndex(buffer.column("timestamp"))
+        self.built = True
+
+    def add(self, row, code, result, timestamp):
+        if not self.built:
+            return
+        self.by_operation.setdefault(code, GrowableArray()).append(row)
+        self.by_result.add(row, result)
+        self.by_timestamp.add(row, timestamp)
+
+    def add_many(self, start, op_codes, result, timestamp):
+        if not self.built:
+            return
+        rows = np.arange(start, start + len(op_codes), dtype=np.int64)
+        op_codes = np.asarray(op_codes)
+        for code in np.unique(op_codes).tolist():
+            self.by_operation.setdefault(code, GrowableArray()).extend(rows[op_codes == code])
+        self.by_result.add_many(rows, result)
+        self.by_timestamp.add_many(rows, np.broadcast_to(timestamp, rows.shape))
+
+    def query(self, buffer, operation=None, result_gt=None, result_ge=None, result_lt=None, result_le=None,
+              since=None, until=None, last=None):
+        """Return matching row numbers in insertion order, optionally only the last N.
+
+        The result is a NumPy array, or a range when no filter applies.
+        """
+        if not self.built:
+            self.build(buffer)
+        selections = []
+        if operation is not None:
+            names = buffer.operation_names
+            code = names.index(operation) if operation in names else None
+            rows = self.by_operation.get(code)
+            selections.append(rows.view() if rows is not None else np.zeros(0, dtype=np.int64))
+        if any(bound is not None for bound in (result_gt, result_ge, result_lt, result_le)):
+            low, low_inclusive = (result_gt, False) if result_gt is not None else (result_ge, True)
+            high, high_inclusive = (result_lt, False) if result_lt is not None else (result_le, True)
+            selections.append(np.sort(self.by_result.range(
+                -np.inf if low is None else low, np.inf if high is None else high, low_inclusive, high_inclusive)))
+        if since is not None or until is not None:
+            selections.append(np.sort(self.by_timestamp.range(
+                -np.inf if since is None else since, np.inf if until is None else until)))
+        if not selections:
+            rows = range(len(buffer))  # no filter: avoid materializing every row number
+        else:
+            selections.sort(key=len)
+            rows = selections[0]
+            for other in selections[1:]:
+                rows = np.intersect1d(rows, other, assume_unique=True)
+        if last is not None:
+            rows = rows[-last:] if last > 0 else rows[:0]
+        return rows
@@ -0,0 +1,216 @@
+import csv
+import itertools
+import os
+import time
+import numpy as np
+from app.history_backend import HistoryBackend
+from app.history_buffer import HistoryBuffer
+
+COLUMNS = ["operation", "operand1", "operand2", "result", "timestamp"]
+JOURNAL_CHUNK_ROWS = 65536
+
+
+def format_record(operation, operand1, operand2, result, timestamp):
+    """Encode one history row as a single CSV journal line."""
+    return f"{operation},{float(operand1)!r},{float(operand2)!r},{float(result)!r},{float(timestamp)!r}\n"
+
+
+def format_records(names, op_codes, operand1, operand2, result, timestamp):
+    """Encode many rows as journal lines, yielding one string per chunk of rows."""
+    for start in range(0, len(op_codes), JOURNAL_CHUNK_ROWS):
+        stop = start + JOURNAL_CHUNK_ROWS
+        rows = zip(op_codes[start:stop].tolist(), operand1[start:stop].tolist(),
+                   operand2[start:stop].tolist(), result[start:stop].tolist(),
+                   timestamp[start:stop].tolist())
+        yield "".join(f"{names[code]},{x!r},{y!r},{r!r},{t!r}\n" for code, x, y, r, t in rows)
+
+
+def _to_float(value):
+    return float(value) if value else float("nan")
+
+
+def read_records(path, offset=None):
+    """Parse a journal into a dict of columns without going through pandas.
+
+    Well-formed files are split in one pass and converted with NumPy; anything
+    irregular falls back to the csv module, skipping rows that do not parse.
+    With offset, only the rows from that byte position (a record boundary) on
+    are read.
+    """
+    with open(path, "rb") as journal:
+        header = journal.readline().decode("utf-8").strip().split(",")
+        if offset is not None:
+            journal.seek(offset)
+        return _parse_records(header, journal.read())
+
+
+def iter_records(path, chunk_rows=JOURNAL_CHUNK_ROWS):
+    """Yield a journal's rows as read_records() column dicts of at most chunk_rows rows each.
+
+    Only one chunk of the file is held at a time, so a journal of any size can
+    be replayed in bounded memory.
+    """
+    with open(path, "rb") as journal:
+        header = journal.readline().decode("utf-8").strip().split(",")
+        while True:
+            lines = list(itertools.islice(journal, chunk_rows))
+            if not lines:
+                return
+            yield _parse_records(header, b"".join(lines))
+
+
+def _parse_records(header, data):
+    text = data.decode("utf-8").replace("\r\n", "\n")
+    width = len(header)
+    rows = text.count("\n")
+    tokens = text.replace("\n", ",").split(",")
+    if tokens and tokens[-1] == "":
+        tokens.pop()
+    if len(tokens) == rows * width:
+        try:
+            columns = {"operation": tokens[0::width]}
+            for index, name in enumerate(header[1:], start=1):
+                columns[name] = np.array(tokens[index::width], dtype=np.float64)
+            return columns
+        except ValueError:
+            pass
+    operations, values = [], []
+    for row in csv.reader(text.splitlines()):
+        if len(row) != width:
+            continue
+        try:
+            values.append([_to_float(value) for value in row[1:]])
+        except ValueError:
+            continue
+        operations.append(row[0])
+    matrix = np.array(values, dtype=np.float64).reshape(-1, width - 1)
+    columns = {"operation": operations}
+    for index, name in enumerate(header[1:]):
+        columns[name] = matrix[:, index]
+    return columns
+
+
+def read_header(path):
+    with open(path, "r", encoding="utf-8") as journal:
+        return journal.readline().strip().split(",")
+
+
+class HistoryJournal(HistoryBackend):
+    """Append-only CSV journal of history rows with a configurable fsync policy."""
+
+    def __init__(self, path, fsync_policy="never", fsync_interval=1.0):
+        self.path = path
+        self._fd = None
+        self._last_fsync = time.monotonic()
+        self.configure_fsync(fsync_policy, fsync_interval)
+
+    def format_row(self, operation, code, operand1, operand2, result, timestamp):
+        return format_record(operation, operand1, operand2, result, timestamp)
+
+    def format_rows(self, names, op_codes, operand1, operand2, result, timestamp):
+        return format_records(names, op_codes, operand1, operand2, result, timestamp)
+
+    def load(self):
+        buffer = HistoryBuffer()
+        if self.repair() > 0:
+            columns = read_records(self.path)
+            buffer.extend(buffer.encode_many(columns["operation"]), columns["operand1"], columns["operand2"],
+                          columns["result"], columns["timestamp"])
+        return buffer
+
+    def append(self, data):
+        fd = self._open()
+        self._write(fd, data)
+        if self.fsync_policy == "always":
+            os.fsync(fd)
+        elif self.fsync_policy == "interval":
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(fd)
+                self._last_fsync = now
+
+    def truncate(self):
+        """Drop every record, leaving only the header row."""
+        fd = self._open()
+        os.ftruncate(fd, 0)
+        self._write(fd, ",".join(COLUMNS) + "\n")
+
+    def close(self):
+        """Flush and release the journal file descriptor."""
+        if self._fd is not None:
+            if self.fsync_policy != "never":
+                os.fsync(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+    def upgrade(self):
+        """Rewrite a journal with an older header (e.g. no timestamp column) in the current layout.
+
+        Missing columns are filled with nan. The new file replaces the old one atomically.
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0 or read_header(self.path) == COLUMNS:
+            return
+        self.close()
+        columns = read_records(self.path)
+        count = len(columns["operation"])
+        missing = np.full(count, np.nan)
+        names = sorted(set(columns["operation"]))
+        codes = {name: code for code, name in enumerate(names)}
+        op_codes = np.array([codes[name] for name in columns["operation"]], dtype=np.int64)
+        temp_path = f"{self.path}.upgrade"
+        with open(temp_path, "w", encoding="utf-8") as upgraded:
+            upgraded.write(",".join(COLUMNS) + "\n")
+            for chunk in format_records(names, op_codes, *(columns.get(name, missing) for name in COLUMNS[1:])):
+                upgraded.write(chunk)
+        os.replace(temp_path, self.path)
+
+    def _open(self):
+        if self._fd is None:
+            self.upgrade()
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if os.fstat(fd).st_size == 0:
+                self._write(fd, ",".join(COLUMNS) + "\n")
+            self._fd = fd
+        return self._fd
+
+    @staticmethod
+    def _write(fd, data):
+        # A single write on an O_APPEND descriptor lands the whole record at EOF;
+        # the loop only matters for the rare short write.
+        view = memoryview(data.encode() if isinstance(data, str) else data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+
+    def repair(self):
+        """Drop a torn trailing record left behind by a crash mid-append, returning the new size."""
+        if not os.path.exists(self.path):
+            return 0
+        size = self._repair_tail()
+        if size:
+            self.upgrade()
+            size = os.path.getsize(self.path)
+        return size
+
+    def _repair_tail(self):
+        with open(self.path, "rb+") as journal:
+            journal.seek(0, os.SEEK_END)
+            size = journal.tell()
+            if size == 0:
+                return 0
+            journal.seek(size - 1)
+            if journal.read(1) == b"\n":
+                return size
+            block = 4096
+            end = size
+            while end > 0:
+                start = max(0, end - block)
+                journal.seek(start)
+                chunk = journal.read(end - start)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    journal.truncate(start + newline + 1)
+                    return start + newline + 1
+                end = start
+            journal.truncate(0)
+            return 0
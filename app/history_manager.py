@@ -1,29 +1,638 @@
+import atexit
+import itertools
+import logging
 import os
-import pandas as pd
+import shutil
+import threading
+import time
+import numpy as np
+from app.history_backend import join_records
+from app.history_binary import BinaryHistoryFile
+from app.history_checkpoint import map_checkpoint, read_checkpoint, verify_checkpoint, write_checkpoint
+from app.history_buffer import HistoryBuffer, VALUE_COLUMNS, frame_from_columns
+from app.history_index import HistoryIndex
+from app.history_journal import HistoryJournal, iter_records, read_records
+from app.history_segments import SegmentStore
+from app.history_sqlite import SQLiteHistory, csv_to_sqlite
+from app.history_stats import HistoryStats, window_stats
+from app.history_writer import HistoryWriter
+from app.metrics import METRICS
+
 
 class HistoryManager:
+    """Process-wide calculation history, safe to share between threads.
+
+    Each save takes a global sequence number and goes into a buffer owned by the
+    calling thread, so writers never wait on each other. Buffers are merged into
+    the shared store under one lock, in sequence order, once a thread has
+    HISTORY_THREAD_BUFFER rows pending (default 1: every save is merged and
+    persisted at once) and before every read, so readers see a consistent prefix.
+
+    Rows are persisted by the HistoryBackend named by HISTORY_BACKEND: csv
+    (default), binary or sqlite. A CSV history is checkpointed every
+    HISTORY_CHECKPOINT_ROWS rows, so startup maps the checkpoint and replays
+    only the journal rows written after it; the checkpoint's rows are verified
+    on a background thread, and history is rebuilt from the journal if they
+    turn out to be damaged.
+    """
+
     _instance = None
+    _instance_lock = threading.Lock()
     _history_file = "history.csv"
+    _binary_history_file = "history.bin"
+    _sqlite_history_file = "history.db"
+    _segment_dir = "history_segments"
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(HistoryManager, cls).__new__(cls)
-            cls._instance.history = pd.DataFrame(columns=["operation", "operand1", "operand2", "result"])
-            cls._instance.load_history()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(HistoryManager, cls).__new__(cls)
+                    instance._setup()
+                    cls._instance = instance  # publish only once fully loaded
         return cls._instance
 
+    def _setup(self):
+        self.backend, self.journal, self.segments = self.open_backend()
+        if self.segments is not None:
+            self.window_rows = max(1, int(os.getenv("HISTORY_WINDOW_ROWS", "100000")))
+            self.segments.start_compactor()
+        self._synced_names = 0
+        # Binary and segmented histories already open without a full parse, and SQLite has its own files
+        self.checkpoint_rows = int(os.getenv("HISTORY_CHECKPOINT_ROWS", "100000"))
+        self.checkpoint_path = f"{self.journal.path}.checkpoint" \
+            if self.backend == "csv" and self.segments is None and self.checkpoint_rows > 0 else None
+        self._checkpointed_rows = 0
+        self._unverified_checkpoint = None  # token for the loaded checkpoint until its rows are verified
+        self._verifier = None
+        self.writer = None
+        self.buffer = HistoryBuffer()
+        self.index = HistoryIndex()
+        self.running_stats = HistoryStats()
+        self._frame = None
+        self._lock = threading.RLock()
+        self._sequence = itertools.count()
+        self._next_sequence = 0
+        self._local = threading.local()
+        self._thread_buffers = []  # (thread, pending entries) for each thread that has saved
+        self._carry = []  # entries waiting for a lower sequence number to arrive
+        self.subscribers = []
+        self.thread_buffer_rows = max(1, int(os.getenv("HISTORY_THREAD_BUFFER", "1")))
+        self.load_history()
+        if os.getenv("HISTORY_ASYNC", "").lower() in ("1", "true", "yes"):
+            self.enable_async_writes(int(os.getenv("HISTORY_QUEUE_SIZE", "10000")))
+
+    @classmethod
+    def open_backend(cls):
+        """Open the storage that HISTORY_BACKEND and HISTORY_STORE select, without reading any rows.
+
+        Returns (backend name, HistoryBackend, SegmentStore or None). Stream,
+        batch and parallel runs append through this too, so every mode writes
+        where the REPL reads.
+        """
+        # HISTORY_FORMAT=binary is the older spelling of HISTORY_BACKEND=binary
+        backend = os.getenv("HISTORY_BACKEND", "").lower() or os.getenv("HISTORY_FORMAT", "csv").lower()
+        backends = {"csv": (HistoryJournal, cls._history_file),
+                    "binary": (BinaryHistoryFile, cls._binary_history_file),
+                    "sqlite": (SQLiteHistory, cls._sqlite_history_file)}
+        if backend not in backends:
+            raise ValueError(f"Unknown history backend '{backend}', expected one of {tuple(backends)}")
+        backend_class, path = backends[backend]
+        segments = None
+        if os.getenv("HISTORY_STORE", "").lower() == "segmented":
+            if backend != "csv":
+                logging.warning("HISTORY_STORE=segmented keeps recent rows in a CSV journal; "
+                                "HISTORY_BACKEND=%s ignored", backend)
+            segments = cls._open_segments()
+            backend, backend_class, path = "csv", HistoryJournal, segments.journal_path
+        elif backend == "sqlite" and not os.path.exists(path) and os.path.exists(cls._history_file):
+            logging.info("Importing %s into %s", cls._history_file, path)
+            csv_to_sqlite(cls._history_file, path)
+        journal = backend_class(path, os.getenv("HISTORY_FSYNC", "never"),
+                                float(os.getenv("HISTORY_FSYNC_INTERVAL", "1.0")))
+        return backend, journal, segments
+
+    @classmethod
+    def _open_segments(cls):
+        """Load the segment store, importing history.csv on first use."""
+        segments = SegmentStore(cls._segment_dir, int(os.getenv("HISTORY_COMPACT_FANOUT", "4")),
+                                int(os.getenv("HISTORY_MAX_SEGMENT_ROWS", "2000000")))
+        new_store = not segments.exists
+        segments.load()
+        if new_store and os.path.exists(cls._history_file):
+            shutil.copyfile(cls._history_file, segments.journal_path)  # sealed on load if large
+        return segments
+
+    def subscribe(self, subscriber):
+        """Have subscriber.row(...) called for each saved row, and subscriber.rows(...) for each save_many.
+
+        Calls are made in save order while the history lock is held, so they
+        must return quickly (e.g. by queueing the row for another thread).
+        """
+        with self._lock:
+            self.subscribers = self.subscribers + [subscriber]
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self.subscribers = [item for item in self.subscribers if item is not subscriber]
+
+    def enable_async_writes(self, max_queue=10000, batch_size=512, linger=0.01):
+        """Move journal writes off the caller's thread onto a group-committing writer thread."""
+        with self._lock:
+            if self.writer is None:
+                self.writer = HistoryWriter(self.journal, max_queue, batch_size, linger)
+                atexit.register(self.flush)
+
+    def disable_async_writes(self):
+        with self._lock:
+            self.merge_pending()
+            if self.writer is not None:
+                self.writer.close()
+                atexit.unregister(self.flush)
+                self.writer = None
+
+    def flush(self):
+        """Merge rows buffered by any thread and wait until they have reached the journal."""
+        self.merge_pending()
+        if self.writer is not None:
+            self.writer.flush()
+
+    def configure_fsync(self, policy, interval=1.0):
+        """Set when journal appends are forced to disk: always, interval or never."""
+        with self._lock:
+            self.journal.configure_fsync(policy, interval)
+
+    @property
+    def fsync_policy(self):
+        return self.journal.fsync_policy
+
+    @property
+    def history(self):
+        """The whole history as a DataFrame, built from the columnar buffer only when asked for.
+
+        With segments this reads every one of them, so it is not kept: use
+        display(), page() or pages() to show history without loading it all.
+        """
+        with self._lock:
+            self.merge_pending()
+            if self.segments is not None and self.segments.rows:
+                return self._rows_frame(np.arange(self.row_count(), dtype=np.int64), index=False)
+            if self._frame is None:
+                self._frame = self.buffer.to_frame()
+            return self._frame
+
+    def row_count(self):
+        """Total rows, including those in segments."""
+        with self._lock:
+            self.merge_pending()
+            return len(self.buffer) + (self.segments.rows if self.segments is not None else 0)
+
+    def _rows_columns(self, rows):
+        """Operation names and value columns for global row numbers, from segments and the window."""
+        rows = np.asarray(rows, dtype=np.int64)
+        base = self.segments.rows if self.segments is not None else 0
+        in_window = rows >= base
+        if in_window.all():
+            local = rows - base
+            names = np.array(self.buffer.operation_names, dtype=object)
+            op_codes, columns = self.buffer.take(local)
+            return names[op_codes], columns
+        operations, columns = self.segments.read_rows(rows[~in_window])
+        if in_window.any():
+            window_operations, window_columns = self._rows_columns(rows[in_window])
+            operations = np.concatenate([operations, window_operations])
+            columns = {name: np.concatenate([columns[name], window_columns[name]]) for name in VALUE_COLUMNS}
+        return operations, columns
+
+    def _rows_frame(self, rows, index=True):
+        operations, columns = self._rows_columns(rows)
+        return frame_from_columns(operations, columns, rows if index else None)
+
     def save_to_history(self, operation, operand1, operand2, result):
-        new_entry = pd.DataFrame([[operation, operand1, operand2, result]], columns=["operation", "operand1", "operand2", "result"])
-        self.history = pd.concat([self.history, new_entry], ignore_index=True)
-        self.history.to_csv(self._history_file, index=False)
+        start = time.perf_counter()
+        pending = self._pending_entries()
+        pending.append((next(self._sequence), self._apply_row,
+                        (operation, operand1, operand2, result, time.time())))
+        if len(pending) >= self.thread_buffer_rows:
+            self.merge_pending()
+        METRICS.add_time("history_write", time.perf_counter() - start)
+
+    def save_many(self, op_codes, operand1, operand2, result, timestamp=None):
+        """Record many rows at once from encoded operation codes and float64 arrays."""
+        if len(op_codes) == 0:
+            return
+        start = time.perf_counter()
+        if timestamp is None:
+            timestamp = np.full(len(op_codes), time.time())
+        self._pending_entries().append((next(self._sequence), self._apply_many,
+                                        (op_codes, operand1, operand2, result, timestamp)))
+        self.merge_pending()
+        METRICS.add_time("history_write", time.perf_counter() - start)
+
+    def merge_segment(self, path):
+        """Append the rows of a history segment (a journal written by another process)."""
+        columns = read_records(path)
+        with self._lock:
+            codes = self.buffer.encode_many(columns["operation"]) if len(columns["operation"]) else []
+        self.save_many(codes, columns["operand1"], columns["operand2"], columns["result"], columns["timestamp"])
+        return len(codes)
+
+    def _pending_entries(self):
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = []
+            with self._lock:
+                self._thread_buffers.append((threading.current_thread(), pending))
+        return pending
+
+    def merge_pending(self):
+        """Move entries from every thread's buffer into the store, in sequence order.
+
+        An entry is only applied once every lower sequence number has been seen;
+        one whose predecessor is still being appended by another thread waits for
+        the next merge.
+        """
+        with self._lock:
+            entries = self._carry
+            for _, pending in self._thread_buffers:
+                count = len(pending)
+                if count:
+                    entries.extend(pending[:count])
+                    del pending[:count]  # the owner may have appended more meanwhile
+            self._thread_buffers = [(thread, pending) for thread, pending in self._thread_buffers
+                                    if pending or thread.is_alive()]
+            if not entries:
+                return
+            entries.sort(key=lambda entry: entry[0])
+            ready = 0
+            while ready < len(entries) and entries[ready][0] == self._next_sequence + ready:
+                ready += 1
+            self._carry = entries[ready:]
+            self._next_sequence += ready
+            if ready:
+                self._apply(entries[:ready])
+
+    def _apply(self, entries):
+        """Add merged entries to the buffer, index and statistics; single rows are persisted in one write."""
+        records = []
+        for _, apply, args in entries:
+            if apply == self._apply_many and records:
+                self._persist_records(records)  # keep journal order around bulk writes
+                records = []
+            record = apply(*args)
+            if record is not None:
+                records.append(record)
+        if records:
+            self._persist_records(records)
+        self._frame = None
+        if self.segments is not None and len(self.buffer) >= self.window_rows:
+            self._seal()
+        elif self.checkpoint_path is not None and len(self.buffer) - self._checkpointed_rows >= self.checkpoint_rows:
+            self._write_checkpoint()
+
+    def _seal(self):
+        """Move the in-memory window to a new segment and continue in a fresh journal."""
+        if self.writer is not None:
+            self.writer.flush()
+        self._switch_journal(self.segments.seal(self.buffer, self.running_stats.state()))
+        self.buffer = HistoryBuffer()
+        self._synced_names = len(self.buffer.operation_names)
+        self.index.clear()
+
+    def _switch_journal(self, path):
+        """Continue in the segment store's new journal at path."""
+        self.journal.close()
+        self.journal = HistoryJournal(path, self.journal.fsync_policy, self.journal.fsync_interval)
+        if self.writer is not None:
+            self.writer.journal = self.journal
+
+    def _apply_row(self, operation, operand1, operand2, result, timestamp):
+        self.buffer.append(operation, operand1, operand2, result, timestamp)
+        code = self.buffer.encode(operation)
+        self.index.add(len(self.buffer) - 1, code, result, timestamp)
+        self.running_stats.add(operation, result)
+        for subscriber in self.subscribers:
+            subscriber.row(operation, operand1, operand2, result, timestamp)
+        return self.journal.format_row(operation, code, operand1, operand2, result, timestamp)
+
+    def _apply_many(self, op_codes, operand1, operand2, result, timestamp):
+        start = len(self.buffer)
+        self.buffer.extend(op_codes, operand1, operand2, result, timestamp)
+        self.index.add_many(start, op_codes, result, timestamp)
+        names = self.buffer.operation_names
+        self.running_stats.add_many(names, op_codes, result)
+        for subscriber in self.subscribers:
+            subscriber.rows(names, op_codes, operand1, operand2, result, timestamp)
+        self._sync_operation_names()
+        for chunk in self.journal.format_rows(names, op_codes, operand1, operand2, result, timestamp):
+            self._persist(chunk)
+        return None
+
+    def _persist_records(self, records):
+        self._sync_operation_names()
+        self._persist(join_records(records))
+
+    def _sync_operation_names(self):
+        # Tell the backend about names added since the last write, once everything queued has landed
+        if len(self.buffer.operation_names) != self._synced_names:
+            if self.writer is not None:
+                self.writer.flush()
+            self.journal.sync_names(self.buffer.operation_names)
+            self._synced_names = len(self.buffer.operation_names)
+
+    def _persist(self, data):
+        if self.writer is not None:
+            self.writer.submit(data)
+        else:
+            self.journal.append(data)
 
     def load_history(self):
-        if os.path.exists(self._history_file):
-            self.history = pd.read_csv(self._history_file)
+        """Rebuild the in-memory history by replaying the journal file (after the checkpoint, if any)."""
+        with self._lock:
+            self.flush()
+            self.index.clear()
+            self._frame = None
+            self._unverified_checkpoint = None
+            if self._load_checkpoint():
+                return
+            if self.segments is not None:
+                self._load_window()
+                return
+            self.buffer = self.journal.load()  # a fresh buffer, so existing snapshots stay intact
+            self._synced_names = len(self.buffer.operation_names)
+            self.running_stats.rebuild(self.buffer)
+            if self.checkpoint_path is not None and len(self.buffer) >= self.checkpoint_rows:
+                self._write_checkpoint()  # spare the next start this full parse
+
+    def _load_window(self):
+        """Replay the segmented store's journal, sealing every window_rows rows into a segment as they are read.
+
+        Rows in segments are summarized by the manifest, so only the journal is
+        read, one window at a time: a journal filled by --stream or --batch, or
+        an imported history.csv, never has to fit in memory. The new segments
+        and a journal holding the rows left over are named in the manifest once
+        the whole journal has been read.
+        """
+        self.running_stats.restore(self.segments.stats_state)
+        self.buffer = HistoryBuffer()
+        sealed, sealed_stats = [], None
+        start = self.segments.rows
+        if self.journal.repair() > 0:
+            for columns in iter_records(self.journal.path, self.window_rows):
+                codes = self.buffer.encode_many(columns["operation"])
+                self.buffer.extend(codes, columns["operand1"], columns["operand2"], columns["result"],
+                                   columns["timestamp"])
+                self.running_stats.add_many(self.buffer.operation_names, codes, columns["result"])
+                if len(self.buffer) >= self.window_rows:
+                    sealed.append(self.segments.new_segment(start, self.buffer))
+                    start += len(self.buffer)
+                    sealed_stats = self.running_stats.state()
+                    self.buffer = HistoryBuffer()
+        if sealed:
+            window = self.buffer
+
+            def write_window(path):
+                journal = HistoryJournal(path)
+                for chunk in journal.format_rows(window.operation_names, window.op_codes(),
+                                                 *(window.column(name) for name in VALUE_COLUMNS)):
+                    journal.append(chunk)
+                journal.close()
+
+            self._switch_journal(self.segments.seal_many(sealed, sealed_stats, write_window))
+        self._synced_names = len(self.buffer.operation_names)
+
+    def _load_checkpoint(self):
+        """Load the checkpoint and replay the journal rows after it; False if a full rebuild is needed.
+
+        The checkpoint's rows stay mapped; only the replayed rows are held in
+        memory, until the next checkpoint takes them in.
+        """
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return False
+        try:
+            if self.journal.repair() == 0:
+                raise ValueError("the journal is empty")
+            buffer, stats_state, offset = read_checkpoint(self.checkpoint_path, self.journal.path)
+            columns = read_records(self.journal.path, offset)
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning("Ignoring history checkpoint %s (%s); rebuilding from the journal",
+                            self.checkpoint_path, e)
+            return False
+        self._checkpointed_rows = len(buffer)
+        self.running_stats.restore(stats_state)
+        if len(columns["operation"]):
+            codes = buffer.encode_many(columns["operation"])
+            buffer.extend(codes, columns["operand1"], columns["operand2"], columns["result"], columns["timestamp"])
+            self.running_stats.add_many(buffer.operation_names, codes, columns["result"])
+        self.buffer = buffer
+        self._synced_names = len(buffer.operation_names)
+        self._unverified_checkpoint = token = object()
+        self._verifier = threading.Thread(target=self._verify_in_background, args=(token,),
+                                          name="checkpoint-verify", daemon=True)
+        self._verifier.start()
+        return True
+
+    def _verify_in_background(self, token):
+        """Check the loaded checkpoint's row CRCs off the startup path; the result is dropped if it went stale."""
+        try:
+            verify_checkpoint(self.checkpoint_path)
+            error = None
+        except (OSError, ValueError, KeyError) as e:
+            error = e
+        with self._lock:
+            if self._unverified_checkpoint is token:
+                self._unverified_checkpoint = None
+                if error is not None:
+                    self._rebuild_from_journal(error)
+
+    def _check_loaded_checkpoint(self):
+        """Verify the loaded checkpoint now if the background check has not; False if it was damaged."""
+        if self._unverified_checkpoint is None:
+            return True
+        self._unverified_checkpoint = None
+        try:
+            verify_checkpoint(self.checkpoint_path)
+        except (OSError, ValueError, KeyError) as e:
+            self._rebuild_from_journal(e)
+            return False
+        return True
+
+    def _rebuild_from_journal(self, error):
+        logging.warning("History checkpoint %s failed verification (%s); rebuilding from the journal",
+                        self.checkpoint_path, error)
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self._checkpointed_rows = 0
+        self.load_history()
+
+    def checkpoint(self):
+        """Checkpoint the history now, so the next start replays only rows saved after this."""
+        with self._lock:
+            self.flush()
+            if self.checkpoint_path is not None and len(self.buffer):
+                self._write_checkpoint()
+
+    def _checkpoint_large_history(self):
+        """On shutdown, checkpoint a history of at least HISTORY_CHECKPOINT_ROWS rows that has changed."""
+        with self._lock:
+            self.merge_pending()
+            if self.checkpoint_path is not None and len(self.buffer) >= self.checkpoint_rows \
+                    and len(self.buffer) != self._checkpointed_rows:
+                self._write_checkpoint()
+
+    def _write_checkpoint(self):
+        if not self._check_loaded_checkpoint():
+            return  # never carry damaged rows into a new checkpoint; the rebuild writes its own
+        if self.writer is not None:
+            self.writer.flush()  # the offset must cover every row in the buffer
+        try:
+            write_checkpoint(self.checkpoint_path, self.buffer, self.running_stats.state(), self.journal.path,
+                             os.path.getsize(self.journal.path))
+        except OSError as e:
+            logging.error("Could not write history checkpoint %s: %s", self.checkpoint_path, e)
+            return
+        self._checkpointed_rows = len(self.buffer)
+        try:  # continue on the rows just written, so only rows saved after this stay in memory
+            self.buffer = map_checkpoint(self.checkpoint_path)
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning("Could not map history checkpoint %s: %s", self.checkpoint_path, e)
 
     def clear_history(self):
-        self.history = pd.DataFrame(columns=["operation", "operand1", "operand2", "result"])
-        self.history.to_csv(self._history_file, index=False)
+        with self._lock:
+            self.flush()
+            if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+            self._checkpointed_rows = 0
+            self._unverified_checkpoint = None
+            self.buffer = HistoryBuffer()
+            self.index.clear()
+            self.running_stats.clear()
+            self._frame = None
+            if self.segments is not None:
+                self._switch_journal(self.segments.clear())
+            self.journal.truncate()
+            self._synced_names = len(self.buffer.operation_names)
 
     def show_history(self):
-        return self.history
\ No newline at end of file
+        return self.history
+
+    def display(self, max_rows=60, edge_rows=5):
+        """The history as text for the history command, laid out like a DataFrame's repr.
+
+        A history of more than max_rows rows shows its first and last edge_rows
+        rows, and only those rows are read, so segments are never loaded whole.
+        """
+        with self._lock:
+            total = self.row_count()
+            if total <= max_rows:
+                rows = np.arange(total, dtype=np.int64)
+            else:  # one extra row at each end for pandas to replace with the ".." row
+                rows = np.concatenate([np.arange(edge_rows + 1), np.arange(total - edge_rows - 1, total)])
+            frame = self._rows_frame(rows)
+        if total <= max_rows:
+            return frame.to_string()
+        text = frame.to_string(max_rows=2 * edge_rows, min_rows=2 * edge_rows, show_dimensions=False)
+        return f"{text}\n\n[{total} rows x {len(frame.columns)} columns]"
+
+    def snapshot(self):
+        """A consistent, read-only HistoryBuffer of every row merged so far.
+
+        It shares the store's arrays rather than copying them: rows are never
+        rewritten in place, clearing swaps in a new buffer, and a cleared binary
+        history file is replaced rather than truncated under its memory maps, so
+        later saves and clears do not change what the snapshot sees.
+        """
+        with self._lock:
+            self.merge_pending()
+            if self.segments is not None and self.segments.rows:
+                return self._rows_buffer(np.arange(self.row_count(), dtype=np.int64))
+            columns = {name: self.buffer.column(name) for name in VALUE_COLUMNS}
+            return HistoryBuffer.from_arrays(self.buffer.op_codes(), columns, self.buffer.operation_names)
+
+    def _rows_buffer(self, rows):
+        """A new HistoryBuffer holding copies of the given global rows."""
+        operations, columns = self._rows_columns(rows)
+        buffer = HistoryBuffer(capacity=len(rows))
+        if len(rows):
+            buffer.extend(buffer.encode_many(operations), *(columns[name] for name in VALUE_COLUMNS))
+        return buffer
+
+    def query(self, operation=None, result_gt=None, result_ge=None, result_lt=None, result_le=None,
+              since=None, until=None, last=None):
+        """Row numbers matching the filters, in insertion order; see HistoryIndex.query."""
+        with self._lock:
+            self.merge_pending()
+            rows = self.index.query(self.buffer, operation, result_gt, result_ge, result_lt, result_le,
+                                    since, until, last)
+            if self.segments is None or not self.segments.rows:
+                return rows
+            base = self.segments.rows
+            if isinstance(rows, range):
+                total = base + len(self.buffer)
+                return range(max(0, total - last) if last is not None else 0, total)
+            remaining = None if last is None else last - len(rows)
+            if remaining is not None and remaining <= 0:
+                return rows + base
+            low, low_inclusive = (result_gt, False) if result_gt is not None else (result_ge, True)
+            high, high_inclusive = (result_lt, False) if result_lt is not None else (result_le, True)
+            older = self.segments.match(operation, -np.inf if low is None else low, low_inclusive,
+                                        np.inf if high is None else high, high_inclusive,
+                                        -np.inf if since is None else since, np.inf if until is None else until,
+                                        remaining)
+            return np.concatenate([older, np.asarray(rows, dtype=np.int64) + base])
+
+    def page(self, rows, page=1, page_size=20):
+        """One page (1-based) of query rows as a DataFrame."""
+        start = (page - 1) * page_size
+        with self._lock:
+            selected = np.asarray(rows[start:start + page_size], dtype=np.int64)
+            if self.segments is not None and self.segments.rows:
+                return self._rows_frame(selected)
+            return self.buffer.to_frame(selected)
+
+    def pages(self, rows, page_size=20):
+        """Yield query results one DataFrame page at a time."""
+        for start in range(0, len(rows), page_size):
+            yield self.page(rows, start // page_size + 1, page_size)
+
+    def stats(self, operation=None, window=None):
+        """Result count, sum, mean, min, max and variance per operation, or for one operation.
+
+        The totals are maintained as rows are saved, so this is O(1) per operation;
+        window=N restricts the figures to the last N rows instead.
+        """
+        with self._lock:
+            self.merge_pending()
+            if window is not None:
+                if self.segments is not None and window > len(self.buffer):
+                    total = self.row_count()
+                    rows = np.arange(max(0, total - window), total, dtype=np.int64)
+                    return window_stats(self._rows_buffer(rows), window, operation)
+                return window_stats(self.buffer, window, operation)
+            return self.running_stats.summary(operation)
+
+    def records(self):
+        """Zero-copy structured view of the binary history file for analytics."""
+        if not isinstance(self.journal, BinaryHistoryFile):
+            raise ValueError("records() needs the binary history backend (HISTORY_BACKEND=binary)")
+        self.flush()
+        return self.journal.records()
+
+    def close(self):
+        """Flush and release the journal file."""
+        self.disable_async_writes()
+        self._checkpoint_large_history()
+        with self._lock:
+            self._unverified_checkpoint = None  # verified again on the next start
+        if self._verifier is not None:
+            self._verifier.join()
+        if self.segments is not None:
+            self.segments.stop_compactor()
+        self.journal.close()
+
+
+def flush_history():
+    """Flush pending history writes, and checkpoint a large history, if a HistoryManager has been created."""
+    if HistoryManager._instance is not None:
+        HistoryManager._instance.flush()
+        HistoryManager._instance._checkpoint_large_history()
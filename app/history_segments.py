@@ -0,0 +1,327 @@
+import json
+import logging
+import math
+import os
+import threading
+import numpy as np
+from app.history_binary import BinaryHistoryFile, encode_records
+from app.history_buffer import VALUE_COLUMNS
+
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+class Segment:
+    """One immutable file of history rows, with the ranges needed to skip it in queries.
+
+    Segments use the binary history format, so reading one is a memory map of
+    the file rather than a parse, and only the pages a query touches are read.
+    """
+
+    def __init__(self, directory, file, start, rows, names, operations, result_range, timestamp_range):
+        self.path = os.path.join(directory, file)
+        self.file = file
+        self.start = start  # global row number of the first row
+        self.rows = rows
+        self.names = tuple(names)
+        self.operations = set(operations)
+        self.result_range = tuple(result_range)
+        self.timestamp_range = tuple(timestamp_range)
+        self._records = None
+
+    @property
+    def stop(self):
+        return self.start + self.rows
+
+    @property
+    def records(self):
+        if self._records is None:
+            self._records = BinaryHistoryFile(self.path).records()
+        return self._records
+
+    def to_json(self):
+        return {"file": self.file, "start": self.start, "rows": self.rows, "names": list(self.names),
+                "operations": sorted(self.operations), "result_range": list(self.result_range),
+                "timestamp_range": list(self.timestamp_range)}
+
+    @classmethod
+    def from_json(cls, directory, entry):
+        return cls(directory, entry["file"], entry["start"], entry["rows"], entry["names"], entry["operations"],
+                   entry["result_range"], entry["timestamp_range"])
+
+    def match(self, operation=None, low=-math.inf, low_inclusive=True, high=math.inf, high_inclusive=True,
+              since=-math.inf, until=math.inf):
+        """Global row numbers of the rows matching the filters.
+
+        The segment's operation set and result and timestamp ranges rule it out
+        without reading any rows when nothing in it can match.
+        """
+        result_min, result_max = self.result_range
+        time_min, time_max = self.timestamp_range
+        if (operation is not None and operation not in self.operations) or low > result_max \
+                or high < result_min or since > time_max or until < time_min:
+            return np.zeros(0, dtype=np.int64)
+        records = self.records
+        mask = np.ones(self.rows, dtype=bool)
+        if operation is not None:
+            mask &= records["op"] == self.names.index(operation)
+        if low > -math.inf:
+            mask &= records["result"] >= low if low_inclusive else records["result"] > low
+        if high < math.inf:
+            mask &= records["result"] <= high if high_inclusive else records["result"] < high
+        if since > -math.inf or until < math.inf:
+            mask &= (records["timestamp"] >= since) & (records["timestamp"] <= until)
+        return np.flatnonzero(mask) + self.start
+
+
+def write_segment(path, names, op_codes, columns):
+    """Write rows as a binary segment file, durably and atomically."""
+    temporary = f"{path}.tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    segment = BinaryHistoryFile(temporary, "always")
+    segment.write_header(names)
+    segment.append(encode_records(op_codes, *(columns[name] for name in VALUE_COLUMNS)))
+    segment.close()
+    os.replace(temporary, path)
+
+
+def _range(values):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    return (float(values.min()), float(values.max())) if len(values) else (math.inf, -math.inf)
+
+
+class SegmentStore:
+    """Older history rows in immutable on-disk segments, described by a manifest.
+
+    The manifest lists the segments in row order, names the journal file that
+    holds the rows after the last segment, and snapshots the running statistics
+    of every row in the segments, so loading reads the manifest and that journal
+    only. It is replaced atomically, and any segment or journal file it does not
+    name is a leftover from an interrupted seal or compaction and is removed on
+    load. A background thread merges runs of small adjacent segments.
+    """
+
+    def __init__(self, directory, compact_fanout=4, max_segment_rows=2_000_000):
+        self.directory = directory
+        self.compact_fanout = compact_fanout
+        self.max_segment_rows = max_segment_rows
+        self.segments = []
+        self.journal_file = "journal-0.csv"
+        self.stats_state = {}
+        self.next_file = 0
+        self.compactions = 0
+        self._lock = threading.RLock()  # held while segment files are read or replaced
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._compactor = None
+
+    @property
+    def rows(self):
+        return self.segments[-1].stop if self.segments else 0
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.directory, self.journal_file)
+
+    @property
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory, MANIFEST))
+
+    def load(self):
+        """Read the manifest (or start an empty store) and remove files it does not name."""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            path = os.path.join(self.directory, MANIFEST)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as source:
+                    manifest = json.load(source)
+                if manifest.get("version") != MANIFEST_VERSION:
+                    raise ValueError(f"{path} is not a version {MANIFEST_VERSION} segment manifest")
+                self.segments = [Segment.from_json(self.directory, entry) for entry in manifest["segments"]]
+                self.journal_file = manifest["journal"]
+                self.stats_state = manifest["stats"]
+                self.next_file = manifest["next_file"]
+            else:
+                self.segments, self.journal_file, self.stats_state, self.next_file = [], "journal-0.csv", {}, 0
+                self._write_manifest()
+            known = {segment.file for segment in self.segments} | {self.journal_file, MANIFEST}
+            for name in os.listdir(self.directory):
+                if name not in known and (name.startswith(("segment-", "journal-")) or name.endswith(".tmp")):
+                    os.remove(os.path.join(self.directory, name))
+
+    def _write_manifest(self):
+        manifest = {"version": MANIFEST_VERSION, "journal": self.journal_file, "next_file": self.next_file,
+                    "segments": [segment.to_json() for segment in self.segments], "stats": self.stats_state}
+        path = os.path.join(self.directory, MANIFEST)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as output:
+            json.dump(manifest, output)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(f"{path}.tmp", path)
+
+    def _new_file(self, prefix, suffix):
+        name = f"{prefix}-{self.next_file}{suffix}"
+        self.next_file += 1
+        return name
+
+    def _make_segment(self, start, names, op_codes, columns):
+        file = self._new_file("segment", ".bin")
+        write_segment(os.path.join(self.directory, file), names, op_codes, columns)
+        operations = [names[code] for code in np.unique(op_codes).tolist()]
+        return Segment(self.directory, file, start, len(op_codes), names, operations,
+                       _range(columns["result"]), _range(columns["timestamp"]))
+
+    def new_segment(self, start, buffer):
+        """Write a buffer's rows, the global rows from `start` on, to a segment file the manifest does not name yet."""
+        with self._lock:
+            columns = {name: buffer.column(name) for name in VALUE_COLUMNS}
+            return self._make_segment(start, buffer.operation_names, buffer.op_codes(), columns)
+
+    def seal(self, buffer, stats_state):
+        """Turn the rows of the in-memory window into a segment and start a new journal.
+
+        Returns the path of the new, empty journal. stats_state covers every row
+        up to and including the sealed ones.
+        """
+        with self._lock:
+            return self.seal_many([self.new_segment(self.rows, buffer)], stats_state)
+
+    def seal_many(self, segments, stats_state, write_journal=None):
+        """Name new segments (from new_segment(), in row order) in the manifest and switch to a new journal.
+
+        write_journal(path), if given, fills the new journal first, with the rows
+        that follow the segments. Returns the new journal's path. The old journal
+        stays the source of truth until the manifest naming the segments and the
+        new journal is in place; a crash before that leaves only unnamed files,
+        which load() removes.
+        """
+        with self._lock:
+            journal_file = self._new_file("journal", ".csv")
+            if write_journal is not None:
+                write_journal(os.path.join(self.directory, journal_file))
+            old_journal = self.journal_path
+            self.journal_file = journal_file
+            self.segments = self.segments + list(segments)
+            self.stats_state = stats_state
+            self._write_manifest()
+            if os.path.exists(old_journal):
+                os.remove(old_journal)
+        self._wake.set()
+        return self.journal_path
+
+    def clear(self):
+        """Drop every segment and start a new, empty journal; returns its path."""
+        with self._lock:
+            old = [segment.path for segment in self.segments] + [self.journal_path]
+            self.segments = []
+            self.stats_state = {}
+            self.journal_file = self._new_file("journal", ".csv")
+            self._write_manifest()
+            for path in old:
+                if os.path.exists(path):
+                    os.remove(path)
+        return self.journal_path
+
+    def match(self, operation=None, low=-math.inf, low_inclusive=True, high=math.inf, high_inclusive=True,
+              since=-math.inf, until=math.inf, last=None):
+        """Matching global row numbers across the segments, oldest first (only the last N if given)."""
+        with self._lock:
+            parts, found = [], 0
+            for segment in reversed(self.segments):
+                if last is not None and found >= last:
+                    break
+                rows = segment.match(operation, low, low_inclusive, high, high_inclusive, since, until)
+                parts.append(rows)
+                found += len(rows)
+        rows = np.concatenate(parts[::-1]) if parts else np.zeros(0, dtype=np.int64)
+        return rows if last is None else rows[len(rows) - min(last, len(rows)):]
+
+    def read_rows(self, rows):
+        """Operation names and VALUE_COLUMNS for global row numbers that lie in the segments."""
+        rows = np.asarray(rows, dtype=np.int64)
+        operations = np.empty(len(rows), dtype=object)
+        columns = {name: np.empty(len(rows), dtype=np.float64) for name in VALUE_COLUMNS}
+        with self._lock:
+            starts = np.array([segment.start for segment in self.segments], dtype=np.int64)
+            owners = np.searchsorted(starts, rows, side="right") - 1
+            for owner in np.unique(owners).tolist():
+                segment = self.segments[owner]
+                positions = np.flatnonzero(owners == owner)
+                records = segment.records[rows[positions] - segment.start]
+                operations[positions] = np.array(segment.names, dtype=object)[records["op"]]
+                for name in VALUE_COLUMNS:
+                    columns[name][positions] = records[name]
+        return operations, columns
+
+    def start_compactor(self):
+        if self._compactor is None or not self._compactor.is_alive():
+            self._stop.clear()
+            self._compactor = threading.Thread(target=self._run_compactor, name="history-compactor", daemon=True)
+            self._compactor.start()
+
+    def stop_compactor(self):
+        if self._compactor is not None:
+            self._stop.set()
+            self._wake.set()
+            self._compactor.join()
+            self._compactor = None
+
+    def _run_compactor(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                while not self._stop.is_set() and self.compact():
+                    pass
+            except (OSError, ValueError) as e:
+                logging.error("History compaction failed: %s", e)
+
+    def _pick_run(self):
+        """The oldest run of compact_fanout adjacent segments that fit in one segment together."""
+        segments = self.segments
+        for first in range(len(segments) - self.compact_fanout + 1):
+            run = segments[first:first + self.compact_fanout]
+            if sum(segment.rows for segment in run) <= self.max_segment_rows:
+                return run
+        return None
+
+    def compact(self):
+        """Merge one run of small segments; returns False when there is nothing to merge.
+
+        The merged file is written without holding the lock; the manifest is only
+        switched over if the run is still in place (clear() may have dropped it).
+        """
+        with self._lock:
+            run = self._pick_run()
+            if run is None:
+                return False
+            file = self._new_file("segment", ".bin")
+        names = []
+        for segment in run:
+            names += [name for name in segment.names if name not in names]
+        codes = {name: code for code, name in enumerate(names)}
+        op_codes = np.concatenate([np.array([codes[name] for name in segment.names], dtype=np.uint16)
+                                   [segment.records["op"]] for segment in run])
+        columns = {name: np.concatenate([segment.records[name] for segment in run]) for name in VALUE_COLUMNS}
+        write_segment(os.path.join(self.directory, file), names, op_codes, columns)
+        merged = Segment(self.directory, file, run[0].start, len(op_codes), names,
+                         set().union(*(segment.operations for segment in run)),
+                         (min(segment.result_range[0] for segment in run),
+                          max(segment.result_range[1] for segment in run)),
+                         (min(segment.timestamp_range[0] for segment in run),
+                          max(segment.timestamp_range[1] for segment in run)))
+        with self._lock:
+            first = next((index for index, segment in enumerate(self.segments) if segment is run[0]), None)
+            if first is None or self.segments[first:first + len(run)] != run:
+                os.remove(merged.path)
+                return False
+            self.segments = self.segments[:first] + [merged] + self.segments[first + len(run):]
+            self._write_manifest()
+            for segment in run:
+                os.remove(segment.path)  # open memory maps stay valid until they are dropped
+            self.compactions += 1
+        return True
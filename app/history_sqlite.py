@@ -0,0 +1,158 @@
+import sqlite3
+import sys
+import threading
+import numpy as np
+from app.history_backend import HistoryBackend
+from app.history_buffer import HistoryBuffer, VALUE_COLUMNS
+from app.history_journal import HistoryJournal, format_records, read_records
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, operation TEXT NOT NULL,"
+    " operand1 REAL, operand2 REAL, result REAL, timestamp REAL)",
+    "CREATE INDEX IF NOT EXISTS history_operation ON history (operation)",
+    "CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp)",
+)
+INSERT = "INSERT INTO history (operation, operand1, operand2, result, timestamp) VALUES (?, ?, ?, ?, ?)"
+SELECT = "SELECT operation, operand1, operand2, result, timestamp FROM history"
+DELETE = "DELETE FROM history"
+SYNCHRONOUS = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}
+CHUNK_ROWS = 65536
+BUSY_TIMEOUT_MS = 5000
+
+
+class SQLiteHistory(HistoryBackend):
+    """History rows in an SQLite database in WAL mode.
+
+    Records are row tuples and every append() is one transaction, so the rows a
+    HistoryWriter batch group-commits cost one WAL commit rather than one each.
+    The INSERT text never changes, so sqlite3's statement cache compiles it once
+    per connection. HISTORY_FSYNC maps onto PRAGMA synchronous (always: FULL,
+    interval: NORMAL, synced at checkpoints; never: OFF). Other processes can
+    read the database while it is being written, e.g. through select(), which
+    the operation and timestamp indexes serve without a table scan.
+    """
+
+    def __init__(self, path, fsync_policy="never", fsync_interval=1.0):
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()  # the caller's thread and the writer thread share one connection
+        self.configure_fsync(fsync_policy, fsync_interval)
+
+    def configure_fsync(self, policy, interval=1.0):
+        super().configure_fsync(policy, interval)
+        with self._lock:
+            if self._connection is not None:
+                self._connection.execute(f"PRAGMA synchronous={SYNCHRONOUS[self.fsync_policy]}")
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA synchronous={SYNCHRONOUS[self.fsync_policy]}")
+            with connection:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            self._connection = connection
+        return self._connection
+
+    def format_row(self, operation, code, operand1, operand2, result, timestamp):
+        return [(operation, float(operand1), float(operand2), float(result), float(timestamp))]
+
+    def format_rows(self, names, op_codes, operand1, operand2, result, timestamp):
+        operations = np.array(names, dtype=object)
+        for start in range(0, len(op_codes), CHUNK_ROWS):
+            stop = start + CHUNK_ROWS
+            yield list(zip(operations[op_codes[start:stop]].tolist(), operand1[start:stop].tolist(),
+                           operand2[start:stop].tolist(), result[start:stop].tolist(),
+                           timestamp[start:stop].tolist()))
+
+    def append(self, data):
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:  # one transaction for the whole batch
+                    connection.executemany(INSERT, data)
+            except sqlite3.OperationalError as e:  # locked, disk full or I/O error
+                raise OSError(f"Could not write to {self.path}: {e}") from e
+
+    def load(self):
+        with self._lock:
+            rows = self._connect().execute(f"{SELECT} ORDER BY id").fetchall()
+        buffer = HistoryBuffer(capacity=max(1024, len(rows)))
+        if rows:
+            operations = [row[0] for row in rows]
+            values = np.array([row[1:] for row in rows], dtype=np.float64)  # NULL (stored NaN) becomes nan
+            buffer.extend(buffer.encode_many(operations), *values.T)
+        return buffer
+
+    def select(self, operation=None, since=None, until=None, last=None):
+        """Rows (operation, operand1, operand2, result, timestamp) matching the filters, oldest first.
+
+        Reads the database directly, so it sees rows committed by other
+        processes; last=N returns only the newest N matches.
+        """
+        clauses, parameters = [], []
+        for clause, value in (("operation = ?", operation), ("timestamp >= ?", since), ("timestamp <= ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                parameters.append(value)
+        sql = SELECT + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY id DESC"
+        if last is not None:
+            sql += " LIMIT ?"
+            parameters.append(last)
+        with self._lock:
+            rows = self._connect().execute(sql, parameters).fetchall()
+        return rows[::-1]
+
+    def truncate(self):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(DELETE)
+
+    def close(self):
+        """Close the connection; the last one to close checkpoints the WAL into the database."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def csv_to_sqlite(csv_path, db_path):
+    """Copy a CSV history journal into an SQLite history database, replacing its rows in one transaction."""
+    columns = read_records(csv_path)
+    count = len(columns["operation"])
+    missing = np.full(count, np.nan)
+    target = SQLiteHistory(db_path)
+    with target._lock:
+        connection = target._connect()
+        with connection:
+            connection.execute(DELETE)
+            connection.executemany(INSERT, zip(columns["operation"],
+                                               *(columns.get(name, missing).tolist() for name in VALUE_COLUMNS)))
+    target.close()
+    return count
+
+
+def sqlite_to_csv(db_path, csv_path):
+    """Write the rows of an SQLite history database out as a CSV journal."""
+    source = SQLiteHistory(db_path)
+    buffer = source.load()
+    source.close()
+    target = HistoryJournal(csv_path)
+    target.truncate()
+    for chunk in format_records(buffer.operation_names, buffer.op_codes(),
+                                *(buffer.column(name) for name in VALUE_COLUMNS)):
+        target.append(chunk)
+    target.close()
+    return len(buffer)
+
+
+if __name__ == "__main__":
+    # python -m app.history_sqlite to-sqlite history.csv history.db
+    # python -m app.history_sqlite to-csv history.db history.csv
+    if len(sys.argv) != 4 or sys.argv[1] not in ("to-sqlite", "to-csv"):
+        sys.exit("Usage: python -m app.history_sqlite to-sqlite|to-csv SOURCE TARGET")
+    convert = csv_to_sqlite if sys.argv[1] == "to-sqlite" else sqlite_to_csv
+    print(f"Converted {convert(sys.argv[2], sys.argv[3])} records to {sys.argv[3]}")
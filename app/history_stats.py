@@ -0,0 +1,130 @@
+import math
+import numpy as np
+
+STAT_FIELDS = ("count", "sum", "mean", "min", "max", "variance")
+
+
+class RunningStats:
+    """Count, sum, mean, min, max and variance of a stream of values in O(1) per update.
+
+    Uses Welford's update for single values and Chan's pairwise merge for bulk
+    updates, so the variance stays accurate without keeping the values around.
+    variance is the sample variance (ddof=1), matching pandas' Series.var().
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def from_values(cls, values):
+        stats = cls()
+        stats.add_many(values)
+        return stats
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        self.sum += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        count = len(values)
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def state(self):
+        """The exact accumulator values, for saving and restoring with from_state()."""
+        return {"count": self.count, "sum": self.sum, "mean": self.mean, "m2": self.m2,
+                "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        for name, value in state.items():
+            setattr(stats, name, value)
+        return stats
+
+    def as_dict(self):
+        if self.count == 0:
+            return {"count": 0, "sum": 0.0, "mean": math.nan, "min": math.nan, "max": math.nan,
+                    "variance": math.nan}
+        return {name: getattr(self, name) for name in STAT_FIELDS}
+
+
+class HistoryStats:
+    """Running result statistics for each operation, kept alongside the history buffer."""
+
+    def __init__(self):
+        self.by_operation = {}
+
+    def clear(self):
+        self.by_operation = {}
+
+    def add(self, operation, result):
+        self.by_operation.setdefault(operation, RunningStats()).add(result)
+
+    def add_many(self, names, op_codes, result):
+        """Fold in a batch of rows given encoded operation codes and the code→name table."""
+        op_codes = np.asarray(op_codes)
+        result = np.asarray(result, dtype=np.float64)
+        for code in np.unique(op_codes).tolist():
+            self.by_operation.setdefault(names[code], RunningStats()).add_many(result[op_codes == code])
+
+    def state(self):
+        return {name: stats.state() for name, stats in self.by_operation.items()}
+
+    def restore(self, state):
+        self.by_operation = {name: RunningStats.from_state(values) for name, values in state.items()}
+
+    def rebuild(self, buffer):
+        self.clear()
+        self.add_many(buffer.operation_names, buffer.op_codes(), buffer.column("result"))
+
+    def summary(self, operation=None):
+        """Statistics per operation name, or for one operation."""
+        if operation is not None:
+            return self.by_operation.get(operation, RunningStats()).as_dict()
+        return {name: stats.as_dict() for name, stats in self.by_operation.items()}
+
+
+def window_stats(buffer, last, operation=None):
+    """Statistics over the last N rows of the buffer, optionally for one operation only.
+
+    Only the window's slice of the result column is read, so the cost depends on
+    N rather than on the size of the whole history.
+    """
+    start = max(0, len(buffer) - last)
+    op_codes = buffer.op_codes()[start:]
+    result = buffer.column("result")[start:]
+    names = buffer.operation_names
+    summary = {}
+    for code in np.unique(op_codes).tolist():
+        if operation is None or names[code] == operation:
+            summary[names[code]] = RunningStats.from_values(result[op_codes == code]).as_dict()
+    if operation is not None:
+        return summary.get(operation, RunningStats().as_dict())
+    return summary
@@ -0,0 +1,101 @@
+import logging
+import queue
+import threading
+import time
+from app.history_backend import join_records
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """Background thread that drains queued journal records and group-commits them.
+
+    Records are written in batches of up to batch_size, or whatever arrived within
+    linger seconds of the first record in the batch. submit() blocks once max_queue
+    records are waiting, so a slow disk pushes back on producers instead of growing
+    memory without bound.
+    """
+
+    def __init__(self, journal, max_queue=10000, batch_size=512, linger=0.01):
+        self.journal = journal
+        self.batch_size = batch_size
+        self.linger = linger
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.committed = 0
+        self.batches = 0
+        self.blocked = 0
+        self.errors = 0
+        self.max_depth = 0
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, data):
+        """Queue one journal chunk, blocking while the queue is full."""
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            with self._lock:
+                self.blocked += 1
+            self._queue.put(data)
+        with self._lock:
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def flush(self):
+        """Block until every queued record has been committed to the journal."""
+        self._queue.join()
+
+    def close(self):
+        """Flush outstanding records and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "enqueued": self.enqueued,
+                "committed": self.committed,
+                "batches": self.batches,
+                "blocked": self.blocked,
+                "errors": self.errors,
+            }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        try:
+            self.journal.append(join_records(batch))
+            with self._lock:
+                self.committed += len(batch)
+                self.batches += 1
+        except OSError as e:
+            with self._lock:
+                self.errors += 1
+            logging.error("History writer failed to commit %d records: %s", len(batch), e)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
@@ -0,0 +1,173 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed out"
+FINISHED_STATES = (DONE, FAILED, CANCELLED, TIMED_OUT)
+KEEP_FINISHED = 100
+
+
+class Job:
+    """Handle for one run of an AsyncCommand: its state, and its result or error once finished."""
+
+    def __init__(self, job_id, command, args):
+        self.id = job_id
+        self.command = command
+        self.args = args
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._future = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def duration(self):
+        """Seconds spent running so far (or in total, once finished)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def wait(self, timeout=None):
+        """Block until the job finishes; returns False if the timeout ran out first."""
+        return self._done.wait(timeout)
+
+    def cancel(self):
+        """Cancel the job if it has not finished; a queued job never starts."""
+        if self._future is not None:
+            self._future.cancel()
+        return self.state == CANCELLED
+
+    def _finish(self, state, result=None, error=None):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.state, self.result, self.error = state, result, error
+            self.finished = time.time()
+            self._done.set()
+
+    def describe(self):
+        """One line for the jobs command."""
+        args = " ".join(self.args)
+        line = f"{self.id:>4}  {self.command} {args}".rstrip()
+        line = f"{line:<32} {self.state:<10} {self.duration:7.2f}s"
+        if self.error is not None:
+            line += f"  {self.error}"
+        elif self.result is not None:
+            line += f"  {self.result}"
+        return line
+
+
+class JobRunner:
+    """Runs AsyncCommand jobs on an event loop in a background thread.
+
+    Each command has a semaphore sized by its max_concurrency, so a slow
+    service only ever has that many requests in flight; further jobs wait in
+    the queued state. A running job is cancelled once it exceeds the command's
+    timeout. Only the most recent KEEP_FINISHED finished jobs are kept.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._limits = {}  # command name -> asyncio.Semaphore, used on the loop thread only
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="command-jobs", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, name, command, *args):
+        """Start `command` (an AsyncCommand) with `args` and return its Job at once."""
+        loop = self._ensure_loop()
+        job = Job(next(self._ids), name, args)
+        with self._lock:
+            self.jobs[job.id] = job
+            self._forget_old_jobs()
+        job._future = asyncio.run_coroutine_threadsafe(self._run(job, command, args), loop)
+        job._future.add_done_callback(lambda future: job._finish(CANCELLED) if future.cancelled() else None)
+        return job
+
+    async def _run(self, job, command, args):
+        limit = self._limits.get(job.command)
+        if limit is None:
+            limit = self._limits[job.command] = asyncio.Semaphore(command.max_concurrency)
+        try:
+            async with limit:
+                job.state, job.started = RUNNING, time.time()
+                result = await asyncio.wait_for(command.execute_async(*args), command.timeout)
+            job._finish(DONE, result)
+        except asyncio.TimeoutError:
+            logging.warning("Job %d (%s) timed out after %ss", job.id, job.command, command.timeout)
+            job._finish(TIMED_OUT, error=f"timed out after {command.timeout}s")
+        except asyncio.CancelledError:
+            job._finish(CANCELLED)
+        except Exception as e:
+            logging.error("Job %d (%s) failed: %s", job.id, job.command, e)
+            job._finish(FAILED, error=f"{type(e).__name__}: {e}")
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def active(self):
+        return [job for job in self.list() if not job.done]
+
+    def cancel(self, job_id):
+        """Cancel a job by id; returns False if there is no such unfinished job."""
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel()
+        return True
+
+    def wait(self, timeout=None):
+        """Wait for every unfinished job; returns False if some were still running at the timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in self.active():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job.wait(remaining):
+                return False
+        return True
+
+    def shutdown(self, timeout=5.0):
+        """Give unfinished jobs up to `timeout` seconds, cancel the rest and stop the loop."""
+        if self._loop is None:
+            return
+        if not self.wait(timeout):
+            for job in self.active():
+                job.cancel()
+            self.wait(1.0)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = None
+        self._limits = {}
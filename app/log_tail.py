@@ -0,0 +1,83 @@
+import os
+import re
+import time
+
+BLOCK_SIZE = 8192
+
+
+def tail_lines(path, count=20, block_size=BLOCK_SIZE):
+    """Return the last count lines of a file by reading fixed-size blocks backwards from EOF.
+
+    Cost depends on the number of lines requested, not on the size of the file.
+    """
+    if count <= 0:
+        return []
+    with open(path, "rb") as log_file:
+        log_file.seek(0, os.SEEK_END)
+        position = log_file.tell()
+        data = b""
+        # count + 1 newlines guarantees the first kept line is complete
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(block_size, position)
+            position -= step
+            log_file.seek(position)
+            data = log_file.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    return lines[-count:]
+
+
+def grep_lines(path, pattern):
+    """Yield lines matching a regular expression, streaming through the file."""
+    regex = re.compile(pattern)
+    with open(path, "r", encoding="utf-8", errors="replace") as log_file:
+        for line in log_file:
+            if regex.search(line):
+                yield line.rstrip("\n")
+
+
+def follow(path, poll_interval=0.5, stop=None):
+    """Yield lines appended to a file after the call, like tail -F.
+
+    Only the new bytes are read on each poll. When the path points at a new
+    file (the log was rotated: renamed and recreated), what is left of the old
+    file is read and the new one is followed from its start. A file truncated
+    in place (for example by clear_logs) is followed again from the start.
+    Iteration ends when the optional stop event is set.
+    """
+    log_file = open(path, "rb")
+    try:
+        log_file.seek(0, os.SEEK_END)
+        partial = b""
+        while stop is None or not stop.is_set():
+            chunk = log_file.read()
+            if chunk:
+                lines = (partial + chunk).split(b"\n")
+                partial = lines.pop()
+                for line in lines:
+                    yield line.decode("utf-8", errors="replace")
+                continue
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                info = None  # rotated away and not recreated yet
+            if info is not None:
+                current = os.fstat(log_file.fileno())
+                if (info.st_dev, info.st_ino) != (current.st_dev, current.st_ino):
+                    try:
+                        new_file = open(path, "rb")
+                    except FileNotFoundError:
+                        new_file = None
+                    if new_file is not None:
+                        log_file.close()
+                        log_file = new_file
+                        if partial:
+                            yield partial.decode("utf-8", errors="replace")
+                        partial = b""
+                        continue
+                elif info.st_size < log_file.tell():
+                    log_file.seek(0)
+                    partial = b""
+                    continue
+            time.sleep(poll_interval)
+    finally:
+        log_file.close()
@@ -0,0 +1,132 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from app.metrics import METRICS
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+OPERATION_LOGGER = logging.getLogger("app.operations")
+
+_listener = None
+
+
+class OperationLogSampler:
+    """Lets through a fixed fraction of per-operation log records, deterministically."""
+
+    def __init__(self, rate=1.0):
+        self.rate = min(max(rate, 0.0), 1.0)
+        self._credit = 0.0
+
+    def sample(self):
+        if self.rate >= 1.0:
+            return True
+        self._credit += self.rate
+        if self._credit >= 1.0:
+            self._credit -= 1.0
+            return True
+        return False
+
+
+_sampler = OperationLogSampler()
+
+
+def log_operation(message, *args):
+    """Log one arithmetic operation at INFO, subject to the operation level and sampling.
+
+    Arguments are formatted lazily by the logging pipeline, and not at all when
+    the record is filtered out or sampled away.
+    """
+    if OPERATION_LOGGER.isEnabledFor(logging.INFO) and _sampler.sample():
+        OPERATION_LOGGER.info(message, *args)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as-is so message formatting happens on the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+    def handle(self, record):
+        start = time.perf_counter()
+        try:
+            return super().handle(record)
+        finally:
+            METRICS.log_record(record.levelno, time.perf_counter() - start)  # logging phase of the command
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Console handler that writes to whatever sys.stdout is when the record is emitted."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def _file_handler(log_file_path):
+    when = os.getenv("LOG_ROTATE_WHEN")
+    backup_count = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(log_file_path, when=when, backupCount=backup_count,
+                                                         encoding="utf-8")
+    max_bytes = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    return logging.handlers.RotatingFileHandler(log_file_path, maxBytes=max_bytes, backupCount=backup_count,
+                                                encoding="utf-8")
+
+
+def configure_logging(log_file_path, level=None, console=True):
+    """Route file logging through a queue drained by a background listener thread.
+
+    The root logger only enqueues records; formatting and writes to the size-
+    or time-rotated log file happen on the listener thread. Warnings and errors
+    are also printed to the console, synchronously on the logging thread, so
+    they never land in the middle of a line the REPL is printing.
+    Levels come from LOG_LEVEL (default DEBUG) and OP_LOG_LEVEL, and the fraction
+    of per-operation records kept from OP_LOG_SAMPLE_RATE.
+    """
+    global _listener, _sampler
+    stop_logging()
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = _file_handler(log_file_path)
+    file_handler.setFormatter(formatter)
+    log_queue = queue.Queue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    logging.root.addHandler(_DeferredQueueHandler(log_queue))
+    if console:
+        console_handler = _StdoutHandler()
+        console_handler.setLevel(logging.WARNING)
+        console_handler.setFormatter(formatter)
+        logging.root.addHandler(console_handler)
+    logging.root.setLevel(level or os.getenv("LOG_LEVEL", "DEBUG").upper())
+    OPERATION_LOGGER.setLevel(os.getenv("OP_LOG_LEVEL", "NOTSET").upper())
+    _sampler = OperationLogSampler(float(os.getenv("OP_LOG_SAMPLE_RATE", "1.0")))
+    return _listener
+
+
+def flush_logging():
+    """Block until the listener has handled every queued record."""
+    if _listener is not None:
+        _listener.queue.join()
+
+
+def stop_logging():
+    """Drain the queue and stop the listener thread, closing its handlers."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
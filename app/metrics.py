@@ -0,0 +1,288 @@
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+
+PHASES = ("dispatch", "parse", "compute", "history_write", "logging")
+QUANTILES = (0.5, 0.95, 0.99)
+BUCKETS_PER_OCTAVE = 4
+OCTAVES = 28  # 1 us up to about 4.5 minutes
+UNKNOWN_COMMAND = "unknown"
+FOLD_EVERY = 1024
+
+_dumper = None
+
+
+def _bucket(seconds):
+    micros = seconds * 1e6
+    if micros < 1.0:
+        return 0
+    mantissa, exponent = math.frexp(micros)  # micros = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    index = 1 + (exponent - 1) * BUCKETS_PER_OCTAVE + int((mantissa * 2 - 1) * BUCKETS_PER_OCTAVE)
+    return min(index, BUCKETS_PER_OCTAVE * OCTAVES)
+
+
+def _buckets(seconds):
+    """_bucket for an array of durations."""
+    import numpy as np
+    micros = np.asarray(seconds, dtype=np.float64) * 1e6
+    mantissa, exponent = np.frexp(micros)
+    index = 1 + (exponent.astype(np.int64) - 1) * BUCKETS_PER_OCTAVE \
+        + ((mantissa * 2 - 1) * BUCKETS_PER_OCTAVE).astype(np.int64)
+    index[micros < 1.0] = 0
+    return np.minimum(index, BUCKETS_PER_OCTAVE * OCTAVES)
+
+
+def _bucket_upper_bound(index):
+    """Largest duration, in seconds, that falls into a bucket."""
+    if index == 0:
+        return 1e-6
+    octave, step = divmod(index - 1, BUCKETS_PER_OCTAVE)
+    return 2.0 ** octave * (1 + (step + 1) / BUCKETS_PER_OCTAVE) * 1e-6
+
+
+class LatencyHistogram:
+    """Durations counted in log-spaced buckets (four per doubling, so within 19%).
+
+    Memory stays fixed however many samples are recorded.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        import numpy as np  # imported on first fold, not at startup
+        self.counts = np.zeros(BUCKETS_PER_OCTAVE * OCTAVES + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[_bucket(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def add_many(self, seconds):
+        import numpy as np
+        seconds = np.asarray(seconds, dtype=np.float64)
+        if len(seconds) == 0:
+            return
+        self.counts += np.bincount(_buckets(seconds), minlength=len(self.counts))
+        self.count += len(seconds)
+        self.total += float(seconds.sum())
+        self.max = max(self.max, float(seconds.max()))
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th sample (0 < q <= 1), capped at the true maximum."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        index = int(self.counts.cumsum().searchsorted(rank))
+        return min(_bucket_upper_bound(index), self.max)
+
+    def summary(self):
+        summary = {f"p{round(q * 100)}": self.percentile(q) for q in QUANTILES}
+        summary.update(count=self.count, mean=self.total / self.count if self.count else 0.0, max=self.max)
+        return summary
+
+
+class CommandStats:
+    """Call and error counts and per-phase latency histograms for one command."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.histograms = {phase: LatencyHistogram() for phase in ("total",) + PHASES}
+
+    def add_many(self, errors, timings):
+        """Fold finished commands in: timings rows are (total, dispatch, parse, compute, history_write, logging)."""
+        import numpy as np
+        self.count += len(timings)
+        self.errors += errors
+        for histogram, values in zip(self.histograms.values(), np.array(timings, dtype=np.float64).T):
+            histogram.add_many(values)
+
+
+class ActiveCommand:
+    """Timings collected for the command currently running on a thread."""
+
+    __slots__ = ("name", "start", "dispatch", "parse", "history_write", "logging", "error")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.dispatch = self.parse = self.history_write = self.logging = 0.0
+        self.error = False
+
+
+class Metrics:
+    """Per-command latency and error metrics.
+
+    A command is bracketed by begin() and end() on the thread that runs it.
+    Meanwhile the command's argument parsing, the history manager and the
+    logging handler report the time they spend through add_time() and
+    log_record(), which find the running command
+    through a thread-local, so nothing has to be passed down the call chain.
+    Compute is whatever is left of the total. A finished command is appended to
+    a buffer owned by its thread, without locking, and buffers are folded into
+    the histograms with NumPy in blocks.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.commands = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_buffers = []  # (thread, finished commands not yet folded in) per thread
+
+    def begin(self, name=UNKNOWN_COMMAND):
+        """Start timing a command; returns None when disabled or a command is already running."""
+        if not self.enabled or getattr(self._local, "active", None) is not None:
+            return None
+        active = self._local.active = ActiveCommand(name)
+        return active
+
+    def add_time(self, phase, seconds):
+        active = getattr(self._local, "active", None)
+        if active is not None:
+            setattr(active, phase, getattr(active, phase) + seconds)
+
+    def log_record(self, levelno, seconds):
+        """Charge logging time to the running command; a warning or error marks it as failed."""
+        active = getattr(self._local, "active", None)
+        if active is not None:
+            active.logging += seconds
+            if levelno >= logging.WARNING:
+                active.error = True
+
+    def end(self, active):
+        """Finish a command; it is buffered per thread and folded in every FOLD_EVERY commands or on read."""
+        if active is None:
+            return
+        total = time.perf_counter() - active.start
+        self._local.active = None
+        compute = max(0.0, total - active.dispatch - active.parse - active.history_write - active.logging)
+        finished = getattr(self._local, "finished", None)
+        if finished is None:
+            finished = self._local.finished = []
+            with self._lock:
+                self._thread_buffers.append((threading.current_thread(), finished))
+        finished.append((active.name, active.error,
+                         (total, active.dispatch, active.parse, compute, active.history_write, active.logging)))
+        if len(finished) >= FOLD_EVERY:
+            self.fold()
+
+    def fold(self):
+        """Move every thread's finished commands into the histograms, in one NumPy pass per command."""
+        with self._lock:
+            batches = {}
+            for _, finished in self._thread_buffers:
+                count = len(finished)
+                for name, error, timings in finished[:count]:
+                    batch = batches.setdefault(name, [0, []])
+                    batch[0] += error
+                    batch[1].append(timings)
+                del finished[:count]  # the owner may have appended more meanwhile
+            self._thread_buffers = [(thread, finished) for thread, finished in self._thread_buffers
+                                    if finished or thread.is_alive()]
+            for name, (errors, timings) in batches.items():
+                stats = self.commands.get(name)
+                if stats is None:
+                    stats = self.commands[name] = CommandStats()
+                stats.add_many(errors, timings)
+
+    def reset(self):
+        with self._lock:
+            for _, finished in self._thread_buffers:
+                del finished[:]
+            self.commands = {}
+
+    def snapshot(self):
+        """{command: {"count", "errors", "phases": {phase: {p50, p95, p99, count, mean, max}}}}, in seconds."""
+        self.fold()
+        with self._lock:
+            return {name: {"count": stats.count, "errors": stats.errors,
+                           "phases": {phase: histogram.summary() for phase, histogram in stats.histograms.items()}}
+                    for name, stats in sorted(self.commands.items())}
+
+    def prometheus_text(self):
+        """The metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = ["# HELP calculator_commands_total Commands run.",
+                 "# TYPE calculator_commands_total counter"]
+        lines += [f'calculator_commands_total{{command="{name}"}} {stats["count"]}'
+                  for name, stats in snapshot.items()]
+        lines += ["# HELP calculator_command_errors_total Commands that failed or logged a warning.",
+                  "# TYPE calculator_command_errors_total counter"]
+        lines += [f'calculator_command_errors_total{{command="{name}"}} {stats["errors"]}'
+                  for name, stats in snapshot.items()]
+        lines += ["# HELP calculator_command_duration_seconds Command latency by phase.",
+                  "# TYPE calculator_command_duration_seconds summary"]
+        for name, stats in snapshot.items():
+            for phase, summary in stats["phases"].items():
+                labels = f'command="{name}",phase="{phase}"'
+                for q in QUANTILES:
+                    lines.append(f'calculator_command_duration_seconds{{{labels},quantile="{q}"}} '
+                                 f'{summary[f"p{round(q * 100)}"]:.9g}')
+                lines.append(f"calculator_command_duration_seconds_sum{{{labels}}} "
+                             f"{summary['mean'] * summary['count']:.9g}")
+                lines.append(f"calculator_command_duration_seconds_count{{{labels}}} {summary['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text to a file atomically, for a textfile collector to pick up."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as output:
+            output.write(self.prometheus_text())
+        os.replace(temporary, path)
+
+
+METRICS = Metrics(os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no"))
+
+
+class MetricsDumper:
+    """Background thread that rewrites a Prometheus text file every `interval` seconds."""
+
+    def __init__(self, metrics, path, interval=15.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        try:
+            self.metrics.write_prometheus(self.path)
+        except OSError as e:
+            logging.error("Could not write metrics to %s: %s", self.path, e)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.dump()  # final figures
+
+
+def start_metrics_dump(path, interval=15.0):
+    """Dump METRICS to `path` every `interval` seconds until stop_metrics_dump() or exit."""
+    global _dumper
+    stop_metrics_dump()
+    _dumper = MetricsDumper(METRICS, path, interval)
+    return _dumper
+
+
+def stop_metrics_dump():
+    global _dumper
+    if _dumper is not None:
+        _dumper.stop()
+        _dumper = None
+
+
+atexit.register(stop_metrics_dump)
@@ -0,0 +1,459 @@
+import atexit
+import http.client
+import json
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+import urllib.parse
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+
+_STOP = object()
+_FLUSH = object()
+
+_sinks = {}
+_sinks_lock = threading.Lock()
+_pipeline = None
+
+
+class DeliveryError(Exception):
+    """A sink could not deliver a batch; retryable errors are tried again after a backoff."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+DELIVERY_ERRORS = (OSError, smtplib.SMTPException, http.client.HTTPException, DeliveryError)
+
+
+class ConnectionPool:
+    """Up to `size` open connections, reused from one send to the next.
+
+    A connection that fails at the connection level is closed rather than
+    returned to the pool. If it had been reused, the server may simply have
+    dropped it while idle, so the call is tried once more on a new connection.
+    A DeliveryError means the server answered, so that connection is kept.
+    """
+
+    def __init__(self, connect, close, size=2):
+        self.connect = connect
+        self.close_connection = close
+        self.opened = 0
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self):
+        connection = self.connect()
+        with self._lock:
+            self.opened += 1
+        return connection
+
+    def _discard(self, connection):
+        try:
+            self.close_connection(connection)
+        except DELIVERY_ERRORS:
+            pass
+
+    def _give_back(self, connection):
+        with self._lock:
+            self._idle.append(connection)
+
+    def _call(self, func, connection):
+        try:
+            result = func(connection)
+        except DeliveryError:
+            self._give_back(connection)
+            raise
+        except DELIVERY_ERRORS:
+            self._discard(connection)
+            raise
+        self._give_back(connection)
+        return result
+
+    def run(self, func):
+        """Call func(connection) on a pooled connection and return its result."""
+        with self._slots:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._call(func, self._open())
+            try:
+                return self._call(func, connection)
+            except DeliveryError:
+                raise
+            except DELIVERY_ERRORS:
+                pass  # the idle connection had gone stale
+            return self._call(func, self._open())
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+
+class Sink(ABC):
+    """Somewhere notification messages are delivered, many per call."""
+
+    @abstractmethod
+    def send(self, messages):
+        """Deliver a batch of message lines, raising one of DELIVERY_ERRORS on failure."""
+
+    def close(self):
+        pass
+
+
+class SMTPSink(Sink):
+    """Mails each batch as one digest message over pooled SMTP connections."""
+
+    def __init__(self, host, port, sender, recipients, pool_size=2, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.timeout = timeout
+        self.pool = ConnectionPool(self._connect, lambda smtp: smtp.quit(), pool_size)
+
+    def _connect(self):
+        return smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+    def send(self, messages):
+        digest = EmailMessage()
+        digest["Subject"] = f"Calculator: {len(messages)} result(s)" if len(messages) > 1 else "Calculator"
+        digest["From"] = self.sender
+        digest["To"] = ", ".join(self.recipients)
+        digest.set_content("\n".join(messages) + "\n")
+        self.pool.run(lambda smtp: self._send(smtp, digest))
+
+    @staticmethod
+    def _send(smtp, digest):
+        try:
+            smtp.send_message(digest)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise DeliveryError(f"recipients refused: {sorted(e.recipients)}", retryable=False) from e
+        except smtplib.SMTPResponseException as e:  # 4xx is temporary, 5xx permanent
+            raise DeliveryError(f"SMTP {e.smtp_code} {e.smtp_error!r}", retryable=e.smtp_code < 500) from e
+
+    def close(self):
+        self.pool.close()
+
+
+class HTTPSink(Sink):
+    """Posts each batch to a Discord-style webhook as {"content": lines}, over keep-alive connections.
+
+    A batch longer than max_length characters is split into several posts on
+    the same connection. 429 and 5xx responses are retried; other errors are not.
+    """
+
+    def __init__(self, url, pool_size=2, timeout=10.0, max_length=2000):
+        parts = urllib.parse.urlsplit(url)
+        self.url = url
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path + (f"?{parts.query}" if parts.query else "") or "/"
+        self.timeout = timeout
+        self.max_length = max_length
+        self.pool = ConnectionPool(self._connect, lambda connection: connection.close(), pool_size)
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _chunks(self, messages):
+        chunk, length = [], 0
+        for message in messages:
+            message = message[:self.max_length]
+            if chunk and length + 1 + len(message) > self.max_length:
+                yield "\n".join(chunk)
+                chunk, length = [], 0
+            length += len(message) + (1 if chunk else 0)
+            chunk.append(message)
+        if chunk:
+            yield "\n".join(chunk)
+
+    def _post(self, connection, content):
+        body = json.dumps({"content": content}).encode()
+        connection.request("POST", self.path, body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()  # drain it so the connection can be reused
+        if response.status >= 300:
+            raise DeliveryError(f"HTTP {response.status} from {self.url}",
+                                retryable=response.status == 429 or response.status >= 500)
+        return response.status
+
+    def send(self, messages):
+        for content in self._chunks(messages):
+            self.pool.run(lambda connection: self._post(connection, content))
+
+    def close(self):
+        self.pool.close()
+
+
+class NotificationQueue:
+    """Background thread that batches messages for one sink and delivers them with retries.
+
+    A batch is sent once it holds batch_size messages or window seconds after
+    its first message arrived, whichever comes first. A failed delivery is
+    retried up to `retries` times, waiting backoff seconds and doubling the
+    wait each time (up to max_backoff). Notifications are best effort:
+    submit() never blocks, and drops the message when max_queue are waiting.
+    submit_rows() queues many results as one item, formatted on the queue's
+    thread.
+    """
+
+    def __init__(self, sink, batch_size=50, window=10.0, max_queue=10000, retries=5, backoff=0.5,
+                 max_backoff=30.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.window = window
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.sent = 0
+        self.batches = 0
+        self.retried = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="notifications", daemon=True)
+        self._thread.start()
+
+    def submit(self, message):
+        """Queue one message; returns False (and counts it as dropped) if the queue is full."""
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def submit_rows(self, names, op_codes, operand1, operand2, result):
+        """Queue results given as arrays in one slot; like submit(), the rows are dropped if the queue is full."""
+        rows = _ResultRows(names, op_codes, operand1, operand2, result)
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(rows)
+            return False
+        with self._lock:
+            self.enqueued += len(rows)
+        return True
+
+    def flush(self):
+        """Send whatever is waiting now, without waiting for the window, and wait until it is delivered."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """Deliver outstanding messages and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {"queued": self._queue.qsize(), "enqueued": self.enqueued, "sent": self.sent,
+                    "batches": self.batches, "retries": self.retried, "dropped": self.dropped}
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP or item is _FLUSH:
+                self._queue.task_done()
+                stopping = item is _STOP
+                continue
+            batch = _messages(item)
+            taken = 1
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP or item is _FLUSH:
+                    stopping = item is _STOP
+                    self._queue.task_done()
+                    break
+                batch.extend(_messages(item))
+                taken += 1
+            for start in range(0, len(batch), self.batch_size):
+                self._deliver(batch[start:start + self.batch_size])
+            for _ in range(taken):
+                self._queue.task_done()
+
+    def _deliver(self, batch):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                self.sink.send(batch)
+            except DELIVERY_ERRORS as e:
+                if attempt == self.retries or (isinstance(e, DeliveryError) and not e.retryable):
+                    logging.error("Dropping %d notification(s) after %d attempt(s): %s", len(batch), attempt + 1, e)
+                    break
+                logging.warning("Notification delivery failed (%s); retrying in %.2fs", e, delay)
+                with self._lock:
+                    self.retried += 1
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            with self._lock:
+                self.sent += len(batch)
+                self.batches += 1
+            return
+        with self._lock:
+            self.dropped += len(batch)
+
+
+def format_result(operation, operand1, operand2, result):
+    return f"{operation} {operand1!r} {operand2!r} = {result!r}"
+
+
+class _ResultRows:
+    """Results from one save_many, kept as arrays until the queue's thread formats them."""
+
+    def __init__(self, names, op_codes, operand1, operand2, result):
+        self.names = names
+        self.columns = (op_codes, operand1, operand2, result)
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def messages(self):
+        return [format_result(self.names[code], x, y, r)
+                for code, x, y, r in zip(*(column.tolist() for column in self.columns))]
+
+
+def _messages(item):
+    return item.messages() if isinstance(item, _ResultRows) else [item]
+
+
+class ResultNotifier:
+    """HistoryManager subscriber that sends saved results passing the filter to notification queues.
+
+    operations limits it to those operation names, and min_result to results
+    of at least that value; by default every result is sent.
+    """
+
+    def __init__(self, queues, operations=None, min_result=None):
+        self.queues = queues
+        self.operations = set(operations) if operations else None
+        self.min_result = min_result
+
+    def _wanted(self, operation, result):
+        return (self.operations is None or operation in self.operations) \
+            and (self.min_result is None or result >= self.min_result)
+
+    def row(self, operation, operand1, operand2, result, timestamp):
+        if self._wanted(operation, result):
+            message = format_result(operation, float(operand1), float(operand2), float(result))
+            for notification_queue in self.queues:
+                notification_queue.submit(message)
+
+    def rows(self, names, op_codes, operand1, operand2, result, timestamp):
+        import numpy as np
+        mask = np.ones(len(op_codes), dtype=bool)
+        if self.operations is not None:
+            mask &= np.isin(op_codes, [code for code, name in enumerate(names) if name in self.operations])
+        if self.min_result is not None:
+            mask &= np.asarray(result) >= self.min_result
+        if not mask.any():
+            return
+        # Masking copies the rows, so the queues can hold them after save_many returns
+        columns = [np.asarray(values)[mask] for values in (op_codes, operand1, operand2, result)]
+        for notification_queue in self.queues:
+            notification_queue.submit_rows(tuple(names), *columns)
+
+
+def get_sink(name):
+    """The process-wide sink for "email" or "discord", built from the environment; None if not configured.
+
+    The plugins and the notification pipeline share these, and so their pooled connections.
+    """
+    with _sinks_lock:
+        if name not in _sinks:
+            sink = None
+            if name == "email" and os.getenv("SMTP_HOST"):
+                sink = SMTPSink(os.getenv("SMTP_HOST"), int(os.getenv("SMTP_PORT", "25")),
+                                os.getenv("EMAIL_FROM", "calculator@localhost"),
+                                [address.strip() for address in os.getenv("EMAIL_TO", "").split(",") if address.strip()],
+                                int(os.getenv("NOTIFY_POOL_SIZE", "2")))
+            elif name == "discord" and os.getenv("DISCORD_WEBHOOK_URL"):
+                sink = HTTPSink(os.getenv("DISCORD_WEBHOOK_URL"), int(os.getenv("NOTIFY_POOL_SIZE", "2")))
+            elif name not in ("email", "discord"):
+                raise ValueError(f"Unknown notification sink '{name}', expected email or discord")
+            _sinks[name] = sink
+        return _sinks[name]
+
+
+def close_sinks():
+    with _sinks_lock:
+        for sink in _sinks.values():
+            if sink is not None:
+                sink.close()
+        _sinks.clear()
+
+
+def start_notifications(history_manager):
+    """Send results saved to history_manager through the sinks named in NOTIFY_SINKS (e.g. "email,discord").
+
+    Returns the NotificationQueues, keyed by sink name; sinks that are not
+    configured are skipped with a warning.
+    """
+    global _pipeline
+    _stop_pipeline()  # the sinks stay open: the plugins may be using them
+    queues = {}
+    for name in [name.strip().lower() for name in os.getenv("NOTIFY_SINKS", "").split(",") if name.strip()]:
+        sink = get_sink(name)
+        if sink is None:
+            logging.warning("Notification sink %s is not configured; skipping it", name)
+            continue
+        queues[name] = NotificationQueue(sink, int(os.getenv("NOTIFY_BATCH_SIZE", "50")),
+                                         float(os.getenv("NOTIFY_WINDOW", "10")),
+                                         retries=int(os.getenv("NOTIFY_RETRIES", "5")),
+                                         backoff=float(os.getenv("NOTIFY_BACKOFF", "0.5")))
+    if not queues:
+        return queues
+    operations = [name.strip() for name in os.getenv("NOTIFY_OPERATIONS", "").split(",") if name.strip()]
+    min_result = os.getenv("NOTIFY_MIN_RESULT")
+    notifier = ResultNotifier(list(queues.values()), operations or None,
+                              float(min_result) if min_result else None)
+    history_manager.subscribe(notifier)
+    _pipeline = (history_manager, notifier, queues)
+    return queues
+
+
+def notification_queues():
+    return _pipeline[2] if _pipeline is not None else {}
+
+
+def _stop_pipeline():
+    global _pipeline
+    if _pipeline is not None:
+        history_manager, notifier, queues = _pipeline
+        _pipeline = None
+        history_manager.unsubscribe(notifier)
+        for notification_queue in queues.values():
+            notification_queue.close()
+
+
+def stop_notifications():
+    """Unsubscribe from history, deliver what is queued and close the sinks' connections."""
+    _stop_pipeline()
+    close_sinks()
+
+
+atexit.register(stop_notifications)
@@ -0,0 +1,78 @@
+import math
+import numpy as np
+from app.batch import OPERATORS, BatchResult, evaluate
+
+MAX_ELEMENTS = 10_000_000  # per operand and per result; 80 MB of float64 each
+
+
+def is_vector_token(token):
+    """True for comma lists, start:stop:step ranges and @file.npy references."""
+    return token.startswith("@") or "," in token or ":" in token
+
+
+def is_vector(value):
+    return np.ndim(value) > 0
+
+
+def parse_operand(token):
+    """Parse one operand: a float, a comma list, a start:stop[:step] range or @file.npy.
+
+    Scalars come back as float so the two-number commands behave exactly as before;
+    everything else is a float64 array. Operands with more than MAX_ELEMENTS
+    elements raise ValueError before anything is allocated.
+    """
+    if token.startswith("@"):
+        try:
+            values = np.load(token[1:], mmap_mode="r", allow_pickle=False)  # maps, so the size is known first
+            _check_size(values.size, token)
+            return np.asarray(values, dtype=np.float64)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"could not load {token[1:]}: {e}") from None
+    if ":" in token:
+        parts = token.split(":")
+        if len(parts) not in (2, 3):
+            raise ValueError(f"expected start:stop or start:stop:step, got '{token}'")
+        start, stop = float(parts[0]), float(parts[1])
+        step = float(parts[2]) if len(parts) == 3 and parts[2] else 1.0
+        if step == 0:
+            raise ValueError("range step must not be zero")
+        count = (stop - start) / step
+        if math.isnan(count):
+            raise ValueError(f"range bounds must be numbers, got '{token}'")
+        _check_size(count, token)  # a float, possibly inf
+        return np.arange(start, stop, step, dtype=np.float64)
+    if "," in token:
+        items = token[:-1].split(",") if token.endswith(",") else token.split(",")  # "5," is a one-item list
+        _check_size(len(items), token)
+        if "" in items:
+            raise ValueError(f"empty item in list '{token}'")
+        return np.array([float(value) for value in items], dtype=np.float64)
+    return float(token)
+
+
+def _check_size(count, token):
+    if count > MAX_ELEMENTS:
+        raise ValueError(f"'{token[:40]}' has more than {MAX_ELEMENTS} elements")
+
+
+def apply_vector(name, x, y, history_manager=None):
+    """Apply one operation element-wise with NumPy broadcasting.
+
+    Division-by-zero pairs are masked out rather than raising: their result is NaN,
+    valid is False, and only the valid pairs are recorded, in a single bulk append.
+    """
+    code, _ = OPERATORS[name]
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    if x.size > MAX_ELEMENTS:
+        raise ValueError(f"the operands broadcast to more than {MAX_ELEMENTS} pairs")
+    operand1, operand2 = x.ravel(), y.ravel()
+    op_codes = np.full(operand1.size, code, dtype=np.uint16)
+    result, valid = evaluate(op_codes, operand1, operand2)
+    if history_manager is not None:
+        history_manager.save_many(op_codes[valid], operand1[valid], operand2[valid], result[valid])
+    return BatchResult(op_codes, operand1, operand2, result, valid, [])
+
+
+def format_vector(values):
+    """Short printable form of a result array; long arrays are elided in the middle."""
+    return np.array2string(values, threshold=20, edgeitems=5, separator=", ")
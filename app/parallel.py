@@ -0,0 +1,189 @@
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from app.batch import evaluate, parse_operations, BatchResult
+from app.history_buffer import OPERATIONS, VALUE_COLUMNS
+from app.history_journal import HistoryJournal, format_records, read_records
+from app.stream import CHUNK_SIZE, format_results
+
+MAX_REPORTED_ERRORS = 10
+
+
+class ParallelSummary:
+    """Totals from a parallel run, plus the first few invalid lines in input order."""
+
+    def __init__(self):
+        self.count = 0
+        self.division_by_zero = 0
+        self.error_count = 0
+        self.errors = []  # (line number, message), at most MAX_REPORTED_ERRORS
+
+    def add(self, count, division_by_zero, error_count, errors):
+        self.count += count
+        self.division_by_zero += division_by_zero
+        self.error_count += error_count
+        self.errors.extend(errors[:MAX_REPORTED_ERRORS - len(self.errors)])
+
+
+def split_ranges(path, parts):
+    """Split a file into up to `parts` byte ranges that each start at the beginning of a line."""
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as source:
+        for part in range(1, parts):
+            position = size * part // parts
+            if position <= boundaries[-1]:
+                continue
+            source.seek(position)
+            source.readline()  # move to the start of the next line
+            if source.tell() >= size:
+                break
+            boundaries.append(source.tell())
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def read_range(path, start, end, chunk_size=CHUNK_SIZE):
+    """Yield blocks of whole lines from bytes [start, end) of a file."""
+    with open(path, "rb") as source:
+        source.seek(start)
+        remaining = end - start
+        remainder = b""
+        while remaining > 0:
+            data = source.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            data = remainder + data
+            cut = data.rfind(b"\n") + 1
+            if cut == 0:
+                remainder = data
+                continue
+            remainder = data[cut:]
+            yield data[:cut].decode("utf-8")
+        if remainder:
+            yield remainder.decode("utf-8")
+
+
+def count_lines(path, start, end, chunk_size=CHUNK_SIZE):
+    """Number of newlines in bytes [start, end) of a file."""
+    total = 0
+    with open(path, "rb") as source:
+        source.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = source.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            total += data.count(b"\n")
+    return total
+
+
+def evaluate_range(path, start, end, line_offset, output_path=None, history_path=None, chunk_size=CHUNK_SIZE):
+    """Worker: evaluate one byte range, writing its output and history segment files.
+
+    Either file is skipped when its path is None.
+    Returns (operations, division by zero count, invalid line count, first invalid lines).
+    """
+    count = division_by_zero = error_count = 0
+    errors = []
+    segment = HistoryJournal(history_path) if history_path else None
+    output = open(output_path, "w", encoding="utf-8", newline="") if output_path else None
+    try:
+        for block in read_range(path, start, end, chunk_size):
+            op_codes, operand1, operand2, line_numbers, block_errors = parse_operations(block)
+            result, valid = evaluate(op_codes, operand1, operand2)
+            batch = BatchResult(op_codes, operand1, operand2, result, valid, block_errors, line_numbers)
+            if output is not None:
+                output.write(format_results(batch, line_offset))
+            if segment is not None and valid.any():
+                timestamp = np.full(int(valid.sum()), time.time())
+                for chunk in format_records(OPERATIONS, op_codes[valid], operand1[valid],
+                                            operand2[valid], result[valid], timestamp):
+                    segment.append(chunk)
+            count += len(batch)
+            division_by_zero += batch.division_by_zero
+            error_count += len(block_errors)
+            errors.extend((number + line_offset, message)
+                          for number, message in block_errors[:MAX_REPORTED_ERRORS - len(errors)])
+            line_offset += block.count("\n")
+    finally:
+        if output is not None:
+            output.close()
+        if segment is not None:
+            segment.close()
+    return count, division_by_zero, error_count, errors
+
+
+def copy_segment(path, write, skip_header=False, chunk_size=CHUNK_SIZE):
+    """Feed a segment file to write() in chunks, optionally dropping its first line."""
+    with open(path, "r", encoding="utf-8", newline="") as segment:
+        if skip_header:
+            segment.readline()
+        while True:
+            data = segment.read(chunk_size)
+            if not data:
+                break
+            write(data)
+
+
+def append_segment(journal, path):
+    """Append the rows of a worker's CSV history segment to a journal of any HistoryBackend."""
+    if type(journal) is HistoryJournal:
+        copy_segment(path, journal.append, skip_header=True)  # already in the journal's format
+        return
+    columns = read_records(path)
+    codes = {name: code for code, name in enumerate(OPERATIONS)}
+    op_codes = np.array([codes[name] for name in columns["operation"]], dtype=np.uint16)
+    for chunk in journal.format_rows(OPERATIONS, op_codes, *(columns[name] for name in VALUE_COLUMNS)):
+        journal.append(chunk)
+
+
+def run_parallel(path, output_stream=None, journal=None, history_manager=None, workers=None,
+                 chunk_size=CHUNK_SIZE):
+    """Evaluate an operations file across worker processes.
+
+    The file is cut into line-aligned byte ranges (several per worker, so uneven
+    ranges balance out). A first parallel pass counts lines so each worker knows
+    the absolute line numbers of its range, then each worker evaluates its range
+    into private output and history segment files (no output files are written
+    when there is no output_stream, as in the REPL). Segments are merged in input
+    order, so the output is identical to a serial run. History goes either to a
+    journal as raw appended rows, or through history_manager so its in-memory
+    state, index and statistics stay current.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_ranges(path, workers * 4)
+    summary = ParallelSummary()
+    record_history = journal is not None or history_manager is not None
+    with tempfile.TemporaryDirectory(prefix="calc-parallel-") as segment_dir, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        starts = [start for start, _ in ranges]
+        ends = [end for _, end in ranges]
+        line_counts = list(pool.map(count_lines, [path] * len(ranges), starts, ends, [chunk_size] * len(ranges)))
+        offsets = np.concatenate([[0], np.cumsum(line_counts, dtype=np.int64)]).tolist()
+        futures = []
+        for index, (start, end) in enumerate(ranges):
+            output_path = os.path.join(segment_dir, f"output-{index}.txt") if output_stream is not None else None
+            history_path = os.path.join(segment_dir, f"history-{index}.csv") if record_history else None
+            futures.append((output_path, history_path, pool.submit(
+                evaluate_range, path, start, end, offsets[index], output_path, history_path, chunk_size)))
+        for output_path, history_path, future in futures:
+            summary.add(*future.result())
+            if output_stream is not None:
+                copy_segment(output_path, output_stream.write)
+            if history_path is None or not os.path.exists(history_path):
+                continue
+            if history_manager is not None:
+                history_manager.merge_segment(history_path)
+            else:
+                append_segment(journal, history_path)
+    if output_stream is not None:
+        output_stream.flush()
+    logging.info("Parallel mode evaluated %d operations from %s with %d workers", summary.count, path, workers)
+    return summary
+
@@ -0,0 +1,157 @@
+import ast
+import importlib
+import json
+import logging
+import os
+
+MANIFEST_VERSION = 2  # 2: bases resolved through imports
+COMMAND_BASES = ("app.commands.Command", "app.commands.AsyncCommand")
+
+
+def plugin_mtime(plugin_dir):
+    """Latest modification time of a plugin package and the .py files directly inside it."""
+    latest = os.stat(plugin_dir).st_mtime_ns
+    with os.scandir(plugin_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".py") and entry.is_file():
+                latest = max(latest, entry.stat().st_mtime_ns)
+    return latest
+
+
+def _imported_names(tree, module):
+    """Map each name the module binds by a top-level import to the dotted path it stands for."""
+    names = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    names[alias.asname] = alias.name
+                else:
+                    top = alias.name.split(".")[0]
+                    names[top] = top
+        elif isinstance(node, ast.ImportFrom):
+            # the scanned file is a package __init__, so one leading dot is the package itself
+            parent = module.rsplit(".", node.level - 1)[0] if node.level else ""
+            source = ".".join(part for part in (parent, node.module) if part)
+            for alias in node.names:
+                names[alias.asname or alias.name] = f"{source}.{alias.name}"
+    return names
+
+
+def _dotted_name(node, names):
+    """The dotted path a base class expression refers to, or None if it is not a plain name."""
+    if isinstance(node, ast.Name):
+        return names.get(node.id, node.id)
+    if isinstance(node, ast.Attribute):
+        parent = _dotted_name(node.value, names)
+        return parent and f"{parent}.{node.attr}"
+    return None
+
+
+def find_command_classes(init_path, module=""):
+    """Return the names of classes deriving from Command or AsyncCommand, found by parsing rather than importing.
+
+    Bases are resolved through the module's imports, so aliases such as
+    `from app.commands import Command as Base` and classes deriving from an
+    earlier command class in the same file are found too.
+    """
+    with open(init_path, "r", encoding="utf-8") as source:
+        tree = ast.parse(source.read(), filename=init_path)
+    names = _imported_names(tree, module)
+    command_bases = set(COMMAND_BASES)
+    classes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        qualified = f"{module}.{node.name}"
+        names[node.name] = qualified
+        if any(_dotted_name(base, names) in command_bases for base in node.bases):
+            classes.append(node.name)
+            command_bases.add(qualified)
+    return classes
+
+
+def import_command_classes(module_name):
+    """Import a plugin and return the names of its Command subclasses.
+
+    The fallback for plugins whose bases the AST scan cannot follow, such as a
+    base class kept in another module of the plugin.
+    """
+    from app.commands import Command
+    module = importlib.import_module(module_name)
+    return sorted(name for name, value in vars(module).items()
+                  if isinstance(value, type) and issubclass(value, Command)
+                  and value.__module__.startswith(module_name))
+
+
+class PluginManifest:
+    """On-disk index of plugin command names to module paths and Command classes.
+
+    Entries are keyed by plugin package name and invalidated by file mtimes, so a
+    refresh only re-parses plugins that changed since the manifest was written.
+    """
+
+    def __init__(self, plugins_path, package, cache_path=None):
+        self.plugins_path = plugins_path
+        self.package = package
+        self.cache_path = cache_path or os.path.join(plugins_path, "__pycache__", "plugin_manifest.json")
+        self.entries = {}
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as cache:
+                data = json.load(cache)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION and data.get("package") == self.package:
+            self.entries = data.get("plugins", {})
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as cache:
+                json.dump({"version": MANIFEST_VERSION, "package": self.package, "plugins": self.entries}, cache)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logging.warning("Could not write plugin manifest %s: %s", self.cache_path, e)
+
+    def refresh(self):
+        """Rescan changed plugins; returns the names of plugins added, changed or removed."""
+        changed = set()
+        found = set()
+        with os.scandir(self.plugins_path) as entries:
+            for entry in entries:
+                init_path = os.path.join(entry.path, "__init__.py")
+                if not entry.is_dir() or entry.name.startswith("__") or not os.path.isfile(init_path):
+                    continue
+                found.add(entry.name)
+                mtime = plugin_mtime(entry.path)
+                cached = self.entries.get(entry.name)
+                if cached and cached["mtime"] == mtime:
+                    continue
+                module = f"{self.package}.{entry.name}"
+                try:
+                    classes = find_command_classes(init_path, module)
+                except (OSError, SyntaxError, ValueError) as e:
+                    logging.error("Error scanning plugin %s: %s", entry.name, e)
+                    classes = []
+                else:
+                    if not classes:
+                        classes = self._import_classes(entry.name, module)
+                self.entries[entry.name] = {"module": module, "classes": classes, "mtime": mtime}
+                changed.add(entry.name)
+        for name in set(self.entries) - found:
+            del self.entries[name]
+            changed.add(name)
+        if changed:
+            self.save()
+        return changed
+
+    def _import_classes(self, plugin_name, module):
+        """Import a plugin the scan found no commands in; slower, but follows any base class."""
+        try:
+            return import_command_classes(module)
+        except Exception as e:
+            logging.error("Error importing plugin %s: %s", plugin_name, e)
+            return []
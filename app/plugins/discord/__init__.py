@@ -1,8 +1,18 @@
-import sys
-from app.commands import Command
+import asyncio
+from app.commands import AsyncCommand
+from app.notifications import get_sink
 
 
-class DiscordCommand(Command):
-    def execute(self):
-        print(f'I WIll send something to discord')
+class DiscordCommand(AsyncCommand):
+    """discord MESSAGE - post MESSAGE to the webhook in DISCORD_WEBHOOK_URL, as a background job."""
 
+    max_concurrency = 2
+    timeout = 10.0
+
+    async def execute_async(self, *args):
+        sink = get_sink("discord")  # shared with result notifications, so connections are reused
+        if sink is None:
+            print(f'I WIll send something to discord')
+            return None
+        await asyncio.to_thread(sink.send, [" ".join(args) or "Hello from the calculator"])
+        return "sent"
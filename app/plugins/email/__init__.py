@@ -1,8 +1,18 @@
-import sys
-from app.commands import Command
+import asyncio
+from app.commands import AsyncCommand
+from app.notifications import get_sink
 
 
-class EmailCommand(Command):
-    def execute(self):
-        print(f'I will email you')
+class EmailCommand(AsyncCommand):
+    """email MESSAGE - mail MESSAGE to EMAIL_TO through SMTP_HOST, as a background job."""
 
+    max_concurrency = 2
+    timeout = 10.0
+
+    async def execute_async(self, *args):
+        sink = get_sink("email")  # shared with result notifications, so connections are reused
+        if sink is None:
+            print(f'I will email you')
+            return None
+        await asyncio.to_thread(sink.send, [" ".join(args) or "Hello from the calculator"])
+        return f"sent to {', '.join(sink.recipients)}"
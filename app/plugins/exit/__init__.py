@@ -1,8 +1,10 @@
 import sys
 from app.commands import Command
+from app.history_manager import flush_history
 
 
 class ExitCommand(Command):
     def execute(self):
+        flush_history()
         sys.exit("Exiting...")
 
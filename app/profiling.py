@@ -0,0 +1,21 @@
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """Collects wall-clock durations of named phases, e.g. during startup."""
+
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        lines = [f"{name:<28}{seconds * 1000:10.2f} ms" for name, seconds in self.phases]
+        return "\n".join(lines)
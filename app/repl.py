@@ -2,8 +2,8 @@ import cmd
 import logging
 import os
 import importlib
-import pandas as pd
 from abc import ABC, abstractmethod
+from app.history_manager import HistoryManager
 
 # Configure logging
 def setup_logging():
@@ -11,36 +11,20 @@ def setup_logging():
     logging.basicConfig(level=getattr(logging, log_level),
                         format='%(asctime)s - %(levelname)s - %(message)s',
                         filename='calculator.log', filemode='a')
-setup_logging()
 
-# Singleton for history management
-class HistoryManager:
-    _instance = None
-    _history_file = "history.csv"
+# Vector operands need NumPy; it is only imported once one is used
+def parse_operand(token):
+    if token.startswith("@") or "," in token or ":" in token:
+        from app.operands import parse_operand as parse_vector_operand
+        return parse_vector_operand(token)
+    return float(token)
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(HistoryManager, cls).__new__(cls)
-            cls._instance.history = pd.DataFrame(columns=["operation", "operand1", "operand2", "result"])
-            cls._instance.load_history()
-        return cls._instance
+def is_vector(value):
+    return not isinstance(value, (int, float))
 
-    def save_to_history(self, operation, operand1, operand2, result):
-        new_entry = pd.DataFrame([[operation, operand1, operand2, result]],
-                                 columns=["operation", "operand1", "operand2", "result"])
-        self.history = pd.concat([self.history, new_entry], ignore_index=True)
-        self.history.to_csv(self._history_file, index=False)
-
-    def load_history(self):
-        if os.path.exists(self._history_file):
-            self.history = pd.read_csv(self._history_file)
-
-    def clear_history(self):
-        self.history = pd.DataFrame(columns=["operation", "operand1", "operand2", "result"])
-        self.history.to_csv(self._history_file, index=False)
-
-    def show_history(self):
-        return self.history
+def apply_vector(name, x, y, history_manager):
+    from app.operands import apply_vector as apply_vector_operation
+    return apply_vector_operation(name, x, y, history_manager)
 
 # Command Pattern for calculator operations
 class Command(ABC):
@@ -54,6 +38,8 @@ class AddCommand(Command):
         self.y = y
 
     def execute(self):
+        if is_vector(self.x) or is_vector(self.y):
+            return apply_vector("add", self.x, self.y, HistoryManager()).result
         result = self.x + self.y
         HistoryManager().save_to_history("Add", self.x, self.y, result)
         return result
@@ -64,6 +50,8 @@ class SubtractCommand(Command):
         self.y = y
 
     def execute(self):
+        if is_vector(self.x) or is_vector(self.y):
+            return apply_vector("subtract", self.x, self.y, HistoryManager()).result
         result = self.x - self.y
         HistoryManager().save_to_history("Subtract", self.x, self.y, result)
         return result
@@ -74,6 +62,8 @@ class MultiplyCommand(Command):
         self.y = y
 
     def execute(self):
+        if is_vector(self.x) or is_vector(self.y):
+            return apply_vector("multiply", self.x, self.y, HistoryManager()).result
         result = self.x * self.y
         HistoryManager().save_to_history("Multiply", self.x, self.y, result)
         return result
@@ -84,6 +74,11 @@ class DivideCommand(Command):
         self.y = y
 
     def execute(self):
+        if is_vector(self.x) or is_vector(self.y):
+            batch = apply_vector("divide", self.x, self.y, HistoryManager())
+            if batch.division_by_zero:
+                logging.error("Attempted division by zero in %d of %d pairs", batch.division_by_zero, len(batch))
+            return batch.result  # NaN where the divisor was zero
         if self.y == 0:
             logging.error("Attempted division by zero")
             return "Error: Division by zero"
@@ -96,40 +91,40 @@ class CalculatorREPL(cmd.Cmd):
     prompt = "(calc) "
 
     def do_add(self, args):
-        "Usage: add x y - Perform addition"
+        "Usage: add x y - Perform addition (x and y may be lists, start:stop:step ranges or @file.npy)"
         try:
-            x, y = map(float, args.split())
+            x, y = map(parse_operand, args.split())
             print(AddCommand(x, y).execute())
         except Exception as e:
             print("Invalid input.", e)
 
     def do_subtract(self, args):
-        "Usage: subtract x y - Perform subtraction"
+        "Usage: subtract x y - Perform subtraction (x and y may be lists, start:stop:step ranges or @file.npy)"
         try:
-            x, y = map(float, args.split())
+            x, y = map(parse_operand, args.split())
             print(SubtractCommand(x, y).execute())
         except Exception as e:
             print("Invalid input.", e)
 
     def do_multiply(self, args):
-        "Usage: multiply x y - Perform multiplication"
+        "Usage: multiply x y - Perform multiplication (x and y may be lists, start:stop:step ranges or @file.npy)"
         try:
-            x, y = map(float, args.split())
+            x, y = map(parse_operand, args.split())
             print(MultiplyCommand(x, y).execute())
         except Exception as e:
             print("Invalid input.", e)
 
     def do_divide(self, args):
-        "Usage: divide x y - Perform division"
+        "Usage: divide x y - Perform division (x and y may be lists, start:stop:step ranges or @file.npy)"
         try:
-            x, y = map(float, args.split())
+            x, y = map(parse_operand, args.split())
             print(DivideCommand(x, y).execute())
         except Exception as e:
             print("Invalid input.", e)
 
     def do_history(self, args):
         "Usage: history - Display calculation history"
-        print(HistoryManager().show_history())
+        print(HistoryManager().display())
 
     def do_clear_history(self, args):
         "Usage: clear_history - Clear all history records"
@@ -153,8 +148,10 @@ class CalculatorREPL(cmd.Cmd):
 
     def do_exit(self, args):
         "Usage: exit - Exit the calculator"
+        HistoryManager().flush()
         print("Exiting calculator...")
         return True
 
 if __name__ == "__main__":
+    setup_logging()
     CalculatorREPL().cmdloop()
\ No newline at end of file
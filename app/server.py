@@ -0,0 +1,195 @@
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+from app.batch import OPERATORS
+from app.commands import AsyncCommand, Command
+from app.expression import evaluate_expression
+from app.history_buffer import OPERATIONS
+from app.operands import apply_vector, is_vector, parse_operand
+
+MAX_LINE = 1 << 20  # longest request line, in bytes; vector operands can be long
+
+
+class ArithmeticCommand(Command):
+    """add/subtract/multiply/divide over scalars, lists, ranges or @file.npy operands."""
+
+    def __init__(self, name, history_manager):
+        self.name = name
+        self.history_manager = history_manager
+
+    def execute(self, *args):
+        if len(args) != 2:
+            raise ValueError(f"expected 2 operands, got {len(args)}")
+        x, y = parse_operand(args[0]), parse_operand(args[1])
+        if is_vector(x) or is_vector(y):
+            return apply_vector(self.name, x, y, self.history_manager).result.tolist()  # NaN → null
+        if self.name == "divide" and y == 0:
+            raise ZeroDivisionError("division by zero")
+        code, ufunc = OPERATORS[self.name]
+        result = float(ufunc(x, y))
+        self.history_manager.save_to_history(OPERATIONS[code], x, y, result)
+        return result
+
+
+class CalcCommand(Command):
+    """calc <expression> [name=value ...]"""
+
+    def __init__(self, history_manager):
+        self.history_manager = history_manager
+
+    def execute(self, *args):
+        tokens = list(args)
+        values = {}
+        while tokens and "=" in tokens[-1]:
+            name, value = tokens.pop().split("=", 1)
+            values[name] = float(value)
+        return evaluate_expression(" ".join(tokens), values, self.history_manager)
+
+
+class StatsCommand(Command):
+    """stats [window] - running statistics per operation as a JSON object."""
+
+    def __init__(self, history_manager):
+        self.history_manager = history_manager
+
+    def execute(self, *args):
+        window = int(args[0]) if args else None
+        return self.history_manager.stats(window=window)
+
+
+def _finite(value):
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_finite(item) for item in value]
+    return value
+
+
+def encode_payload(value):
+    """JSON-encode a response payload on one line; NaN and infinities become null."""
+    return json.dumps(_finite(value))
+
+
+class CalculatorServer:
+    """Line-protocol calculator server built on asyncio streams.
+
+    Each request is one line in REPL syntax (``add 2 3``, ``calc (1+2)*x x=4``,
+    ``stats``, or any plugin command) and gets exactly one response line, either
+    ``OK <json>`` or ``ERR <message>``, in request order. Clients may pipeline as
+    many requests as they like without waiting. Requests run on the event loop
+    thread, so every connection shares the App's HistoryManager and its
+    CommandHandler without locking, and history rows are handed to the
+    background writer, which group-commits rows from all clients together.
+    """
+
+    def __init__(self, app=None):
+        if app is None:
+            from app import App
+            app = App()
+        self.app = app
+        self.history_manager = app.history_manager
+        self.command_handler = app.command_handler
+        for name in ("add", "subtract", "multiply", "divide"):
+            self.command_handler.register_command(name, ArithmeticCommand(name, self.history_manager))
+        self.command_handler.register_command("calc", CalcCommand(self.history_manager))
+        self.command_handler.register_command("stats", StatsCommand(self.history_manager))
+        self.server = None
+        self.connections = 0
+        self.requests = 0
+
+    def handle_line(self, line):
+        """Run one request line and return its response line (without the newline)."""
+        parts = line.split()
+        if not parts:
+            return "ERR Empty request"
+        name, args = parts[0].lower(), parts[1:]
+        if name == "ping":
+            return 'OK "pong"'
+        executor = self.command_handler.resolve(name) if name in self.command_handler.commands else None
+        if executor is None:
+            return f"ERR Unknown command: {name}"
+        if isinstance(executor, AsyncCommand):  # runs in the background; don't hold up the event loop
+            job = self.command_handler.jobs.submit(name, executor, *args)
+            return f"OK {encode_payload({'job': job.id, 'state': job.state})}"
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):  # plugin commands print their output
+                result = executor.execute(*args)
+        except ZeroDivisionError:
+            return "ERR Division by zero"
+        except (ValueError, TypeError) as e:
+            return f"ERR Invalid input: {e}"
+        except SystemExit:
+            return f"ERR Command {name} is not available over the server"
+        except Exception as e:
+            logging.error("Server command %s failed: %s", line, e)
+            return f"ERR {type(e).__name__}: {e}"
+        if result is None:
+            result = output.getvalue().strip()
+        return f"OK {encode_payload(result)}"
+
+    async def handle_client(self, reader, writer):
+        self.connections += 1
+        peer = writer.get_extra_info("peername") or "unix socket"
+        logging.info("Client connected: %s", peer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(b"ERR Request line too long\n")
+                    break
+                if not line:
+                    break
+                request = line.decode("utf-8", errors="replace").strip()
+                if request.lower() in ("quit", "exit"):
+                    writer.write(b'OK "bye"\n')
+                    break
+                self.requests += 1
+                writer.write(self.handle_line(request).encode() + b"\n")
+                await writer.drain()  # only waits when the client is not reading its responses
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+            logging.info("Client disconnected: %s", peer)
+
+    async def start(self, host="127.0.0.1", port=8765, unix_socket=None):
+        """Start listening on a TCP port, or on a Unix socket path when one is given."""
+        self.history_manager.enable_async_writes()
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.remove(unix_socket)
+            self.server = await asyncio.start_unix_server(self.handle_client, path=unix_socket, limit=MAX_LINE)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+        logging.info("Calculator server listening on %s", unix_socket or self.address)
+        return self.server
+
+    @property
+    def address(self):
+        """(host, port) of the first listening TCP socket."""
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.history_manager.flush()
+
+    async def serve_forever(self, host="127.0.0.1", port=8765, unix_socket=None):
+        await self.start(host, port, unix_socket)
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
@@ -0,0 +1,72 @@
+import heapq
+import logging
+import time
+import numpy as np
+from app.batch import evaluate, parse_operations, BatchResult
+from app.history_buffer import OPERATIONS
+
+CHUNK_SIZE = 1 << 20  # characters read from the input per block
+
+
+def read_blocks(stream, chunk_size=CHUNK_SIZE):
+    """Yield blocks of whole lines from a text stream, reading chunk_size characters at a time."""
+    remainder = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        chunk = remainder + chunk
+        cut = chunk.rfind("\n") + 1
+        if cut == 0:
+            remainder = chunk  # a single line longer than the chunk; keep reading
+            continue
+        remainder = chunk[cut:]
+        yield chunk[:cut]
+    if remainder:
+        yield remainder
+
+
+def format_results(batch, line_offset=0):
+    """Render one output line per input line, in input order."""
+    outputs = [f"Result: {value}" for value in batch.result.tolist()]
+    for index in np.flatnonzero(~batch.valid).tolist():
+        outputs[index] = "Error: Division by zero"
+    if batch.errors:
+        rows = zip(batch.line_numbers, outputs)
+        failures = ((number, f"Invalid input on line {number + line_offset}: {message}")
+                    for number, message in batch.errors)
+        outputs = [text for _, text in heapq.merge(rows, failures)]
+    return "".join(text + "\n" for text in outputs)
+
+
+def run_stream(input_stream, output_stream, journal=None, chunk_size=CHUNK_SIZE):
+    """Evaluate 'op x y' lines from input_stream block by block in constant memory.
+
+    Results go to output_stream with one write per block and valid rows are
+    appended straight to the history journal (any HistoryBackend), never held
+    in memory.
+    Returns the number of operations evaluated.
+    """
+    total = 0
+    line_offset = 0
+    for block in read_blocks(input_stream, chunk_size):
+        op_codes, operand1, operand2, line_numbers, errors = parse_operations(block)
+        result, valid = evaluate(op_codes, operand1, operand2)
+        batch = BatchResult(op_codes, operand1, operand2, result, valid, errors, line_numbers)
+        output_stream.write(format_results(batch, line_offset))
+        if journal is not None and valid.any():
+            timestamp = np.full(int(valid.sum()), time.time())
+            for chunk in journal.format_rows(OPERATIONS, op_codes[valid], operand1[valid],
+                                             operand2[valid], result[valid], timestamp):
+                journal.append(chunk)
+        total += len(batch)
+        line_offset += block.count("\n")
+    output_stream.flush()
+    logging.info("Stream mode evaluated %d operations", total)
+    return total
+
+
+def open_history_journal():
+    """Open the configured history backend for append-only streaming without loading past history."""
+    from app.history_manager import HistoryManager
+    return HistoryManager.open_backend()[1]
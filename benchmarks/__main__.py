@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import sys
+from benchmarks.suite import BENCHMARKS, DEFAULT_THRESHOLD, compare, format_comparison, run_benchmarks
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Calculator benchmark suite")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), metavar="NAME",
+                        help=f"Run one benchmark (repeatable): {', '.join(sorted(BENCHMARKS))}")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply the synthetic data sizes, e.g. 0.01 for a quick run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the fastest is kept")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown before a metric fails, as a fraction (default 0.5)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store these results as the new baseline, keeping its per-metric thresholds")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_benchmarks(args.only, args.scale, args.repeat)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2)
+    for metric, entry in results["metrics"].items():
+        print(f"{metric:<32}{entry['value']:12.3f} {entry['unit']}")
+    print(f"Results written to {args.output}")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as source:
+            baseline = json.load(source)
+    if args.update_baseline:
+        if baseline is not None:
+            results["thresholds"] = baseline.get("thresholds", {})
+            results["metrics"] = {**baseline["metrics"], **results["metrics"]}  # keep metrics not rerun
+        with open(args.baseline, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+    if baseline["meta"].get("scale") != args.scale:
+        print(f"Warning: baseline was recorded at --scale {baseline['meta'].get('scale')}")
+    rows, regressions = compare(results, baseline, args.threshold)
+    print(format_comparison(rows, regressions))
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+        return 1
+    print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
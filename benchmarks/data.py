@@ -0,0 +1,66 @@
+import time
+import numpy as np
+from app.history_buffer import OPERATIONS
+from app.history_journal import COLUMNS, format_records
+
+LOG_MESSAGES = [
+    "app.operations - INFO - Performed Addition: {x} + {y} = {r}",
+    "app.operations - INFO - Performed Multiplication: {x} * {y} = {r}",
+    "root - INFO - Environment variables loaded.",
+    "app - WARNING - Plugin {x} took {y} ms to import",
+    "app - ERROR - Division by zero: {x} / 0",
+]
+
+
+def generate_operations(rows, seed=0):
+    """Columns of a synthetic history: random operations over random operands.
+
+    The same seed always gives the same data, so runs are comparable.
+    """
+    rng = np.random.default_rng(seed)
+    op_codes = rng.integers(0, len(OPERATIONS), rows).astype(np.uint16)
+    operand1 = np.round(rng.uniform(-1000, 1000, rows), 3)
+    operand2 = np.round(rng.uniform(1, 1000, rows), 3)
+    result = np.choose(op_codes, [operand1 + operand2, operand1 - operand2,
+                                  operand1 * operand2, operand1 / operand2])
+    timestamp = 1.7e9 + np.arange(rows, dtype=np.float64)
+    return op_codes, operand1, operand2, result, timestamp
+
+
+def write_history_csv(path, rows, seed=0):
+    """Write a history journal with `rows` synthetic rows and return its path."""
+    with open(path, "w", encoding="utf-8", newline="") as journal:
+        journal.write(",".join(COLUMNS) + "\n")
+        for chunk in format_records(OPERATIONS, *generate_operations(rows, seed)):
+            journal.write(chunk)
+    return path
+
+
+def write_operations_file(path, rows, seed=0):
+    """Write an 'op x y' input file for the stream and batch modes."""
+    op_codes, operand1, operand2, _, _ = generate_operations(rows, seed)
+    names = ["add", "subtract", "multiply", "divide"]
+    with open(path, "w", encoding="utf-8") as operations:
+        for start in range(0, rows, 65536):
+            stop = start + 65536
+            operations.write("".join(f"{names[code]} {x!r} {y!r}\n" for code, x, y in zip(
+                op_codes[start:stop].tolist(), operand1[start:stop].tolist(), operand2[start:stop].tolist())))
+    return path
+
+
+def write_log(path, lines, seed=0):
+    """Write an app.log-style file of `lines` records and return its path."""
+    rng = np.random.default_rng(seed)
+    kinds = rng.integers(0, len(LOG_MESSAGES), lines).tolist()
+    values = rng.integers(0, 1000, (lines, 2)).tolist()
+    start = time.mktime((2025, 1, 1, 0, 0, 0, 0, 1, -1))
+    with open(path, "w", encoding="utf-8") as log_file:
+        for block in range(0, lines, 65536):
+            chunk = []
+            for index in range(block, min(block + 65536, lines)):
+                x, y = values[index]
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + index))
+                message = LOG_MESSAGES[kinds[index]].format(x=x, y=y, r=x + y)
+                chunk.append(f"{stamp},{index % 1000:03d} - {message}\n")
+            log_file.write("".join(chunk))
+    return path
@@ -0,0 +1,354 @@
+import contextlib
+import io
+import os
+import platform
+import tempfile
+import threading
+import time
+import numpy as np
+from benchmarks.data import write_history_csv, write_log
+
+DEFAULT_THRESHOLD = 0.5  # fail when a metric is more than 50% worse than the baseline
+HISTORY_SIZES = (10_000, 100_000, 1_000_000)
+SAVES = 2000
+THREAD_SAVES = 4000  # rows saved by each thread in history_save_threads
+COMMANDS = 5000
+LOG_LINES = 500_000
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark; it takes a BenchmarkContext and returns {metric: (value, unit)}."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+class BenchmarkContext:
+    """Working directory, data sizes and repeat count shared by the benchmarks of one run."""
+
+    def __init__(self, workdir, scale=1.0, repeat=5):
+        self.workdir = workdir
+        self.scale = scale
+        self.repeat = repeat
+
+    def size(self, rows):
+        return max(1, int(rows * self.scale))
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def measure(self, func, setup=None, number=1):
+        """Seconds per call of func(), best of `repeat` runs of `number` calls each.
+
+        Like timeit, the minimum is kept: it is the run least disturbed by other
+        load on the machine. setup() is called untimed before each run.
+        """
+        times = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            times.append((time.perf_counter() - start) / number)
+        return min(times)
+
+    def history(self, rows):
+        """A fresh HistoryManager loaded from a synthetic journal of `rows` rows."""
+        from app.history_manager import HistoryManager
+        path = self.path(f"history-{rows}.csv")
+        seed_path = self.path(f"history-{rows}.seed.csv")
+        if not os.path.exists(seed_path):
+            write_history_csv(seed_path, rows)
+        with open(seed_path, "rb") as seed, open(path, "wb") as journal:
+            journal.write(seed.read())  # saves append to the journal, so start each run from a copy
+        if HistoryManager._instance is not None:
+            HistoryManager._instance.close()
+        HistoryManager._instance = None
+        HistoryManager._history_file = path
+        return HistoryManager()
+
+
+@benchmark("history_save")
+def bench_history_save(context):
+    """save_to_history cost per row with increasingly large histories already loaded."""
+    metrics = {}
+    per_row = []
+    for rows in HISTORY_SIZES:
+        rows = context.size(rows)
+        state = {}
+
+        def setup():
+            state["manager"] = context.history(rows)
+
+        def save():
+            manager = state["manager"]
+            for value in range(SAVES):
+                manager.save_to_history("Add", value, 1.0, value + 1.0)
+            manager.flush()
+
+        seconds = context.measure(save, setup)
+        per_row.append(seconds / SAVES * 1e6)
+        metrics[f"save_to_history.{rows}"] = (per_row[-1], "us/row")
+    # Machine-independent: a save should cost the same however much history there is
+    metrics["save_to_history.growth"] = (per_row[-1] / per_row[0], "ratio")
+    return metrics
+
+
+@benchmark("history_save_threads")
+def bench_history_save_threads(context):
+    """save_to_history per row from 1 and 4 threads at once, with per-thread buffers of 256 rows."""
+    metrics = {}
+    for thread_count in (1, 4):
+        state = {}
+
+        def setup():
+            state["manager"] = context.history(context.size(HISTORY_SIZES[0]))
+            state["manager"].thread_buffer_rows = 256
+
+        def save():
+            manager = state["manager"]
+            barrier = threading.Barrier(thread_count)
+
+            def worker(number):
+                barrier.wait()
+                for value in range(THREAD_SAVES):
+                    manager.save_to_history("Add", number, value, value)
+
+            threads = [threading.Thread(target=worker, args=(number,)) for number in range(thread_count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            manager.flush()
+
+        seconds = context.measure(save, setup)
+        metrics[f"save_to_history.threads.{thread_count}"] = (seconds / (thread_count * THREAD_SAVES) * 1e6,
+                                                              "us/row")
+    # Machine-independent: more writers should not make each row much more expensive
+    metrics["save_to_history.thread_scaling"] = (metrics["save_to_history.threads.4"][0]
+                                                 / metrics["save_to_history.threads.1"][0], "ratio")
+    return metrics
+
+
+@benchmark("history_load")
+def bench_history_load(context):
+    """Reloading from the checkpoint plus a short journal tail, and the full rebuild it replaces."""
+    rows = context.size(HISTORY_SIZES[-1])
+    manager = context.history(rows)  # the full parse on open writes a checkpoint
+    for value in range(SAVES):
+        manager.save_to_history("Add", value, 1.0, value + 1.0)  # journal rows to replay
+    seconds = context.measure(manager.load_history)
+    checkpoint_path, manager.checkpoint_path = manager.checkpoint_path, None
+    full_seconds = context.measure(manager.load_history)
+    manager.checkpoint_path = checkpoint_path
+    return {f"load_history.{rows}": (seconds * 1000, "ms"),
+            f"load_history_full.{rows}": (full_seconds * 1000, "ms")}
+
+
+@benchmark("history_load_segmented")
+def bench_history_load_segmented(context):
+    """Opening a HISTORY_STORE=segmented history: only the manifest and the recent window are read."""
+    from app.history_manager import HistoryManager
+    rows = context.size(HISTORY_SIZES[-1])
+    saved = {name: os.environ.get(name) for name in ("HISTORY_STORE", "HISTORY_WINDOW_ROWS")}
+    saved_dir = HistoryManager._segment_dir
+    os.environ.update(HISTORY_STORE="segmented", HISTORY_WINDOW_ROWS=str(context.size(HISTORY_SIZES[0])))
+    HistoryManager._segment_dir = context.path("segments")
+    try:
+        context.history(rows)  # imports the journal into segments on first use
+        for value in range(context.size(HISTORY_SIZES[0]) // 2):
+            HistoryManager().save_to_history("Add", value, 1.0, value + 1.0)  # half a window to replay
+
+        def reset():
+            HistoryManager._instance.close()
+            HistoryManager._instance = None
+
+        seconds = context.measure(HistoryManager, reset)
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        HistoryManager._segment_dir = saved_dir
+    return {f"open_history_segmented.{rows}": (seconds * 1000, "ms")}
+
+
+@benchmark("history_save_sqlite")
+def bench_history_save_sqlite(context):
+    """save_to_history per row on the SQLite backend: a transaction per row vs. the async writer's batches."""
+    from app.history_manager import HistoryManager
+    saved = os.environ.get("HISTORY_BACKEND")
+    saved_files = HistoryManager._history_file, HistoryManager._sqlite_history_file
+    os.environ["HISTORY_BACKEND"] = "sqlite"
+    HistoryManager._history_file = context.path("no-history.csv")  # nothing to import
+    HistoryManager._sqlite_history_file = context.path("history.db")
+    metrics = {}
+    try:
+        for mode in ("sync", "async"):
+            def setup():
+                if HistoryManager._instance is not None:
+                    HistoryManager._instance.close()
+                HistoryManager._instance = None
+                HistoryManager().clear_history()
+                if mode == "async":
+                    HistoryManager().enable_async_writes()
+
+            def save():
+                manager = HistoryManager()
+                for value in range(SAVES):
+                    manager.save_to_history("Add", value, 1.0, value + 1.0)
+                manager.flush()
+
+            metrics[f"save_to_history_sqlite.{mode}"] = (context.measure(save, setup) / SAVES * 1e6, "us/row")
+    finally:
+        HistoryManager._instance.close()
+        HistoryManager._instance = None
+        HistoryManager._history_file, HistoryManager._sqlite_history_file = saved_files
+        if saved is None:
+            os.environ.pop("HISTORY_BACKEND", None)
+        else:
+            os.environ["HISTORY_BACKEND"] = saved
+    return metrics
+
+
+@benchmark("startup")
+def bench_startup(context):
+    from app import App
+    app = App()
+    return {
+        "app_init": (context.measure(App, number=20) * 1000, "ms"),
+        "load_plugins": (context.measure(app.load_plugins, number=50) * 1000, "ms"),
+    }
+
+
+@benchmark("dispatch")
+def bench_dispatch(context):
+    """App.onecmd for a full add command, and the table lookup on its own."""
+    from app import App
+    context.history(context.size(HISTORY_SIZES[0]))
+    app = App()
+    lines = ["add 1 2", "DIVIDE 4 2", "greet", "history --last 5", "bogus"] * (COMMANDS // 5)
+    app.onecmd("add 1 2")
+
+    def run_adds():
+        for _ in range(COMMANDS):
+            app.onecmd("add 1 2")
+        app.history_manager.flush()
+
+    def resolve():
+        for line in lines:
+            app.resolve_command(line)
+
+    return {
+        "onecmd.add": (context.measure(run_adds) / COMMANDS * 1e6, "us/command"),
+        "resolve_command": (context.measure(resolve) / len(lines) * 1e9, "ns/command"),
+    }
+
+
+@benchmark("metrics")
+def bench_metrics(context):
+    """Cost the latency instrumentation adds to every command."""
+    from app.metrics import Metrics
+    metrics = Metrics()
+
+    def instrumented():
+        for _ in range(COMMANDS):
+            active = metrics.begin("add")
+            metrics.add_time("history_write", 1e-5)
+            metrics.end(active)
+
+    return {"metrics.overhead": (context.measure(instrumented) / COMMANDS * 1e9, "ns/command")}
+
+
+@benchmark("logs")
+def bench_logs(context):
+    """do_logs tail and grep on a large synthetic log file."""
+    from app import App
+    app = App()
+    app.logs_dir = context.path("bench-logs")
+    os.makedirs(app.logs_dir, exist_ok=True)
+    lines = context.size(LOG_LINES)
+    write_log(os.path.join(app.logs_dir, "app.log"), lines)
+    return {
+        f"do_logs.tail.{lines}": (context.measure(lambda: app.do_logs("-n 50"), number=50) * 1000, "ms"),
+        f"do_logs.grep.{lines}": (context.measure(lambda: app.do_logs("--grep ERROR -n 50")) * 1000, "ms"),
+    }
+
+
+def run_benchmarks(names=None, scale=1.0, repeat=5):
+    """Run the selected benchmarks (all by default) and return the results document.
+
+    Everything runs in a temporary directory, so the real history and logs are
+    left alone, with stdout captured so command output does not skew timings.
+    The logging set up by the App instances is stopped at the end.
+    """
+    from app.history_manager import HistoryManager
+    from app.logging_setup import flush_logging, stop_logging
+    names = list(names or BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"unknown benchmark(s): {', '.join(unknown)}")
+    metrics = {}
+    saved_instance, saved_file = HistoryManager._instance, HistoryManager._history_file
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="calc-bench-") as workdir:
+        os.chdir(workdir)
+        context = BenchmarkContext(workdir, scale, repeat)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for name in names:
+                    for metric, (value, unit) in BENCHMARKS[name](context).items():
+                        metrics[metric] = {"value": round(value, 4), "unit": unit, "benchmark": name}
+                flush_logging()
+        finally:
+            stop_logging()
+            if HistoryManager._instance is not None and HistoryManager._instance is not saved_instance:
+                HistoryManager._instance.close()
+            HistoryManager._instance, HistoryManager._history_file = saved_instance, saved_file
+            os.chdir(cwd)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "repeat": repeat,
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compare results with a baseline document; every metric is lower-is-better.
+
+    Returns one (metric, baseline value, current value, relative change, limit)
+    tuple per metric present in both, and the list of metrics whose change is
+    above their limit. A baseline may set per-metric limits under "thresholds".
+    """
+    limits = baseline.get("thresholds", {})
+    rows, regressions = [], []
+    for metric, entry in baseline.get("metrics", {}).items():
+        current = results["metrics"].get(metric)
+        if current is None or not entry["value"]:
+            continue
+        change = current["value"] / entry["value"] - 1
+        limit = limits.get(metric, threshold)
+        rows.append((metric, entry["value"], current["value"], change, limit))
+        if change > limit:
+            regressions.append(metric)
+    return rows, regressions
+
+
+def format_comparison(rows, regressions):
+    lines = [f"{'metric':<32}{'baseline':>12}{'current':>12}{'change':>9}{'limit':>8}"]
+    for metric, before, after, change, limit in rows:
+        flag = "  REGRESSION" if metric in regressions else ""
+        lines.append(f"{metric:<32}{before:12.3f}{after:12.3f}{change:+9.1%}{limit:8.0%}{flag}")
+    return "\n".join(lines)
@@ -1,6 +1,96 @@
 # main.py
-from app import App
+import argparse
+import sys
+import time
 
-if __name__ == "__main__":
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Calculator App")
+    parser.add_argument("--stream", "--stdin", action="store_true",
+                        help="Read 'op x y' lines from stdin and write results to stdout without the REPL")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Evaluate an 'op x y' file and write results to stdout, like --stream")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for --batch; output is identical to a serial run")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run the line-protocol calculator server instead of the REPL")
+    parser.add_argument("--host", default="127.0.0.1", help="Address for --serve (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port for --serve (default 8765)")
+    parser.add_argument("--unix-socket", metavar="PATH", help="Serve on a Unix socket instead of TCP")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report import and initialization time per startup phase, then exit")
+    return parser.parse_args(argv)
+
+
+def profile_startup():
+    """Time each startup phase, including the ones App defers until first use."""
+    start = time.perf_counter()
+    from app import App
+    from app.profiling import PhaseTimer
+    timer = PhaseTimer()
+    timer.phases.append(("import app", time.perf_counter() - start))
+    with timer.phase("App() total"):
+        app = App(timer)
+    with timer.phase("first history access"):
+        app.history_manager
+    with timer.phase("pandas (history display)"):
+        app.history_manager.display()
+    app.resolve_command("add 1 2")  # build the dispatch table outside the measurement
+    lines = ["add 1 2", "DIVIDE 4 2", "greet", "history --last 5", "bogus"] * 2000
+    start_dispatch = time.perf_counter()
+    for line in lines:
+        app.resolve_command(line)
+    per_command = (time.perf_counter() - start_dispatch) / len(lines)
+    timer.phases.append(("total", time.perf_counter() - start))
+    print(timer.report())
+    print(f"dispatch per command: {per_command * 1e6:.2f} us")
+
+
+def serve(args):
+    """Run the asyncio server until interrupted, logging to the log file only."""
+    import asyncio
+    import os
+    from app import App
+    from app.logging_setup import configure_logging
+    from app.server import CalculatorServer
     app = App()
-    app.start()
+    # Plugin output is captured from stdout per request, so keep log lines off it
+    configure_logging(os.path.join(app.logs_dir, "app.log"), console=False)
+    server = CalculatorServer(app)
+    print(f"Serving on {args.unix_socket or f'{args.host}:{args.port}'} (Ctrl+C to stop)")
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port, args.unix_socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.profile_startup:
+        profile_startup()
+    elif args.serve:
+        serve(args)
+    elif args.batch:
+        from app.stream import open_history_journal
+        journal = open_history_journal()
+        try:
+            if args.workers > 1:
+                from app.parallel import run_parallel
+                run_parallel(args.batch, sys.stdout, journal, workers=args.workers)
+            else:
+                from app.stream import run_stream
+                with open(args.batch, "r", encoding="utf-8") as operations:
+                    run_stream(operations, sys.stdout, journal)
+        finally:
+            journal.close()
+    elif args.stream:
+        from app.stream import run_stream, open_history_journal
+        journal = open_history_journal()
+        try:
+            run_stream(sys.stdin, sys.stdout, journal)
+        finally:
+            journal.close()
+    else:
+        from app import App
+        app = App()
+        app.start()
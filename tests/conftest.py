@@ -1,5 +1,11 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import pytest
 from app import App
+from app.history_buffer import OPERATIONS
+from app.history_manager import HistoryManager
 
 @pytest.fixture
 def app_runner(monkeypatch):
@@ -15,3 +21,114 @@ def app_runner(monkeypatch):
         return e, app  # Return both the exception and app instance
 
     return run_app_with_input
+
+# HistoryManager file attributes, each pointed at a file of this name in the test's tmp_path
+HISTORY_FILES = {"_history_file": "history.csv", "_binary_history_file": "history.bin",
+                 "_sqlite_history_file": "history.db", "_segment_dir": "segments"}
+
+@pytest.fixture
+def history_manager(request, tmp_path, monkeypatch):
+    """Fixture to create a fresh HistoryManager backed by temporary history files.
+
+    The backend is csv unless the test picks another with
+    @pytest.mark.parametrize("history_manager", ["binary"], indirect=True):
+    binary, sqlite, or segmented (the segmented store with a 100-row window).
+    """
+    backend = getattr(request, "param", "csv")
+    if backend == "segmented":
+        monkeypatch.setenv("HISTORY_STORE", "segmented")
+        monkeypatch.setenv("HISTORY_WINDOW_ROWS", "100")
+    elif backend != "csv":
+        monkeypatch.setenv("HISTORY_BACKEND", backend)
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    for attribute, name in HISTORY_FILES.items():
+        monkeypatch.setattr(HistoryManager, attribute, str(tmp_path / name))
+    manager = HistoryManager()
+    yield manager
+    manager.close()
+
+@pytest.fixture
+def reopen(monkeypatch):
+    """Close the current HistoryManager and return a new one loaded from the same files."""
+    def reopen_history():
+        HistoryManager._instance.close()
+        monkeypatch.setattr(HistoryManager, "_instance", None)
+        return HistoryManager()
+    return reopen_history
+
+@pytest.fixture
+def fill():
+    """Save rows start..start+count-1 one at a time, cycling through the four operations (operand1 is the row value)."""
+    def fill_history(manager, count, start=0):
+        for value in range(start, start + count):
+            manager.save_to_history(OPERATIONS[value % 4], value, 2.0, value * 2.0)
+    return fill_history
+
+class FakeWebhook:
+    """Local keep-alive webhook endpoint for the discord sink and plugin.
+
+    Each post waits until `gate` is set and then `delay` seconds, and is
+    answered with the next status in `statuses` (then 204). Accepted
+    contents go to `posts`; connections and the most posts handled at
+    once are counted.
+    """
+
+    def __init__(self, statuses=(), delay=0.0):
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.gate = threading.Event()
+        self.gate.set()
+        self.posts = []
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+
+            def do_POST(self):
+                with fake.lock:
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                fake.gate.wait()
+                time.sleep(fake.delay)
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with fake.lock:
+                    fake.in_flight -= 1
+                    status = fake.statuses.pop(0) if fake.statuses else 204
+                    if status < 300:
+                        fake.posts.append(body["content"])
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def fake_webhook():
+    """Start FakeWebhook endpoints with fake_webhook(statuses=(), delay=0.0); they are closed after the test."""
+    endpoints = []
+    def start_webhook(statuses=(), delay=0.0):
+        endpoint = FakeWebhook(statuses, delay)
+        endpoints.append(endpoint)
+        return endpoint
+    yield start_webhook
+    for endpoint in endpoints:
+        endpoint.close()
@@ -0,0 +1,61 @@
+import numpy as np
+from app import App
+from app.batch import evaluate_batch, parse_operations
+
+
+def test_evaluate_batch_matches_scalar_operations(history_manager):
+    """Vectorized results should match the per-command arithmetic."""
+    batch = evaluate_batch("add 4 5\nsubtract 10 3\nmultiply 2 6\ndivide 9 3\n", history_manager)
+
+    assert batch.result.tolist() == [9.0, 7.0, 12.0, 3.0]
+    assert history_manager.show_history()["operation"].tolist() == ["Add", "Subtract", "Multiply", "Divide"]
+
+
+def test_division_by_zero_rows_are_masked(history_manager):
+    """Division by zero rows are reported and left out of history, like do_divide."""
+    batch = evaluate_batch("divide 1 0\ndivide 8 2\nadd 1 1", history_manager)
+
+    assert batch.division_by_zero == 1
+    assert batch.valid.tolist() == [False, True, True]
+    assert history_manager.show_history()["result"].tolist() == [4.0, 2.0]
+
+
+def test_malformed_lines_fall_back_to_line_parser():
+    """Bad lines are reported by line number while the rest still parse."""
+    codes, x, y, line_numbers, errors = parse_operations("add 1 2\n\npower 2 3\nmultiply 3\nDIVIDE 6 3\n")
+
+    assert codes.tolist() == [0, 3]
+    assert x.tolist() == [1.0, 6.0]
+    assert line_numbers == [1, 5]
+    assert [number for number, _ in errors] == [3, 4]
+
+
+def test_fields_are_not_paired_across_lines():
+    """Six fields split 4/2 over two lines are two bad lines, not two operations."""
+    codes, x, y, line_numbers, errors = parse_operations("add 1 2 add\n3 4\n")
+
+    assert len(codes) == 0
+    assert [number for number, _ in errors] == [1, 2]
+
+
+def test_bulk_write_journals_all_rows(history_manager):
+    """All rows from a batch should land in the journal and reload intact."""
+    lines = "\n".join(f"multiply {i} 2" for i in range(1000))
+    evaluate_batch(lines, history_manager)
+
+    with open(history_manager._history_file, encoding="utf-8") as f:
+        assert sum(1 for _ in f) == 1001
+    history_manager.load_history()
+    assert np.array_equal(history_manager.buffer.column("result"), np.arange(1000) * 2.0)
+
+
+def test_batch_command(history_manager, tmp_path, capsys):
+    """The batch command should evaluate a file and report a summary."""
+    operations = tmp_path / "ops.txt"
+    operations.write_text("add 1 2\ndivide 1 0\n", encoding="utf-8")
+
+    App().do_batch(str(operations))
+    out = capsys.readouterr().out
+
+    assert "Evaluated 2 operations" in out
+    assert "Division by zero in 1 operations" in out
@@ -0,0 +1,51 @@
+import json
+import numpy as np
+from app.history_journal import read_records
+from app.history_manager import HistoryManager
+from benchmarks.__main__ import main
+from benchmarks.data import generate_operations, write_history_csv, write_log, write_operations_file
+from benchmarks.suite import compare, run_benchmarks
+
+
+def test_generators_are_reproducible(tmp_path):
+    first, second = generate_operations(1000, seed=3), generate_operations(1000, seed=3)
+    for a, b in zip(first, second):
+        assert np.array_equal(a, b)
+    columns = read_records(write_history_csv(tmp_path / "history.csv", 1000))
+    assert len(columns["operation"]) == 1000
+    with open(write_log(tmp_path / "app.log", 500), encoding="utf-8") as log_file:
+        assert len(log_file.readlines()) == 500
+    with open(write_operations_file(tmp_path / "ops.txt", 200), encoding="utf-8") as operations:
+        assert all(len(line.split()) == 3 for line in operations)
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"metrics": {"fast": {"value": 10.0}, "slow": {"value": 10.0}, "noisy": {"value": 10.0},
+                            "dropped": {"value": 1.0}},
+                "thresholds": {"noisy": 1.0}}
+    results = {"metrics": {"fast": {"value": 8.0}, "slow": {"value": 13.0}, "noisy": {"value": 18.0},
+                           "new": {"value": 5.0}}}
+    rows, regressions = compare(results, baseline, threshold=0.25)
+    assert regressions == ["slow"]
+    assert [row[0] for row in rows] == ["fast", "slow", "noisy"]  # only metrics in both documents
+
+
+def test_quick_run_writes_results_and_leaves_history_alone(tmp_path, history_manager):
+    results = run_benchmarks(["history_save", "dispatch"], scale=0.001, repeat=1)
+    assert results["metrics"]["save_to_history.growth"]["unit"] == "ratio"
+    assert results["metrics"]["onecmd.add"]["value"] > 0
+    assert HistoryManager._instance is history_manager
+    assert len(history_manager.buffer) == 0
+
+
+def test_cli_fails_on_regression(tmp_path, history_manager):
+    output, baseline = tmp_path / "results.json", tmp_path / "baseline.json"
+    args = ["--only", "startup", "--scale", "0.001", "--repeat", "1", "--output", str(output),
+            "--baseline", str(baseline)]
+    assert main(args + ["--update-baseline"]) == 0
+    assert json.loads(output.read_text())["metrics"]["app_init"]["value"] > 0
+
+    stored = json.loads(baseline.read_text())
+    stored["metrics"]["app_init"]["value"] /= 1000  # pretend the baseline was much faster
+    baseline.write_text(json.dumps(stored))
+    assert main(args) == 1
@@ -0,0 +1,68 @@
+import pytest
+from app import App
+
+
+@pytest.fixture
+def app(history_manager):
+    return App()
+
+
+def test_mixed_case_and_aliases(app, capsys):
+    app.onecmd("ADD 1 2")
+    app.onecmd("+ 2 3")
+    app.onecmd("Multiply 2 4")
+    out = capsys.readouterr().out
+    assert "Result: 3.0" in out and "Result: 5.0" in out and "Result: 8.0" in out
+
+
+def test_plugin_commands_reachable(app, capsys):
+    app.onecmd("email")
+    app.onecmd("GREET")
+    app.command_handler.jobs.wait()  # email runs as a background job
+    out = capsys.readouterr().out
+    assert "I will email you" in out
+    assert "Hello, World!" in out
+
+
+def test_builtin_wins_over_plugin(app):
+    # the exit plugin is registered too, but the built-in do_exit is dispatched
+    assert app.resolve_command("exit")[0] == app.do_exit
+    assert app.resolve_command("quit")[0] == app.do_exit
+
+
+def test_unknown_command(app, capsys):
+    app.onecmd("bogus 1 2")
+    assert "Unknown command: bogus" in capsys.readouterr().out
+
+
+def test_table_rebuilt_only_on_registry_change(app, capsys):
+    app.onecmd("add 1 1")
+    table = app.dispatch_table
+    app.onecmd("subtract 3 1")
+    assert app.dispatch_table is table
+
+    app.command_handler.register_command("shout", lambda *args: print(" ".join(args).upper()))
+    app.onecmd("shout hello there")
+    assert app.dispatch_table is not table
+    assert "HELLO THERE" in capsys.readouterr().out
+
+    app.command_handler.unregister_command("shout")
+    app.onecmd("shout again")
+    assert "Unknown command: shout" in capsys.readouterr().out
+
+
+def test_table_built_once_per_registry_version(app, monkeypatch):
+    """Resolving many lines builds the table once; each registry change costs exactly one rebuild."""
+    builds = []
+    build = app.build_dispatch_table
+    monkeypatch.setattr(app, "build_dispatch_table", lambda: builds.append(app.command_handler.version) or build())
+    lines = ["add 1 2", "DIVIDE 4 2", "greet", "history --last 5", "bogus"] * 200
+    for line in lines:
+        app.resolve_command(line)
+    assert len(builds) == 1
+
+    app.command_handler.register_command("shout", lambda *args: None)
+    for line in lines:
+        app.resolve_command(line)
+    assert builds == [builds[0], builds[0] + 1]
+    assert app.resolve_command("shout")[0] is not None
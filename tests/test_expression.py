@@ -0,0 +1,69 @@
+import pytest
+from app import App
+from app.expression import ExpressionError, compile_expression, evaluate_expression
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1 + 2 * 3", 7.0),
+    ("(1 + 2) * 3", 9.0),
+    ("-4 + 10 / 4", -1.5),
+    ("-(2 - 5) * -2", -6.0),
+    ("2 * pi", 6.283185307179586),
+    ("+7", 7.0),
+])
+def test_precedence_parentheses_and_constants(text, expected):
+    assert evaluate_expression(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text", ["2 ** 3", "__import__('os')", "x.y", "1 +", "'a' + 'b'", "True + 1"])
+def test_unsafe_or_invalid_syntax_is_rejected(text):
+    with pytest.raises(ExpressionError):
+        compile_expression(text)
+
+
+@pytest.mark.parametrize("text", ["1+" * 20000 + "1", "-" * 5000 + "1", "1+" * 500 + "1", "(" * 300 + "1" + ")" * 300])
+def test_oversized_expressions_are_rejected(text):
+    """Long chains and deep nesting fail cleanly instead of exhausting the recursion limit."""
+    with pytest.raises(ExpressionError):
+        compile_expression(text)
+
+
+def test_bound_variables_reuse_the_cached_compilation():
+    """Evaluating a template with new values should hit the cache instead of reparsing."""
+    compile_expression.cache_clear()
+    for x in range(5):
+        assert evaluate_expression("rate * x + 1", {"rate": 2, "x": x}) == 2 * x + 1
+    info = compile_expression.cache_info()
+    assert (info.misses, info.hits) == (1, 4)
+    with pytest.raises(ExpressionError, match="no value bound for rate"):
+        evaluate_expression("rate * x + 1", {"x": 1})
+
+
+def test_every_step_is_recorded(history_manager):
+    assert evaluate_expression("-(1 + 2) * 4 / 2", history_manager=history_manager) == -6.0
+    history = history_manager.history
+    assert history["operation"].tolist() == ["Add", "Subtract", "Multiply", "Divide"]
+    assert history["result"].tolist() == [3.0, -3.0, -12.0, -6.0]
+
+
+def test_division_by_zero_records_nothing(history_manager):
+    with pytest.raises(ZeroDivisionError):
+        evaluate_expression("1 + 2 / (3 - 3)", history_manager=history_manager)
+    assert len(history_manager.buffer) == 0
+
+
+def test_calc_command(history_manager, capsys):
+    app = App()
+    app.do_calc('"(a + b) / 2" a=3 b=5')
+    assert "Result: 4.0" in capsys.readouterr().out
+    app.do_calc("1 + 2 * 3")
+    assert "Result: 7.0" in capsys.readouterr().out
+    app.do_calc('"1 / 0"')
+    assert "Error: Division by zero" in capsys.readouterr().out
+    app.do_calc('"y + 1"')
+    assert "Invalid expression: no value bound for y" in capsys.readouterr().out
+    app.do_calc("9" * 400 + " + 1")
+    assert "Invalid expression: the number 99999999999999999999... is too large" in capsys.readouterr().out
+    app.do_calc("-" * 5000 + "1")
+    assert "Invalid expression: the expression is longer than" in capsys.readouterr().out
+    assert history_manager.history["operation"].tolist() == ["Add", "Divide", "Multiply", "Add"]
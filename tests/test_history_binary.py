@@ -0,0 +1,123 @@
+import os
+import numpy as np
+import pytest
+from app.history_binary import (HEADER, HEADER_SIZE, MAGIC, RECORD, V1_RECORD, BinaryHistoryFile, binary_to_csv,
+                                csv_to_binary)
+from app.history_manager import HistoryManager
+
+binary_backend = pytest.mark.parametrize("history_manager", ["binary"], indirect=True)
+
+
+@binary_backend
+def test_binary_records_are_fixed_width(history_manager):
+    """Each saved row adds exactly one 40-byte record after the header."""
+    history_manager.save_to_history("Add", 1, 2, 3)
+    history_manager.save_to_history("Divide", 1, 3, 1 / 3)
+    history_manager.flush()
+
+    assert os.path.getsize(history_manager.journal.path) == HEADER_SIZE + 2 * RECORD.size
+
+
+@binary_backend
+def test_load_maps_file_without_copying(history_manager, reopen):
+    """Reloaded history is a memmap view and round-trips floats exactly."""
+    history_manager.save_to_history("Multiply", 0.1, 0.2, 0.1 * 0.2)
+    history_manager.save_many(np.array([0, 3], dtype=np.uint16), np.array([1.0, 1.0]),
+                                     np.array([2.0, 3.0]), np.array([3.0, 1 / 3]))
+
+    reloaded = reopen()
+    result = reloaded.buffer.column("result")
+
+    assert isinstance(result.base, np.memmap) or isinstance(result, np.memmap)
+    assert result.tolist() == [0.1 * 0.2, 3.0, 1 / 3]
+    assert reloaded.show_history()["operation"].tolist() == ["Multiply", "Add", "Divide"]
+    assert reloaded.records()["operand2"].sum() == 5.2
+
+
+@binary_backend
+def test_appending_after_load_copies_on_write(history_manager, reopen):
+    """The mapped buffer is read-only; new rows go to owned memory and disk."""
+    history_manager.save_to_history("Add", 1, 1, 2)
+    reloaded = reopen()
+    reloaded.save_to_history("Subtract", 5, 2, 3)
+
+    assert reloaded.buffer.column("result").tolist() == [2.0, 3.0]
+    assert len(reloaded.records()) == 2
+
+
+@binary_backend
+def test_version_1_file_is_upgraded_on_load(history_manager, monkeypatch):
+    """A history.bin from before the timestamp column loads with nan timestamps and takes new rows."""
+    path = history_manager.journal.path
+    history_manager.close()
+    table = "\n".join(["Add", "Subtract", "Multiply", "Divide"]).encode()
+    with open(path, "wb") as old:
+        old.write((HEADER.pack(MAGIC, 1, V1_RECORD.size, len(table)) + table).ljust(HEADER_SIZE, b"\0"))
+        old.write(V1_RECORD.pack(0, 1, 2, 3) + V1_RECORD.pack(3, 6, 3, 2))
+
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    reloaded = HistoryManager()
+    reloaded.save_to_history("Multiply", 2, 2, 4)
+    reloaded.flush()
+
+    assert reloaded.show_history()["operation"].tolist() == ["Add", "Divide", "Multiply"]
+    assert np.isnan(reloaded.buffer.column("timestamp")[:2]).all()
+    assert os.path.getsize(path) == HEADER_SIZE + 3 * RECORD.size
+
+
+def test_unknown_binary_version_names_the_conversion_command(tmp_path):
+    path = tmp_path / "history.bin"
+    path.write_bytes(HEADER.pack(MAGIC, 9, RECORD.size, 0).ljust(HEADER_SIZE, b"\0"))
+    with pytest.raises(ValueError, match="python -m app.history_binary to-csv"):
+        BinaryHistoryFile(str(path)).read_header()
+
+
+@binary_backend
+def test_new_operation_names_are_kept_in_header(history_manager, reopen):
+    history_manager.save_to_history("Power", 2, 3, 8)
+    reloaded = reopen()
+    assert reloaded.show_history()["operation"].tolist() == ["Power"]
+
+
+@binary_backend
+def test_clear_history_truncates_to_header(history_manager):
+    history_manager.save_to_history("Add", 1, 2, 3)
+    history_manager.clear_history()
+
+    assert os.path.getsize(history_manager.journal.path) == HEADER_SIZE
+    assert len(history_manager.records()) == 0
+
+
+@binary_backend
+def test_mapped_views_survive_clear_history(history_manager, reopen):
+    """Snapshots and records() map the file; clearing must not pull the pages out from under them."""
+    history_manager.save_many(np.zeros(5000, dtype=np.uint16), np.arange(5000.0), np.ones(5000),
+                                     np.arange(5000.0) + 1)
+    reloaded = reopen()
+    snapshot, records = reloaded.snapshot(), reloaded.records()
+    reloaded.clear_history()
+
+    assert snapshot.column("result").sum() == records["result"].sum() == 5000 * 5001 / 2
+    assert len(reloaded.snapshot()) == 0 and len(reloaded.records()) == 0
+    reloaded.save_to_history("Add", 1, 2, 3)
+    assert reloaded.records()["result"].tolist() == [3.0]
+
+
+def test_torn_record_is_dropped(tmp_path):
+    history = BinaryHistoryFile(str(tmp_path / "history.bin"))
+    history.append(RECORD.pack(0, 1.0, 2.0, 3.0, 4.0) + b"\x01\x02")
+    history.close()
+
+    assert history.records()["result"].tolist() == [3.0]
+
+
+def test_csv_binary_round_trip_is_lossless(tmp_path):
+    source = tmp_path / "history.csv"
+    source.write_text("operation,operand1,operand2,result,timestamp\n"
+                      "Add,0.1,0.2,0.30000000000000004,1760000000.123456\n"
+                      "Divide,1.0,3.0,0.3333333333333333,nan\n"
+                      "Power,2.0,0.5,1.4142135623730951,1760000001.5\n", encoding="utf-8")
+
+    assert csv_to_binary(str(source), str(tmp_path / "history.bin")) == 3
+    assert binary_to_csv(str(tmp_path / "history.bin"), str(tmp_path / "copy.csv")) == 3
+    assert (tmp_path / "copy.csv").read_text(encoding="utf-8") == source.read_text(encoding="utf-8")
@@ -0,0 +1,60 @@
+import numpy as np
+from app.history_buffer import HistoryBuffer
+
+
+def test_append_grows_geometrically():
+    """Capacity should double as rows are appended past the preallocated size."""
+    buffer = HistoryBuffer(capacity=2)
+    for i in range(5):
+        buffer.append("Add", i, 1, i + 1)
+
+    assert len(buffer) == 5
+    assert buffer.capacity == 8
+    assert buffer.column("result").tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_operations_are_dictionary_encoded():
+    """Known operations share fixed codes and new names get appended codes."""
+    buffer = HistoryBuffer()
+    buffer.append("Divide", 9, 3, 3)
+    buffer.append("Power", 2, 3, 8)
+
+    assert buffer.op_codes().tolist() == [3, 4]
+    assert buffer.decode(4) == "Power"
+    assert buffer.encode_many(["Add", "Power", "Add"]).tolist() == [0, 4, 0]
+
+
+def test_extend_and_to_frame():
+    """Bulk appends should round-trip through the DataFrame view."""
+    buffer = HistoryBuffer(capacity=1)
+    buffer.extend(np.array([0, 2]), [1.0, 2.0], [2.0, 3.0], [3.0, 6.0], [0.0, 60.0])
+    frame = buffer.to_frame()
+
+    assert frame.columns.tolist() == ["operation", "operand1", "operand2", "result", "timestamp"]
+    assert str(frame["timestamp"][1]) == "1970-01-01 00:01:00"
+    assert frame["operation"].tolist() == ["Add", "Multiply"]
+    assert frame["result"].tolist() == [3.0, 6.0]
+
+
+def test_clear_keeps_capacity():
+    """Clearing drops the rows without reallocating."""
+    buffer = HistoryBuffer(capacity=4)
+    buffer.append("Add", 1, 2, 3)
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert buffer.capacity == 4
+    assert buffer.to_frame().empty
+
+
+def test_adopted_arrays_are_a_read_only_base():
+    """Rows appended to adopted arrays go to an owned tail and never touch the base."""
+    base = {name: np.array([1.0, 2.0]) for name in ("operand1", "operand2", "result", "timestamp")}
+    base_op = np.array([0, 1], dtype=np.uint16)
+    buffer = HistoryBuffer.from_arrays(base_op, base)
+    buffer.append("Multiply", 3, 3, 9)
+
+    assert len(buffer) == 3
+    assert base["result"].tolist() == [1.0, 2.0]
+    assert buffer.column("result").tolist() == [1.0, 2.0, 9.0]
+    assert buffer.to_frame([0, 2])["operation"].tolist() == ["Add", "Multiply"]
@@ -0,0 +1,159 @@
+import logging
+import os
+import numpy as np
+import pytest
+from app.history_checkpoint import read_checkpoint, verify_checkpoint
+from app.history_journal import HistoryJournal
+from app.history_manager import HistoryManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """A HistoryManager that checkpoints every 100 rows."""
+    monkeypatch.setenv("HISTORY_CHECKPOINT_ROWS", "100")
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    monkeypatch.setattr(HistoryManager, "_history_file", str(tmp_path / "history.csv"))
+    manager = HistoryManager()
+    yield manager
+    HistoryManager._instance.close()
+
+
+def no_full_rebuild(monkeypatch):
+    def load(journal):
+        raise AssertionError("the journal was parsed from the start")
+    monkeypatch.setattr(HistoryJournal, "load", load)
+
+
+def test_restart_replays_only_rows_after_the_checkpoint(manager, monkeypatch, reopen, fill):
+    fill(manager, 250)
+    assert manager._checkpointed_rows == 200
+    stats = manager.stats()
+    HistoryManager._instance.disable_async_writes()
+    monkeypatch.setattr(HistoryManager, "_checkpoint_large_history", lambda self: None)  # simulate a crash
+    no_full_rebuild(monkeypatch)
+    reloaded = reopen()
+    assert reloaded.show_history()["operand1"].tolist() == [float(value) for value in range(250)]
+    for name, values in reloaded.stats().items():
+        assert values == pytest.approx(stats[name])
+    assert list(reloaded.query("Divide", last=2)) == [243, 247]
+
+
+def test_replayed_rows_do_not_copy_the_mapped_checkpoint(manager, monkeypatch, reopen, fill):
+    fill(manager, 250)
+    monkeypatch.setattr(HistoryManager, "_checkpoint_large_history", lambda self: None)
+    reloaded = reopen()
+    assert isinstance(reloaded.buffer._base_op, np.memmap)
+    assert len(reloaded.buffer._base_op) == 200
+    assert reloaded.buffer._size == 50  # only the replayed rows are held in memory
+    fill(reloaded, 60, start=250)  # the next checkpoint takes in the replayed rows
+    assert len(reloaded.buffer._base_op) == 300
+    assert reloaded.buffer.column("operand1").tolist() == [float(value) for value in range(310)]
+
+
+def test_close_checkpoints_so_nothing_is_replayed(manager, monkeypatch, reopen, fill):
+    fill(manager, 130)
+    reloaded = reopen()
+    assert reloaded._checkpointed_rows == 130
+    fill(reloaded, 5, start=130)
+    reloaded.save_to_history("Power", 2, 3, 8)  # a name the checkpoint does not know
+    no_full_rebuild(monkeypatch)
+    again = reopen()
+    assert again.show_history()["operation"].tolist()[-2:] == ["Multiply", "Power"]
+    assert again.stats("Power")["count"] == 1
+
+
+def test_damaged_rows_are_found_after_startup_and_rebuilt(manager, monkeypatch, caplog, fill):
+    fill(manager, 150)
+    path = manager.checkpoint_path
+    manager.close()
+    with open(path, "r+b") as checkpoint:
+        checkpoint.seek(-7, os.SEEK_END)
+        checkpoint.write(b"\xff")
+    buffer, _, _ = read_checkpoint(path, manager.journal.path)  # startup does not read the rows
+    assert len(buffer) == 150
+    with pytest.raises(ValueError, match="rows are damaged"):
+        verify_checkpoint(path)
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    with caplog.at_level(logging.WARNING):
+        reloaded = HistoryManager()
+        reloaded._verifier.join()
+    assert "rows are damaged" in caplog.text
+    assert reloaded.show_history()["operand1"].tolist() == [float(value) for value in range(150)]
+    assert reloaded.stats("Add")["count"] == 38
+    verify_checkpoint(path)  # the rebuild wrote a sound checkpoint
+
+
+def test_damaged_header_is_rejected_at_startup(manager, monkeypatch, caplog, fill):
+    fill(manager, 150)
+    path = manager.checkpoint_path
+    manager.close()
+    with open(path, "rb") as checkpoint:
+        data = checkpoint.read()
+    position = data.index(b'"stats"') + 20  # inside the saved statistics
+    with open(path, "r+b") as checkpoint:
+        checkpoint.seek(position)
+        checkpoint.write(bytes([data[position] ^ 1]))
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    with caplog.at_level(logging.WARNING):
+        reloaded = HistoryManager()
+    assert "header is damaged" in caplog.text
+    assert reloaded.stats("Add")["count"] == 38
+
+
+@pytest.mark.parametrize("replace, message", [(False, "journal has changed"), (True, "journal was replaced")])
+def test_journal_rewritten_with_the_same_length_is_detected(manager, monkeypatch, caplog, replace, message, fill):
+    fill(manager, 150)
+    path = manager.journal.path
+    manager.close()
+    with open(path, "rb") as journal:
+        data = journal.read()
+    data = data.replace(b"Add,0.0,", b"Add,9.0,", 1)  # an early row, far from the checkpoint offset
+    if replace:
+        with open(f"{path}.new", "wb") as journal:
+            journal.write(data)
+        os.replace(f"{path}.new", path)
+    else:
+        with open(path, "r+b") as journal:
+            journal.write(data)
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    with caplog.at_level(logging.WARNING):
+        reloaded = HistoryManager()
+    assert message in caplog.text
+    assert reloaded.show_history()["operand1"].tolist()[0] == 9.0
+
+
+def test_stale_checkpoint_is_ignored(manager, monkeypatch, caplog, fill):
+    fill(manager, 150)
+    path = manager.journal.path
+    manager.close()
+    with open(path, "w", encoding="utf-8") as journal:  # replaced behind the checkpoint's back
+        journal.write("operation,operand1,operand2,result,timestamp\nAdd,1.0,1.0,2.0,0.0\n")
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    with caplog.at_level(logging.WARNING):
+        reloaded = HistoryManager()
+    assert "shorter than the checkpoint" in caplog.text
+    assert reloaded.show_history()["result"].tolist() == [2.0]
+
+
+def test_clear_history_removes_the_checkpoint(manager, reopen, fill):
+    fill(manager, 120)
+    manager.clear_history()
+    assert not os.path.exists(manager.checkpoint_path)
+    fill(manager, 3)
+    assert reopen().show_history()["operand1"].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_async_writes_are_covered_by_the_checkpoint_offset(manager, monkeypatch, reopen, fill):
+    manager.enable_async_writes(batch_size=16)
+    fill(manager, 240)
+    manager.flush()
+    monkeypatch.setattr(HistoryManager, "_checkpoint_large_history", lambda self: None)
+    no_full_rebuild(monkeypatch)
+    reloaded = reopen()
+    assert reloaded.show_history()["operand1"].tolist() == [float(value) for value in range(240)]
+
+
+def test_small_histories_are_not_checkpointed(history_manager, fill):
+    fill(history_manager, 20)
+    history_manager.close()
+    assert not os.path.exists(history_manager.checkpoint_path)
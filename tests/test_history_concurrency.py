@@ -0,0 +1,85 @@
+import threading
+import time
+import numpy as np
+from app.history_journal import read_records
+from app.history_manager import HistoryManager
+from app.repl import AddCommand
+
+
+def run_threads(count, target):
+    barrier = threading.Barrier(count)
+
+    def worker(number):
+        barrier.wait()
+        target(number)
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_singleton_is_built_once_under_contention(tmp_path, monkeypatch):
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    monkeypatch.setattr(HistoryManager, "_history_file", str(tmp_path / "history.csv"))
+    setups = []
+    original_setup = HistoryManager._setup
+
+    def slow_setup(self):
+        setups.append(self)
+        time.sleep(0.05)  # widen the window in which a racing thread could build a second instance
+        original_setup(self)
+
+    monkeypatch.setattr(HistoryManager, "_setup", slow_setup)
+    instances = []
+    run_threads(16, lambda _: instances.append(HistoryManager()))
+
+    assert len(setups) == 1
+    assert all(instance is instances[0] for instance in instances)
+    instances[0].close()
+
+
+def test_concurrent_writers_lose_no_rows(history_manager):
+    """Rows from many threads all reach memory and the journal, each thread's rows in order."""
+    history_manager.thread_buffer_rows = 64
+    threads, per_thread = 8, 2000
+    run_threads(threads, lambda number: [AddCommand(number, index).execute() for index in range(per_thread)])
+    history_manager.flush()
+
+    snapshot = history_manager.snapshot()
+    assert len(snapshot) == threads * per_thread
+    operand1, operand2 = snapshot.column("operand1"), snapshot.column("operand2")
+    for number in range(threads):
+        assert operand2[operand1 == number].tolist() == list(range(per_thread))
+    journal = read_records(history_manager._history_file)
+    assert np.array_equal(journal["operand1"], operand1)
+    assert np.array_equal(journal["operand2"], operand2)
+    assert history_manager.stats("Add")["count"] == threads * per_thread
+
+
+def test_snapshot_is_unaffected_by_later_writes(history_manager):
+    history_manager.save_to_history("Add", 1, 1, 2)
+    snapshot = history_manager.snapshot()
+    history_manager.save_to_history("Multiply", 2, 2, 4)
+    history_manager.clear_history()
+    history_manager.save_to_history("Divide", 9, 3, 3)
+
+    assert len(snapshot) == 1
+    assert snapshot.to_frame()["result"].tolist() == [2.0]
+
+
+def test_buffered_writers_keep_each_threads_order(history_manager):
+    """With larger per-thread buffers, every row still arrives once and in its thread's order."""
+    history_manager.thread_buffer_rows = 256
+    threads, per_thread = 4, 4000
+    run_threads(threads, lambda number: [history_manager.save_to_history("Add", number, index, index)
+                                         for index in range(per_thread)])
+    history_manager.flush()
+
+    snapshot = history_manager.snapshot()
+    assert len(snapshot) == threads * per_thread
+    operand1, operand2 = snapshot.column("operand1"), snapshot.column("operand2")
+    for number in range(threads):
+        assert operand2[operand1 == number].tolist() == list(range(per_thread))
+    assert history_manager.row_count() == threads * per_thread
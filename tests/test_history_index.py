@@ -0,0 +1,116 @@
+import numpy as np
+from app import App
+from app.history_buffer import HistoryBuffer
+from app.history_index import HistoryIndex, SortedIndex
+
+
+def brute_force(buffer, operation=None, low=-np.inf, high=np.inf, since=-np.inf, until=np.inf):
+    codes = buffer.op_codes()
+    result = buffer.column("result")
+    timestamp = buffer.column("timestamp")
+    mask = (result > low) & (result < high) & (timestamp >= since) & (timestamp <= until)
+    if operation is not None:
+        mask &= codes == buffer.encode(operation)
+    return np.flatnonzero(mask)
+
+
+def random_buffer(count, seed=0):
+    rng = np.random.default_rng(seed)
+    buffer = HistoryBuffer()
+    buffer.extend(rng.integers(0, 4, count).astype(np.uint16), rng.normal(size=count), rng.normal(size=count),
+                  rng.uniform(-500, 500, count), np.arange(count, dtype=np.float64))
+    return buffer
+
+
+def test_sorted_index_range_spans_main_run_and_tail():
+    """Range lookups should see merged and not-yet-merged rows alike."""
+    index = SortedIndex([5.0, 1.0, 3.0], merge_threshold=2)
+    index.add(3, 2.0)
+    assert sorted(index.range(1.0, 3.0).tolist()) == [1, 2, 3]
+    index.add_many([4, 5], [4.0, 0.5])  # crosses the threshold and merges
+    assert len(index) == 6
+    assert sorted(index.range(1.0, 5.0, low_inclusive=False).tolist()) == [0, 2, 3, 4]
+    assert sorted(index.range(high=3.0, high_inclusive=False).tolist()) == [1, 3, 5]
+
+
+def test_sorted_index_keeps_few_runs():
+    """Merges fold small runs into larger ones, so many appends leave O(log n) runs."""
+    index = SortedIndex(merge_threshold=8)
+    keys = np.random.default_rng(1).normal(size=5000)
+    for row, key in enumerate(keys):
+        index.add(row, key)
+
+    assert len(index._runs) <= 12
+    assert sorted(index.range(-0.5, 0.5).tolist()) == np.flatnonzero((keys >= -0.5) & (keys <= 0.5)).tolist()
+
+
+def test_query_matches_brute_force():
+    """Combined filters should select exactly the rows a full scan would."""
+    buffer = random_buffer(5000)
+    index = HistoryIndex()
+    rows = index.query(buffer, operation="Divide", result_gt=100, since=1000, until=3000)
+    assert rows.tolist() == brute_force(buffer, "Divide", low=100, since=1000, until=3000).tolist()
+    rows = index.query(buffer, result_gt=-10, result_lt=10, last=5)
+    assert rows.tolist() == brute_force(buffer, low=-10, high=10)[-5:].tolist()
+
+
+def test_index_is_maintained_incrementally():
+    """Rows appended after the index is built should show up in queries without a rebuild."""
+    buffer = random_buffer(100)
+    index = HistoryIndex()
+    index.query(buffer)
+    assert index.built
+    start = len(buffer)
+    buffer.append("Divide", 1, 1, 250.0, 500.0)
+    index.add(start, buffer.encode("Divide"), 250.0, 500.0)
+    codes = np.full(10000, buffer.encode("Add"), dtype=np.uint16)
+    results = np.linspace(0, 1000, 10000)
+    buffer.extend(codes, 0, 0, results, 600.0)
+    index.add_many(start + 1, codes, results, 600.0)
+
+    assert index.query(buffer, operation="Divide", result_gt=200).tolist() == \
+        brute_force(buffer, "Divide", low=200).tolist()
+    assert index.query(buffer, operation="Add", since=600).tolist() == brute_force(buffer, "Add", since=600).tolist()
+
+
+def test_unfiltered_query_does_not_materialize_rows():
+    """Without filters the query is a lightweight range over the buffer."""
+    buffer = random_buffer(1000)
+    rows = HistoryIndex().query(buffer, last=10)
+    assert isinstance(rows, range)
+    assert list(rows) == list(range(990, 1000))
+
+
+def test_manager_query_and_pages(history_manager):
+    """Saved rows are queryable through the manager and come back a page at a time."""
+    for value in range(30):
+        history_manager.save_to_history("Multiply", value, 10, value * 10)
+    history_manager.save_to_history("Add", 1, 1, 2)
+    history_manager.save_many(np.full(5, 3, dtype=np.uint16), np.full(5, 5000.0), np.ones(5), np.full(5, 5000.0))
+
+    rows = history_manager.query("Multiply", result_gt=100)
+    assert len(rows) == 19
+    pages = list(history_manager.pages(rows, page_size=8))
+    assert [len(page) for page in pages] == [8, 8, 3]
+    assert pages[0]["result"].tolist()[0] == 110.0
+    assert history_manager.page(rows, 3, 8)["operand1"].tolist() == [27.0, 28.0, 29.0]
+    assert len(history_manager.query("Divide", result_ge=5000)) == 5
+
+    history_manager.clear_history()
+    assert len(history_manager.query("Multiply")) == 0
+
+
+def test_history_command_filters_and_paginates(history_manager, capsys):
+    """The history command should accept filters and print one page."""
+    for value in range(50):
+        history_manager.save_to_history("Divide", value * 10, 1, value * 10)
+    app = App()
+    app.do_history("--op divide --result-gt 100 --page 2 --page-size 10")
+    output = capsys.readouterr().out
+    assert "Page 2 of 4 (39 matching entries)" in output
+    assert "210.0" in output and "300.0" in output and "310.0" not in output
+
+    app.do_history("--op Add")
+    assert "No matching history entries." in capsys.readouterr().out
+    app.do_history("--page nope")
+    assert "Usage: history" in capsys.readouterr().out
@@ -0,0 +1,103 @@
+import os
+import pytest
+from app.history_manager import HistoryManager
+
+
+def read_lines(path):
+    """Journal lines with the trailing timestamp field removed."""
+    with open(path, encoding="utf-8") as f:
+        return [line.rsplit(",", 1)[0] for line in f.read().splitlines()]
+
+
+def test_save_appends_only_new_record(history_manager):
+    """Each save should append one journal line instead of rewriting the file."""
+    history_manager.save_to_history("Add", 1, 2, 3)
+    size_after_first = os.path.getsize(history_manager._history_file)
+    history_manager.save_to_history("Multiply", 2, 3, 6)
+
+    with open(history_manager._history_file, encoding="utf-8") as f:
+        last_line = f.read().splitlines()[-1]
+
+    assert read_lines(history_manager._history_file) == ["operation,operand1,operand2,result", "Add,1.0,2.0,3.0",
+                                                         "Multiply,2.0,3.0,6.0"]
+    assert os.path.getsize(history_manager._history_file) == size_after_first + len(last_line) + 1
+
+
+def test_load_history_replays_journal(history_manager, monkeypatch):
+    """A new manager should rebuild its state from the journal on disk."""
+    history_manager.save_to_history("Add", 4, 5, 9)
+    history_manager.save_to_history("Divide", 9, 3, 3)
+    history_manager.close()
+
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    reloaded = HistoryManager()
+
+    assert reloaded.show_history()["operation"].tolist() == ["Add", "Divide"]
+    assert reloaded.show_history()["result"].tolist() == [9.0, 3.0]
+    reloaded.close()
+
+
+def test_load_history_drops_torn_record(history_manager, monkeypatch):
+    """A partially written trailing record should be discarded on load."""
+    history_manager.save_to_history("Add", 1, 1, 2)
+    history_manager.close()
+    with open(history_manager._history_file, "a", encoding="utf-8") as f:
+        f.write("Subtract,5.0,2")
+
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    reloaded = HistoryManager()
+
+    assert len(reloaded.show_history()) == 1
+    assert read_lines(reloaded._history_file)[-1] == "Add,1.0,1.0,2.0"
+    reloaded.close()
+
+
+def test_clear_history_truncates_journal(history_manager):
+    """Clearing should leave only the header row on disk."""
+    history_manager.save_to_history("Add", 1, 2, 3)
+    history_manager.clear_history()
+    history_manager.save_to_history("Subtract", 5, 2, 3)
+
+    assert read_lines(history_manager._history_file) == ["operation,operand1,operand2,result", "Subtract,5.0,2.0,3.0"]
+    assert len(history_manager.show_history()) == 1
+
+
+def test_fsync_policy_validation(history_manager):
+    """Only the documented fsync policies should be accepted."""
+    history_manager.configure_fsync("always")
+    history_manager.save_to_history("Add", 1, 2, 3)
+    assert history_manager.fsync_policy == "always"
+
+    with pytest.raises(ValueError):
+        history_manager.configure_fsync("sometimes")
+
+
+def test_load_history_skips_malformed_rows(history_manager, monkeypatch):
+    """Rows that do not parse are skipped instead of failing the whole load."""
+    history_manager.save_to_history("Add", 1, 2, 3)
+    history_manager.close()
+    with open(history_manager._history_file, "a", encoding="utf-8") as f:
+        f.write("Add,oops,2.0,3.0,1.0\nMultiply,2.0,3.0,6.0,2.0\n")
+
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    reloaded = HistoryManager()
+
+    assert reloaded.show_history()["operation"].tolist() == ["Add", "Multiply"]
+    reloaded.close()
+
+
+def test_legacy_journal_is_upgraded_with_timestamps(history_manager, monkeypatch):
+    """A journal without the timestamp column is rewritten once with nan timestamps."""
+    history_manager.close()
+    with open(history_manager._history_file, "w", encoding="utf-8") as f:
+        f.write("operation,operand1,operand2,result\nAdd,4.0,5.0,9.0\n")
+
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    reloaded = HistoryManager()
+    reloaded.save_to_history("Subtract", 7, 2, 5)
+
+    with open(reloaded._history_file, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[:2] == ["operation,operand1,operand2,result,timestamp", "Add,4.0,5.0,9.0,nan"]
+    assert reloaded.show_history()["timestamp"].isna().tolist() == [True, False]
+    reloaded.close()
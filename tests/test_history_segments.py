@@ -0,0 +1,178 @@
+import json
+import os
+import time
+import numpy as np
+import pytest
+from app import App
+from app.history_buffer import OPERATIONS
+from app.history_journal import HistoryJournal
+from app.history_manager import HistoryManager
+
+segmented_backend = pytest.mark.parametrize("history_manager", ["segmented"], indirect=True)
+
+
+def wait_for_compaction(manager, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline and manager.segments._pick_run() is not None:
+        time.sleep(0.02)
+
+
+@segmented_backend
+def test_window_stays_bounded_and_reads_span_segments(history_manager, fill):
+    manager = history_manager
+    fill(manager, 1050)
+    assert len(manager.buffer) == 50
+    assert manager.segments.rows == 1000
+    assert manager.row_count() == 1050
+    history = manager.show_history()
+    assert len(history) == 1050
+    assert history["operand1"].tolist() == [float(value) for value in range(1050)]
+    assert history["operation"].tolist()[:5] == ["Add", "Subtract", "Multiply", "Divide", "Add"]
+
+
+@segmented_backend
+def test_memory_stays_flat(history_manager, fill):
+    manager = history_manager
+    for block in range(20):
+        codes = np.arange(500, dtype=np.uint16) % 4
+        values = np.arange(block * 500, (block + 1) * 500, dtype=np.float64)
+        manager.save_many(codes, values, values, values)
+        fill(manager, 7, start=block)
+        assert manager.buffer.capacity <= 1024
+        assert len(manager.buffer) < 100
+
+
+@segmented_backend
+def test_queries_match_a_full_scan(history_manager, fill):
+    manager = history_manager
+    fill(manager, 730)
+    frame = manager.show_history()
+    expected = frame.index[(frame["operation"] == "Divide") & (frame["result"] > 400)].tolist()
+    assert manager.query("Divide", result_gt=400).tolist() == expected
+    assert manager.query("Divide", result_gt=400, last=7).tolist() == expected[-7:]
+    assert manager.query("Divide", result_gt=400, last=70).tolist() == expected[-70:]
+    assert list(manager.query(last=5)) == [725, 726, 727, 728, 729]
+    stamps = frame["timestamp"].astype("int64") / 1e9
+    since = float(stamps.iloc[300])
+    assert manager.query(since=since).tolist() == frame.index[stamps >= since].tolist()
+    page = manager.page(manager.query("Add", result_le=100), page=2, page_size=10)
+    assert page["operand1"].tolist() == [40.0, 44.0, 48.0]  # 13 matches, the second page holds the rest
+    window = manager.stats(window=250)
+    last = frame.tail(250)
+    assert window["Multiply"]["count"] == (last["operation"] == "Multiply").sum()
+    assert window["Multiply"]["mean"] == pytest.approx(last[last["operation"] == "Multiply"]["result"].mean())
+
+
+@segmented_backend
+def test_compaction_merges_segments_without_changing_rows(history_manager, fill):
+    manager = history_manager
+    fill(manager, 1000)
+    before = manager.show_history()
+    wait_for_compaction(manager)
+    assert manager.segments.compactions >= 2
+    assert len(manager.segments.segments) < 10
+    manager._frame = None
+    assert manager.show_history().equals(before)
+    files = sorted(name for name in os.listdir(manager.segments.directory) if name.startswith("segment-"))
+    assert files == sorted(segment.file for segment in manager.segments.segments)
+
+
+@segmented_backend
+def test_restart_loads_manifest_and_window_only(history_manager, reopen, fill):
+    fill(history_manager, 1234)
+    stats = history_manager.stats()
+    reloaded = reopen()
+    assert len(reloaded.buffer) == 34
+    assert reloaded.row_count() == 1234
+    for name, values in reloaded.stats().items():
+        assert values == pytest.approx(stats[name])
+    assert reloaded.show_history()["operand1"].tolist()[-3:] == [1231.0, 1232.0, 1233.0]
+    fill(reloaded, 66, start=1234)
+    assert reloaded.segments.rows == 1300 and len(reloaded.buffer) == 0
+
+
+@segmented_backend
+def test_leftovers_from_interrupted_seal_are_removed(history_manager, reopen, fill):
+    manager = history_manager
+    fill(manager, 150)
+    directory = manager.segments.directory
+    for name in ("segment-999.bin", "journal-999.csv", "manifest.json.tmp"):
+        with open(os.path.join(directory, name), "w") as leftover:
+            leftover.write("partial")
+    reloaded = reopen()
+    assert reloaded.row_count() == 150
+    with open(os.path.join(directory, "manifest.json")) as manifest:
+        named = {segment["file"] for segment in json.load(manifest)["segments"]}
+    assert set(os.listdir(directory)) == named | {"manifest.json", reloaded.segments.journal_file}
+
+
+def test_existing_history_csv_is_imported(tmp_path, monkeypatch, history_manager, fill):
+    fill(history_manager, 250)
+    history_manager.close()
+    monkeypatch.setenv("HISTORY_STORE", "segmented")
+    monkeypatch.setenv("HISTORY_WINDOW_ROWS", "100")
+    monkeypatch.setattr(HistoryManager, "_segment_dir", str(tmp_path / "segments"))
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    manager = HistoryManager()
+    assert manager.row_count() == 250 and len(manager.buffer) == 50
+    assert [segment.rows for segment in manager.segments.segments] == [100, 100]
+    assert manager.stats("Add")["count"] == 63
+    assert manager.show_history()["operand1"].tolist() == [float(value) for value in range(250)]
+    manager.close()
+
+
+@segmented_backend
+def test_large_journal_is_sealed_one_window_at_a_time(history_manager, monkeypatch):
+    """A journal filled behind the manager's back (e.g. by --stream) becomes window-sized segments on load."""
+    path = history_manager.journal.path
+    history_manager.close()
+    codes = np.arange(1050, dtype=np.uint16) % 4
+    values = np.arange(1050, dtype=np.float64)
+    journal = HistoryJournal(path)
+    for chunk in journal.format_rows(OPERATIONS, codes, values, values, values, values):
+        journal.append(chunk)
+    journal.close()
+    monkeypatch.setenv("HISTORY_COMPACT_FANOUT", "100")  # keep the segments as sealed
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    manager = HistoryManager()
+
+    assert [segment.rows for segment in manager.segments.segments] == [100] * 10
+    assert len(manager.buffer) == 50
+    assert manager.stats("Add")["count"] == 263
+    assert manager.show_history()["operand1"].tolist() == values.tolist()
+    assert not os.path.exists(path)  # replaced by a journal of the 50 rows left over
+
+
+@segmented_backend
+def test_history_display_reads_only_the_rows_shown(history_manager, monkeypatch, capsys, fill):
+    fill(history_manager, 1050)
+    read = []
+    read_rows = history_manager.segments.read_rows
+    monkeypatch.setattr(history_manager.segments, "read_rows", lambda rows: read.append(len(rows)) or read_rows(rows))
+    App().do_history("")
+
+    output = capsys.readouterr().out
+    assert "[1050 rows x 5 columns]" in output
+    assert output.splitlines()[1].split()[:3] == ["0", "Add", "0.0"]
+    assert output.splitlines()[-3].split()[:3] == ["1049", "Subtract", "1049.0"]
+    assert sum(read) <= 12
+
+
+@segmented_backend
+def test_clear_history_drops_segments(history_manager, fill):
+    manager = history_manager
+    fill(manager, 320)
+    manager.clear_history()
+    assert manager.row_count() == 0
+    assert manager.segments.segments == []
+    fill(manager, 3)
+    assert manager.show_history()["operand1"].tolist() == [0.0, 1.0, 2.0]
+
+
+@segmented_backend
+def test_async_writer_follows_journal_rotation(history_manager, reopen, fill):
+    history_manager.enable_async_writes()
+    fill(history_manager, 250)
+    history_manager.flush()
+    reloaded = reopen()
+    assert reloaded.show_history()["operand1"].tolist() == [float(value) for value in range(250)]
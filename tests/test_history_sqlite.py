@@ -0,0 +1,99 @@
+import sqlite3
+import numpy as np
+import pytest
+from app.history_manager import HistoryManager
+from app.history_sqlite import SQLiteHistory, csv_to_sqlite, sqlite_to_csv
+
+sqlite_backend = pytest.mark.parametrize("history_manager", ["sqlite"], indirect=True)
+
+
+@sqlite_backend
+def test_database_uses_wal_and_indexes(history_manager):
+    history_manager.save_to_history("Add", 1, 2, 3)
+    with sqlite3.connect(history_manager.journal.path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {row[1] for row in connection.execute("PRAGMA index_list(history)")}
+        plan = connection.execute("EXPLAIN QUERY PLAN SELECT * FROM history WHERE operation = 'Add'").fetchall()
+    assert {"history_operation", "history_timestamp"} <= indexes
+    assert "history_operation" in str(plan)
+
+
+@sqlite_backend
+def test_rows_survive_a_restart(history_manager, reopen):
+    history_manager.save_to_history("Multiply", 0.1, 0.2, 0.1 * 0.2)
+    history_manager.save_to_history("Power", 2, 3, 8)
+    history_manager.save_many(np.array([0, 3], dtype=np.uint16), np.array([1.0, 1.0]),
+                                     np.array([2.0, 3.0]), np.array([3.0, 1 / 3]))
+    reloaded = reopen()
+    history = reloaded.show_history()
+    assert history["operation"].tolist() == ["Multiply", "Power", "Add", "Divide"]
+    assert history["result"].tolist() == [0.1 * 0.2, 8.0, 3.0, 1 / 3]
+    assert reloaded.stats("Power")["count"] == 1
+
+
+@sqlite_backend
+def test_async_writer_commits_batches_in_one_transaction(history_manager, monkeypatch):
+    history_manager.enable_async_writes(batch_size=64, linger=0.05)
+    commits = []
+    append = history_manager.journal.append
+
+    def counting_append(rows):
+        commits.append(len(rows))
+        append(rows)
+
+    monkeypatch.setattr(history_manager.journal, "append", counting_append)
+    for value in range(200):
+        history_manager.save_to_history("Add", value, 1, value + 1)
+    history_manager.flush()
+    assert sum(commits) == 200
+    assert len(commits) < 200 and max(commits) > 1
+    assert len(history_manager.journal.select()) == 200
+
+
+def test_select_reads_rows_committed_by_another_connection(tmp_path):
+    path = str(tmp_path / "history.db")
+    writer, reader = SQLiteHistory(path), SQLiteHistory(path)
+    writer.append([("Add", 1.0, 2.0, 3.0, 100.0), ("Divide", 1.0, 0.0, float("nan"), 200.0),
+                   ("Add", 2.0, 2.0, 4.0, 300.0)])
+    assert [row[3] for row in reader.select("Add")] == [3.0, 4.0]
+    assert reader.select(since=150, until=250)[0][3] is None  # NaN is stored as NULL
+    assert np.isnan(reader.load().column("result")[1])
+    assert [row[4] for row in reader.select(last=2)] == [200.0, 300.0]
+    writer.close()
+    reader.close()
+
+
+@sqlite_backend
+def test_clear_history_empties_the_table(history_manager):
+    history_manager.save_to_history("Add", 1, 2, 3)
+    history_manager.clear_history()
+    assert history_manager.journal.select() == []
+
+
+def test_existing_history_csv_is_migrated(history_manager, monkeypatch, tmp_path):
+    history_manager.save_to_history("Add", 1, 2, 3)
+    history_manager.save_to_history("Subtract", 5, 2, 3)
+    history_manager.close()
+    monkeypatch.setenv("HISTORY_BACKEND", "sqlite")
+    monkeypatch.setattr(HistoryManager, "_sqlite_history_file", str(tmp_path / "history.db"))
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    manager = HistoryManager()
+    assert manager.show_history()["operation"].tolist() == ["Add", "Subtract"]
+    manager.close()
+
+
+def test_csv_sqlite_round_trip_is_lossless(tmp_path):
+    source = tmp_path / "history.csv"
+    source.write_text("operation,operand1,operand2,result,timestamp\n"
+                      "Add,0.1,0.2,0.30000000000000004,1700000000.5\n"
+                      "Divide,1.0,3.0,0.3333333333333333,1700000001.25\n")
+    assert csv_to_sqlite(str(source), str(tmp_path / "history.db")) == 2
+    assert sqlite_to_csv(str(tmp_path / "history.db"), str(tmp_path / "back.csv")) == 2
+    assert (tmp_path / "back.csv").read_text() == source.read_text()
+
+
+def test_unknown_backend_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setenv("HISTORY_BACKEND", "postgres")
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    with pytest.raises(ValueError, match="Unknown history backend"):
+        HistoryManager()
@@ -0,0 +1,85 @@
+import math
+import numpy as np
+import pytest
+from app import App
+from app.history_manager import HistoryManager
+from app.history_stats import RunningStats
+
+
+def test_running_stats_match_numpy():
+    """Single and bulk updates should agree with a full recomputation."""
+    values = np.random.default_rng(1).normal(1e6, 3.0, 1000)
+    stats = RunningStats()
+    for value in values[:300]:
+        stats.add(value)
+    stats.add_many(values[300:800])
+    stats.add_many(values[800:])
+
+    assert stats.count == 1000
+    assert stats.sum == pytest.approx(values.sum())
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.variance == pytest.approx(values.var(ddof=1), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_empty_and_single_value_stats():
+    assert RunningStats().as_dict()["count"] == 0
+    assert math.isnan(RunningStats().as_dict()["mean"])
+    assert math.isnan(RunningStats.from_values([4.0]).variance)
+
+
+def test_manager_stats_track_saves_loads_and_clears(history_manager, monkeypatch):
+    """Running stats are updated on save, rebuilt on load and reset on clear."""
+    history_manager.save_to_history("Add", 1, 2, 3)
+    history_manager.save_to_history("Add", 2, 3, 5)
+    history_manager.save_many(np.array([3, 3, 0], dtype=np.uint16), np.array([8.0, 9.0, 1.0]),
+                              np.array([2.0, 3.0, 1.0]), np.array([4.0, 3.0, 2.0]))
+    expected = history_manager.history.groupby("operation")["result"]
+
+    for name in ("Add", "Divide"):
+        stats = history_manager.stats(name)
+        assert stats["count"] == expected.count()[name]
+        assert stats["mean"] == pytest.approx(expected.mean()[name])
+        assert stats["variance"] == pytest.approx(expected.var()[name])
+        assert stats["max"] == expected.max()[name]
+
+    history_manager.close()
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    reloaded = HistoryManager()
+    assert reloaded.stats() == history_manager.stats()
+
+    reloaded.clear_history()
+    assert reloaded.stats() == {}
+    reloaded.close()
+
+
+def test_window_stats_cover_last_rows_only(history_manager):
+    for value in range(10):
+        history_manager.save_to_history("Multiply", value, 1, value)
+    history_manager.save_to_history("Add", 100, 0, 100)
+
+    window = history_manager.stats(window=4)
+    assert window["Multiply"]["count"] == 3
+    assert window["Multiply"]["sum"] == 7 + 8 + 9
+    assert window["Add"]["mean"] == 100
+    assert history_manager.stats("Multiply", window=1)["count"] == 0
+
+
+def test_stats_command(history_manager, capsys):
+    history_manager.save_to_history("Add", 1, 2, 3)
+    history_manager.save_to_history("Subtract", 5, 2, 3)
+    app = App()
+
+    app.do_stats("")
+    output = capsys.readouterr().out
+    assert "Result Statistics (all rows)" in output
+    assert "Add" in output and "Subtract" in output
+
+    app.do_stats("--op subtract --window 1")
+    output = capsys.readouterr().out
+    assert "last 1 rows" in output and "Subtract" in output and "Add " not in output
+
+    app.do_stats("--op divide")
+    assert "No calculations recorded." in capsys.readouterr().out
+    app.do_stats("--window 0")
+    assert "Window must be a positive number of rows." in capsys.readouterr().out
@@ -0,0 +1,86 @@
+import threading
+import time
+import pytest
+from app import App
+from app.history_journal import HistoryJournal
+from app.history_writer import HistoryWriter
+
+
+class SlowJournal:
+    """Journal stand-in that blocks commits until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.chunks = []
+
+    def append(self, data):
+        self.release.wait()
+        self.chunks.append(data)
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.rsplit(",", 1)[0] for line in f.read().splitlines()[1:]]
+
+
+def test_writer_group_commits_and_flushes(tmp_path):
+    """Queued records are committed in batches and all present after flush."""
+    journal = HistoryJournal(str(tmp_path / "history.csv"))
+    writer = HistoryWriter(journal, batch_size=100, linger=0.05)
+    for i in range(1000):
+        writer.submit(f"Add,{i}.0,1.0,{i + 1}.0,{i}.0\n")
+    writer.flush()
+
+    stats = writer.stats()
+    assert stats["committed"] == 1000
+    assert stats["queue_depth"] == 0
+    assert stats["batches"] < 1000
+    assert len(read_rows(tmp_path / "history.csv")) == 1000
+    writer.close()
+    journal.close()
+
+
+def test_writer_applies_backpressure():
+    """submit blocks when the queue is full and counts the event."""
+    journal = SlowJournal()
+    writer = HistoryWriter(journal, max_queue=2, batch_size=1, linger=0)
+    writer.submit("a\n")  # taken by the writer thread, which then blocks in append
+    while writer.stats()["queue_depth"]:
+        time.sleep(0.001)
+    writer.submit("b\n")
+    writer.submit("c\n")
+
+    blocked = threading.Thread(target=writer.submit, args=("d\n",))
+    blocked.start()
+    blocked.join(timeout=0.2)
+    assert blocked.is_alive()
+
+    journal.release.set()
+    blocked.join(timeout=2)
+    writer.close()
+    assert writer.stats()["blocked"] == 1
+    assert writer.stats()["max_depth"] == 2
+    assert journal.chunks == ["a\n", "b\n", "c\n", "d\n"]
+
+
+def test_async_history_flushes_on_exit(history_manager):
+    """do_exit must drain queued history rows before the process exits."""
+    history_manager.enable_async_writes(linger=0.2)
+    app = App()
+    app.do_add("2 3")
+    app.do_multiply("4 5")
+
+    with pytest.raises(SystemExit):
+        app.do_exit("")
+
+    assert history_manager.writer.stats()["queue_depth"] == 0
+    assert read_rows(history_manager._history_file) == ["Add,2.0,3.0,5.0", "Multiply,4.0,5.0,20.0"]
+
+
+def test_clear_history_waits_for_pending_writes(history_manager):
+    """Records queued before a clear must not reappear after it."""
+    history_manager.enable_async_writes(linger=0.2)
+    history_manager.save_to_history("Add", 1, 2, 3)
+    history_manager.clear_history()
+
+    assert read_rows(history_manager._history_file) == []
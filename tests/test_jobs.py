@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+import pytest
+from app import App
+from app.commands import AsyncCommand, CommandHandler
+from app.jobs import CANCELLED, DONE, FAILED, QUEUED, TIMED_OUT
+from app.notifications import close_sinks
+from app.server import CalculatorServer
+
+
+class SleepCommand(AsyncCommand):
+    max_concurrency = 1
+    timeout = 0.2
+
+    async def execute_async(self, seconds="0"):
+        await asyncio.sleep(float(seconds))
+        return f"slept {seconds}"
+
+
+class LongSleepCommand(SleepCommand):
+    timeout = 10.0
+
+
+class BrokenCommand(AsyncCommand):
+    async def execute_async(self):
+        raise RuntimeError("service unavailable")
+
+
+@pytest.fixture
+def webhook(monkeypatch, fake_webhook):
+    endpoint = fake_webhook(delay=0.2)
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", endpoint.url)
+    close_sinks()  # sinks are built from the environment on first use
+    yield endpoint
+    close_sinks()
+
+
+@pytest.fixture
+def app(history_manager):
+    app = App()
+    yield app
+    app.command_handler.shutdown()
+
+
+@pytest.fixture
+def handler():
+    handler = CommandHandler()
+    handler.register_command("sleep", SleepCommand())
+    handler.register_command("broken", BrokenCommand())
+    yield handler
+    handler.shutdown()
+
+
+def test_discord_returns_at_once_and_posts_in_the_background(app, webhook, capsys):
+    webhook.gate.clear()  # hold every post until the command has returned
+    app.onecmd("discord result is 42")
+    assert "Started job 1 (discord)" in capsys.readouterr().out
+    assert not app.command_handler.jobs.get(1).done and webhook.posts == []
+    webhook.gate.set()
+    app.onecmd("jobs 1 --wait")
+    assert "done" in capsys.readouterr().out
+    assert webhook.posts == ["result is 42"]
+
+
+def test_per_plugin_concurrency_limit(app, webhook):
+    jobs = [app.command_handler.execute_command(f"discord message {number}") for number in range(6)]
+    assert app.command_handler.jobs.wait(timeout=10)
+    assert all(job.state == DONE and job.result == "sent" for job in jobs)
+    assert webhook.max_in_flight == 2  # DiscordCommand.max_concurrency
+    assert sorted(webhook.posts) == [f"message {number}" for number in range(6)]
+
+
+def test_timeout_and_failure(handler):
+    slow = handler.execute_command("sleep 5")
+    broken = handler.execute_command("broken")
+    assert slow.wait(timeout=5) and broken.wait(timeout=5)
+    assert slow.state == TIMED_OUT and "timed out" in slow.error
+    assert broken.state == FAILED and broken.error == "RuntimeError: service unavailable"
+
+
+def test_cancel_running_and_queued_jobs(handler):
+    handler.register_command("longsleep", LongSleepCommand())
+    running = handler.execute_command("longsleep 5")
+    queued = handler.execute_command("longsleep 0")  # waits for the single slot
+    time.sleep(0.05)
+    assert queued.state == QUEUED
+    assert handler.jobs.cancel(queued.id) and handler.jobs.cancel(running.id)
+    assert running.wait(timeout=1) and running.state == CANCELLED
+    assert queued.state == CANCELLED and queued.started is None
+    assert not handler.jobs.cancel(running.id)  # already finished
+
+
+def test_jobs_command_lists_jobs(app, capsys):
+    app.command_handler.register_command("sleep", SleepCommand())
+    app.onecmd("jobs")
+    assert "No background jobs." in capsys.readouterr().out
+    app.onecmd("sleep 0")
+    app.onecmd("jobs --wait")
+    out = capsys.readouterr().out
+    assert "Background Jobs:" in out and "sleep 0" in out and "slept 0" in out
+    app.onecmd("jobs 7")
+    assert "No job 7." in capsys.readouterr().out
+
+
+def test_direct_execute_runs_to_completion():
+    assert SleepCommand().execute("0.01") == "slept 0.01"
+
+
+def test_server_submits_async_commands(history_manager, webhook):
+    server = CalculatorServer(App())
+    status, payload = server.handle_line("discord from the server").split(" ", 1)
+    assert status == "OK" and json.loads(payload)["job"] == 1
+    assert server.command_handler.jobs.wait(timeout=5)
+    assert webhook.posts == ["from the server"]
+    server.command_handler.shutdown()
@@ -0,0 +1,115 @@
+import threading
+import time
+from app import App
+from app.logging_setup import flush_logging
+from app.log_tail import follow, grep_lines, tail_lines
+
+
+def write_log(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(f"2025-01-01 - app - INFO - entry {i}\n")
+
+
+def test_tail_lines_reads_backwards_across_blocks(tmp_path):
+    """Lines straddling block boundaries are returned whole and in order."""
+    log = tmp_path / "app.log"
+    write_log(log, 5000)
+
+    assert tail_lines(log, 3, block_size=7) == [
+        "2025-01-01 - app - INFO - entry 4997",
+        "2025-01-01 - app - INFO - entry 4998",
+        "2025-01-01 - app - INFO - entry 4999",
+    ]
+    assert len(tail_lines(log, 20)) == 20
+    assert len(tail_lines(log, 10000)) == 5000
+    assert tail_lines(log, 0) == []
+
+
+def test_tail_lines_without_trailing_newline(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text("first\nsecond\nthird", encoding="utf-8")
+    assert tail_lines(log, 2) == ["second", "third"]
+
+
+def test_grep_lines_streams_matches(tmp_path):
+    log = tmp_path / "app.log"
+    write_log(log, 100)
+    assert list(grep_lines(log, r"entry 9\d$")) == [f"2025-01-01 - app - INFO - entry {i}" for i in range(90, 100)]
+
+
+def test_follow_yields_appended_lines(tmp_path):
+    """follow only reports lines written after it starts."""
+    log = tmp_path / "app.log"
+    log.write_text("old line\n", encoding="utf-8")
+    stop = threading.Event()
+    seen = []
+
+    def reader():
+        for line in follow(log, poll_interval=0.01, stop=stop):
+            seen.append(line)
+            if len(seen) == 2:
+                stop.set()
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    time.sleep(0.2)  # let follow open the file and seek to the end
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("new ")
+        f.flush()
+        f.write("line\nanother line\n")
+    thread.join(timeout=2)
+    stop.set()
+
+    assert seen == ["new line", "another line"]
+
+
+def test_follow_reopens_a_rotated_log(tmp_path):
+    """After the log is renamed and recreated, follow reads the rest of the old file and then the new one."""
+    log = tmp_path / "app.log"
+    log.write_text("old line\n", encoding="utf-8")
+    stop = threading.Event()
+    seen = []
+
+    def reader():
+        for line in follow(log, poll_interval=0.01, stop=stop):
+            seen.append(line)
+            if len(seen) == 3:
+                stop.set()
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    time.sleep(0.2)
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("before rotation\n")
+    time.sleep(0.1)
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("late write\n")  # lands in the old file just before the rename
+    log.rename(tmp_path / "app.log.1")
+    log.write_text("after rotation\n", encoding="utf-8")
+    thread.join(timeout=2)
+    stop.set()
+
+    assert seen == ["before rotation", "late write", "after rotation"]
+
+
+def test_logs_command_options(capsys):
+    """logs -n and --grep limit and filter the output."""
+    app = App()
+    flush_logging()  # startup records are written by the listener thread
+    log_file = f"{app.logs_dir}/app.log"
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write("needle one\nneedle two\n")
+    capsys.readouterr()
+
+    app.do_logs("-n 1")
+    assert capsys.readouterr().out.splitlines() == ["==== Application Log History ====", "needle two"]
+
+    app.do_logs("--grep needle -n 2")
+    assert capsys.readouterr().out.splitlines()[1:] == ["needle one", "needle two"]
+
+    app.do_logs("-n oops")
+    assert "Usage: logs" in capsys.readouterr().out
+
+    app.do_logs("--grep needle -n -2")
+    assert "Usage: logs" in capsys.readouterr().out
@@ -1,6 +1,9 @@
+import logging
 import os
 import pytest
 from app import App  # Import App
+from app.logging_setup import (OperationLogSampler, configure_logging, flush_logging, log_operation,
+                               stop_logging)
 
 @pytest.fixture
 def app():
@@ -31,3 +34,70 @@ def test_clear_logs(app, capsys):
     # Check that the log file is empty after clearing
     with open(log_file, "r", encoding="utf-8") as f:  # ✅ Explicit encoding
         assert f.read().strip() == ""  # ✅ Ensuring log is empty after clearing
+
+
+class CountingArg:
+    """Log argument that records how often it is formatted."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "arg"
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """Point the logging pipeline at a temporary, tiny rotating log file."""
+    monkeypatch.setenv("LOG_MAX_BYTES", "200")
+    monkeypatch.setenv("LOG_BACKUP_COUNT", "2")
+    log_file = tmp_path / "app.log"
+    configure_logging(str(log_file), console=False)
+    yield log_file
+    stop_logging()
+
+
+def test_operation_sampler_is_deterministic():
+    """A 0.25 rate keeps exactly one in four records."""
+    sampler = OperationLogSampler(0.25)
+    assert [sampler.sample() for _ in range(8)] == [False, False, False, True] * 2
+    assert all(OperationLogSampler(1.0).sample() for _ in range(3))
+
+
+def test_filtered_operation_logs_are_never_formatted(pipeline, monkeypatch):
+    """Operation records below OP_LOG_LEVEL skip argument formatting entirely."""
+    monkeypatch.setenv("OP_LOG_LEVEL", "WARNING")
+    configure_logging(str(pipeline), console=False)
+    arg = CountingArg()
+    log_operation("Performed Addition: %s", arg)
+    flush_logging()
+    assert arg.formatted == 0
+
+
+def test_log_records_go_through_queue_and_rotate(pipeline):
+    """Records reach the file via the listener, which rotates at LOG_MAX_BYTES."""
+    for i in range(20):
+        log_operation("Performed Addition: %s", i)
+    flush_logging()
+
+    with open(pipeline, encoding="utf-8") as f:
+        assert "Performed Addition: 19" in f.read()
+    assert os.path.exists(f"{pipeline}.1")
+    assert os.path.getsize(pipeline) <= 200
+
+
+def test_console_gets_warnings_synchronously(tmp_path, capsys):
+    """Console output is written by the logging thread itself, so it cannot splice into REPL prints."""
+    configure_logging(str(tmp_path / "app.log"))
+    try:
+        logging.getLogger("app").info("routine detail")
+        print("Error: Division by zero")
+        logging.getLogger("app").warning("something odd")
+        lines = capsys.readouterr().out.splitlines()  # read before any flush: no listener involved
+        assert lines[0] == "Error: Division by zero"
+        assert len(lines) == 2 and lines[1].endswith(" - app - WARNING - something odd")
+        flush_logging()
+        assert "routine detail" in (tmp_path / "app.log").read_text(encoding="utf-8")
+    finally:
+        stop_logging()
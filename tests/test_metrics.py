@@ -0,0 +1,98 @@
+import time
+import pytest
+from app import App
+from app.logging_setup import flush_logging
+from app.metrics import METRICS, LatencyHistogram, Metrics, start_metrics_dump, stop_metrics_dump
+
+
+@pytest.fixture
+def app(history_manager):
+    METRICS.reset()
+    yield App()
+    flush_logging()
+    METRICS.reset()
+
+
+def test_histogram_percentiles_within_bucket_error():
+    histogram = LatencyHistogram()
+    for micros in range(1, 10001):
+        histogram.add(micros * 1e-6)
+    assert histogram.count == 10000
+    assert histogram.max == pytest.approx(0.01)
+    for q in (0.5, 0.95, 0.99):
+        exact = q * 0.01
+        assert exact <= histogram.percentile(q) <= exact * 1.2
+
+
+def test_onecmd_records_counts_errors_and_phases(app, capsys):
+    for _ in range(3):
+        app.onecmd("add 1 2")
+    app.onecmd("+ 4 5")
+    app.onecmd("divide 1 0")
+    app.onecmd("bogus")
+    snapshot = METRICS.snapshot()
+    assert snapshot["add"]["count"] == 4 and snapshot["add"]["errors"] == 0
+    assert snapshot["divide"]["errors"] == 1  # logged a warning
+    assert snapshot["unknown"] == {**snapshot["unknown"], "count": 1, "errors": 1}
+    phases = snapshot["add"]["phases"]
+    assert phases["total"]["count"] == 4
+    assert phases["history_write"]["mean"] > 0
+    assert phases["logging"]["mean"] > 0
+    assert phases["dispatch"]["mean"] > 0
+    assert phases["parse"]["mean"] > 0
+    assert phases["total"]["p99"] >= phases["total"]["p50"] > 0
+
+
+def test_execute_command_is_instrumented(app, capsys):
+    assert app.command_handler.execute_command("greet")
+    assert not app.command_handler.execute_command("nothing")
+    assert METRICS.snapshot()["greet"]["count"] == 1
+
+
+def test_metrics_command_and_prometheus_text(app, capsys):
+    app.onecmd("multiply 2 3")
+    capsys.readouterr()
+    app.onecmd("metrics")
+    out = capsys.readouterr().out
+    assert "Command Latency" in out and "multiply" in out
+    app.onecmd("metrics multiply")
+    assert "history_write" in capsys.readouterr().out
+    app.onecmd("metrics --prometheus")
+    text = capsys.readouterr().out
+    assert 'calculator_commands_total{command="multiply"} 1' in text
+    assert 'calculator_command_duration_seconds{command="multiply",phase="compute",quantile="0.99"}' in text
+    assert 'calculator_command_duration_seconds_count{command="multiply",phase="parse"} 1' in text
+    assert "# TYPE calculator_command_duration_seconds summary" in text
+    app.onecmd("metrics --reset")
+    assert list(METRICS.snapshot()) == ["metrics"]  # only the reset itself
+
+
+def test_periodic_dump(app, tmp_path, capsys):
+    path = tmp_path / "calculator.prom"
+    start_metrics_dump(str(path), interval=0.05)
+    app.onecmd("subtract 5 3")
+    deadline = time.time() + 5
+    while time.time() < deadline and 'command="subtract"' not in (path.read_text() if path.exists() else ""):
+        time.sleep(0.05)
+    stop_metrics_dump()
+    assert 'calculator_commands_total{command="subtract"} 1' in path.read_text()
+
+
+def test_begin_end_bookkeeping():
+    """Each begin/end pair is one command, nested begins are ignored and a disabled instance records nothing."""
+    metrics = Metrics()
+    count = 2000
+    for _ in range(count):
+        active = metrics.begin("add")
+        assert metrics.begin("nested") is None
+        metrics.add_time("history_write", 1e-6)
+        metrics.log_record(20, 1e-6)
+        metrics.end(active)
+    snapshot = metrics.snapshot()
+    assert list(snapshot) == ["add"]
+    assert snapshot["add"]["count"] == count and snapshot["add"]["errors"] == 0
+    assert snapshot["add"]["phases"]["history_write"]["mean"] == pytest.approx(1e-6, rel=0.2)
+    disabled = Metrics(enabled=False)
+    assert disabled.begin("add") is None
+    disabled.end(None)
+    assert disabled.snapshot() == {}
@@ -0,0 +1,217 @@
+import socketserver
+import threading
+import time
+import numpy as np
+import pytest
+from app import App
+from app.notifications import (HTTPSink, NotificationQueue, SMTPSink, close_sinks, format_result,
+                               start_notifications, stop_notifications)
+
+
+class FakeSMTPServer:
+    """Minimal local SMTP server; fails the first `fail` messages with `code`, counts connections."""
+
+    def __init__(self, fail=0, code=451, close_after_message=False):
+        self.fail = fail
+        self.code = code
+        self.close_after_message = close_after_message
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                with fake.lock:
+                    fake.connections += 1
+                self.reply("220 localhost fake SMTP")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode().strip().upper()
+                    if command.startswith(("EHLO", "HELO", "MAIL", "RCPT", "RSET", "NOOP")):
+                        self.reply("250 OK")
+                    elif command == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        lines = []
+                        while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                            lines.append(data)
+                        with fake.lock:
+                            failing = fake.fail > 0
+                            fake.fail -= failing
+                            if not failing:
+                                fake.messages.append(b"".join(lines).decode())
+                        self.reply(f"{fake.code} try again later" if failing else "250 queued")
+                        if fake.close_after_message and not failing:
+                            return
+                    elif command == "QUIT":
+                        self.reply("221 bye")
+                        return
+                    else:
+                        self.reply("502 not implemented")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def result_lines(self):
+        return [line for message in self.messages for line in message.splitlines() if " = " in line]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def smtp_server():
+    server = FakeSMTPServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def email_settings(smtp_server, monkeypatch):
+    monkeypatch.setenv("NOTIFY_SINKS", "email")
+    monkeypatch.setenv("SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(smtp_server.port))
+    monkeypatch.setenv("EMAIL_TO", "ops@example.com")
+    close_sinks()
+    yield smtp_server
+    stop_notifications()
+
+
+def test_results_go_out_as_digests_over_one_connection(history_manager, email_settings, monkeypatch):
+    monkeypatch.setenv("NOTIFY_BATCH_SIZE", "100")
+    queues = start_notifications(history_manager)
+    for value in range(250):
+        history_manager.save_to_history("Add", value, 1, value + 1)
+    codes = np.full(750, 2, dtype=np.uint16)
+    values = np.arange(750, dtype=np.float64)
+    history_manager.save_many(codes, values, values, values * values)
+    queues["email"].flush()
+    assert len(email_settings.messages) == 10
+    assert email_settings.connections == 1
+    lines = email_settings.result_lines()
+    assert len(lines) == 1000
+    assert lines[0] == "Add 0.0 1.0 = 1.0" and lines[-1] == "Multiply 749.0 749.0 = 561001.0"
+    assert queues["email"].stats() == {"queued": 0, "enqueued": 1000, "sent": 1000, "batches": 10,
+                                       "retries": 0, "dropped": 0}
+
+
+def test_bulk_saves_are_queued_as_one_item_and_formatted_off_the_lock(history_manager, email_settings,
+                                                                      monkeypatch):
+    formatted_on = set()
+
+    def recording_format_result(*args):
+        formatted_on.add(threading.current_thread().name)
+        return format_result(*args)
+
+    monkeypatch.setattr("app.notifications.format_result", recording_format_result)
+    queues = start_notifications(history_manager)
+    values = np.arange(500, dtype=np.float64)
+    history_manager.save_many(np.zeros(500, dtype=np.uint16), values, values, values)
+    assert queues["email"].stats()["enqueued"] == 500
+    queues["email"].flush()
+    assert formatted_on == {"notifications"}
+    assert len(email_settings.result_lines()) == 500
+
+
+def test_time_window_closes_a_partial_batch(history_manager, email_settings, monkeypatch):
+    monkeypatch.setenv("NOTIFY_WINDOW", "0.2")
+    start_notifications(history_manager)
+    for value in range(3):
+        history_manager.save_to_history("Subtract", value, 1, value - 1)
+    deadline = time.time() + 5
+    while time.time() < deadline and not email_settings.messages:
+        time.sleep(0.02)
+    assert len(email_settings.messages) == 1 and len(email_settings.result_lines()) == 3
+
+
+def test_filter_selects_a_subset(history_manager, email_settings, monkeypatch):
+    monkeypatch.setenv("NOTIFY_OPERATIONS", "Divide")
+    monkeypatch.setenv("NOTIFY_MIN_RESULT", "10")
+    queues = start_notifications(history_manager)
+    history_manager.save_to_history("Divide", 100, 2, 50)
+    history_manager.save_to_history("Divide", 1, 2, 0.5)
+    history_manager.save_to_history("Add", 100, 2, 102)
+    history_manager.save_many(np.array([3, 0, 3], dtype=np.uint16), np.array([60.0, 60.0, 6.0]),
+                              np.array([2.0, 2.0, 2.0]), np.array([30.0, 62.0, 3.0]))
+    queues["email"].flush()
+    assert email_settings.result_lines() == ["Divide 100.0 2.0 = 50.0", "Divide 60.0 2.0 = 30.0"]
+
+
+def test_temporary_failures_are_retried_with_backoff():
+    server = FakeSMTPServer(fail=2, code=451)
+    sink = SMTPSink("127.0.0.1", server.port, "calculator@localhost", ["ops@example.com"])
+    notifications = NotificationQueue(sink, batch_size=5, window=1, backoff=0.05)
+    start = time.perf_counter()
+    notifications.submit("Add 1.0 2.0 = 3.0")
+    notifications.flush()
+    assert time.perf_counter() - start >= 0.05 + 0.1  # waited 0.05 s, then 0.1 s
+    assert notifications.stats()["retries"] == 2 and notifications.stats()["sent"] == 1
+    assert len(server.messages) == 1 and server.connections == 1  # a 451 leaves the connection usable
+    notifications.close()
+    sink.close()
+    server.close()
+
+
+def test_stale_pooled_connection_is_replaced():
+    server = FakeSMTPServer(close_after_message=True)
+    sink = SMTPSink("127.0.0.1", server.port, "calculator@localhost", ["ops@example.com"])
+    sink.send(["first"])
+    sink.send(["second"])  # the pooled connection was closed by the server
+    assert len(server.messages) == 2 and sink.pool.opened == 2
+    sink.close()
+    server.close()
+
+
+def test_http_sink_reuses_connections_and_splits_long_digests(fake_webhook):
+    webhook = fake_webhook()
+    sink = HTTPSink(webhook.url, max_length=60)
+    notifications = NotificationQueue(sink, batch_size=10, window=1)
+    for number in range(100):
+        notifications.submit(f"Add {number}.0 1.0 = {number + 1}.0")
+    notifications.flush()
+    assert webhook.connections == 1
+    assert all(len(post) <= 60 for post in webhook.posts)
+    assert sum(len(post.splitlines()) for post in webhook.posts) == 100
+    assert notifications.stats()["batches"] == 10
+    notifications.close()
+    sink.close()
+
+
+def test_http_retries_temporary_failures_and_drops_permanent_ones(fake_webhook):
+    webhook = fake_webhook(statuses=[503, 429, 204, 400])
+    sink = HTTPSink(webhook.url)
+    notifications = NotificationQueue(sink, batch_size=1, window=1, backoff=0.01)
+    notifications.submit("first")  # 503, 429, then delivered
+    notifications.flush()
+    notifications.submit("second")  # 400: not worth retrying
+    notifications.submit("third")
+    notifications.flush()
+    assert webhook.posts == ["first", "third"]
+    assert notifications.stats() == {"queued": 0, "enqueued": 3, "sent": 2, "batches": 2,
+                                     "retries": 2, "dropped": 1}
+    notifications.close()
+    sink.close()
+
+
+def test_email_plugin_and_notifications_share_the_pool(history_manager, email_settings, capsys):
+    app = App()
+    app.onecmd("email the nightly report")
+    app.command_handler.jobs.wait(timeout=5)
+    app.onecmd("email another")
+    app.command_handler.jobs.wait(timeout=5)
+    app.onecmd("add 2 3")
+    app.onecmd("notifications --flush")
+    out = capsys.readouterr().out
+    assert "email: queued 0, enqueued 1, sent 1" in out
+    assert email_settings.connections == 1
+    assert "the nightly report" in email_settings.messages[0]
+    assert email_settings.result_lines() == ["Add 2.0 3.0 = 5.0"]
+    app.command_handler.shutdown()
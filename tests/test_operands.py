@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from app import App
+from app.operands import apply_vector, parse_operand
+from app.repl import AddCommand, DivideCommand
+
+
+def test_parse_operand_forms(tmp_path):
+    path = tmp_path / "values.npy"
+    np.save(path, np.array([[1, 2], [3, 4]]))
+
+    assert parse_operand("2.5") == 2.5
+    assert parse_operand("1,2,3").tolist() == [1.0, 2.0, 3.0]
+    assert parse_operand("0:10:2.5").tolist() == [0.0, 2.5, 5.0, 7.5]
+    assert parse_operand("3:6").tolist() == [3.0, 4.0, 5.0]
+    assert parse_operand(f"@{path}").shape == (2, 2)
+    for bad in ("1:2:0", "1:2:3:4", "@missing.npy", "1,a", "1,,2", "0:1e9", "0:inf"):
+        with pytest.raises(ValueError):
+            parse_operand(bad)
+
+
+def test_broadcasting_and_bulk_history(history_manager):
+    """A scalar against a vector broadcasts, and all pairs land in history in one append."""
+    batch = apply_vector("multiply", np.arange(200_000, dtype=np.float64), 2.0, history_manager)
+    assert batch.result[-1] == 399_998.0
+    assert len(history_manager.buffer) == 200_000
+
+    batch = apply_vector("add", np.array([[1.0], [2.0]]), np.array([10.0, 20.0, 30.0]))
+    assert batch.result.tolist() == [11.0, 21.0, 31.0, 12.0, 22.0, 32.0]
+    with pytest.raises(ValueError):
+        apply_vector("add", np.ones(2), np.ones(3))
+
+
+def test_vector_division_by_zero_is_masked(history_manager):
+    batch = apply_vector("divide", np.array([1.0, 2.0, 3.0]), np.array([1.0, 0.0, 2.0]), history_manager)
+    assert batch.division_by_zero == 1
+    assert np.isnan(batch.result[1])
+    assert history_manager.history["result"].tolist() == [1.0, 1.5]
+
+
+def test_app_commands_accept_vectors(history_manager, capsys):
+    app = App()
+    app.do_add("1,2,3 10")
+    assert "Result: [11., 12., 13.]" in capsys.readouterr().out
+    app.do_divide("0:3 0,1,2")
+    output = capsys.readouterr().out
+    assert "Result: [nan,  1.,  1.]" in output
+    assert "Division by zero in 1 of 3 pairs" in output
+    app.do_subtract("1,2 1,2,3")
+    assert "Invalid input" in capsys.readouterr().out
+    app.do_multiply("3 4")
+    assert "Result: 12.0" in capsys.readouterr().out
+    assert len(history_manager.buffer) == 6
+
+
+def test_oversized_operands_do_not_stop_the_app(history_manager, capsys):
+    """A range too large to allocate is refused with a message instead of a MemoryError."""
+    app = App()
+    app.do_add("0:1e9 1")
+    assert "more than 10000000 elements" in capsys.readouterr().out
+    assert len(history_manager.buffer) == 0
+
+
+def test_repl_commands_accept_vectors(history_manager):
+    assert AddCommand(np.array([1.0, 2.0]), 1.0).execute().tolist() == [2.0, 3.0]
+    result = DivideCommand(np.array([4.0, 4.0]), np.array([2.0, 0.0])).execute()
+    assert result[0] == 2.0 and np.isnan(result[1])
+    assert AddCommand(1.0, 2.0).execute() == 3.0
+    assert len(history_manager.buffer) == 4
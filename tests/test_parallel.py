@@ -0,0 +1,80 @@
+import contextlib
+import io
+import numpy as np
+from app import App
+from app.history_journal import HistoryJournal, read_records
+from app.parallel import run_parallel, split_ranges
+from app.stream import run_stream
+
+
+def write_operations(path, count=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    names = np.array(["add", "subtract", "multiply", "divide"])
+    lines = [f"{names[op]} {x} {y}" for op, x, y in
+             zip(rng.integers(0, 4, count), rng.integers(-50, 50, count), rng.integers(0, 5, count))]
+    lines[17] = "bogus line"
+    lines[count * 5 // 6] = "add 1"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_split_ranges_are_line_aligned(tmp_path):
+    path = write_operations(tmp_path / "ops.txt", count=200)
+    data = path.read_bytes()
+    ranges = split_ranges(str(path), 7)
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    assert all(data[start - 1:start] == b"\n" for start, _ in ranges[1:])
+
+
+def test_parallel_output_matches_serial(tmp_path):
+    """Output and recorded history are identical to a serial run, in input order."""
+    path = write_operations(tmp_path / "ops.txt")
+    serial_output = io.StringIO()
+    serial_journal = HistoryJournal(str(tmp_path / "serial.csv"))
+    with open(path, encoding="utf-8") as operations:
+        total = run_stream(operations, serial_output, serial_journal, chunk_size=1000)
+    serial_journal.close()
+
+    parallel_output = io.StringIO()
+    parallel_journal = HistoryJournal(str(tmp_path / "parallel.csv"))
+    summary = run_parallel(str(path), parallel_output, parallel_journal, workers=3, chunk_size=1000)
+    parallel_journal.close()
+
+    assert parallel_output.getvalue() == serial_output.getvalue()
+    assert summary.count == total
+    assert summary.errors[0][0] == 18 and summary.errors[1][0] == 2501
+    serial, parallel = read_records(str(tmp_path / "serial.csv")), read_records(str(tmp_path / "parallel.csv"))
+    assert parallel["operation"] == serial["operation"]
+    assert np.array_equal(parallel["result"], serial["result"])
+
+
+def test_batch_command_merges_segments_into_history(tmp_path, history_manager, capsys):
+    path = write_operations(tmp_path / "ops.txt", count=500)
+    App().do_batch(f"{path} --workers 2")
+    output = capsys.readouterr().out
+
+    assert "Evaluated 498 operations" in output
+    assert "Invalid input on line 18" in output
+    lines = [line.split() for line in path.read_text().splitlines()]
+    valid = [parts for parts in lines if len(parts) == 3 and parts[0] != "bogus" and
+             not (parts[0] == "divide" and float(parts[2]) == 0)]
+    history = history_manager.history
+    assert [name.lower() for name in history["operation"]] == [parts[0] for parts in valid]
+    assert history["operand1"].tolist() == [float(parts[1]) for parts in valid]
+    assert history_manager.stats("Add")["count"] == sum(parts[0] == "add" for parts in valid)
+
+
+def test_no_output_files_without_an_output_stream(tmp_path, history_manager, monkeypatch):
+    """From the REPL only history is merged, so workers should not write result files."""
+    path = write_operations(tmp_path / "ops.txt", count=500)
+    segment_dir = tmp_path / "segments"
+    segment_dir.mkdir()
+    monkeypatch.setattr("app.parallel.tempfile.TemporaryDirectory",
+                        lambda prefix: contextlib.nullcontext(str(segment_dir)))  # keep the files to inspect
+    summary = run_parallel(str(path), history_manager=history_manager, workers=2)
+
+    assert summary.count == 498
+    assert not list(segment_dir.glob("output-*"))
+    assert list(segment_dir.glob("history-*.csv"))
@@ -0,0 +1,120 @@
+import os
+import sys
+import pytest
+from app import App
+from app.commands import CommandHandler, LazyCommand
+from app.plugin_manifest import PluginManifest
+
+PLUGIN_SOURCE = """from app.commands import Command
+
+class {name}Command(Command):
+    def execute(self, *args):
+        print("{message}")
+"""
+
+
+def write_plugin(package_dir, name, message):
+    plugin_dir = package_dir / name.lower()
+    plugin_dir.mkdir(exist_ok=True)
+    init_path = plugin_dir / "__init__.py"
+    init_path.write_text(PLUGIN_SOURCE.format(name=name, message=message), encoding="utf-8")
+    return init_path
+
+
+@pytest.fixture
+def plugin_package(tmp_path, monkeypatch):
+    """A throwaway importable plugins package."""
+    package_dir = tmp_path / "fakeplugins"
+    package_dir.mkdir()
+    (package_dir / "__init__.py").write_text("", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package_dir
+    for module in [m for m in sys.modules if m.startswith("fakeplugins")]:
+        del sys.modules[module]
+
+
+def test_manifest_maps_commands_without_importing(plugin_package):
+    """Scanning finds Command classes by parsing, leaving the plugin unimported."""
+    write_plugin(plugin_package, "Hello", "hi")
+    manifest = PluginManifest(str(plugin_package), "fakeplugins")
+
+    assert manifest.refresh() == {"hello"}
+    assert manifest.entries["hello"]["module"] == "fakeplugins.hello"
+    assert manifest.entries["hello"]["classes"] == ["HelloCommand"]
+    assert "fakeplugins.hello" not in sys.modules
+
+
+def test_manifest_resolves_aliased_and_indirect_bases(plugin_package):
+    """Bases imported under another name or derived locally are still found without importing."""
+    plugin_dir = plugin_package / "aliased"
+    plugin_dir.mkdir()
+    (plugin_dir / "__init__.py").write_text(
+        "import app.commands as commands\n"
+        "from app.commands import Command as Base\n\n"
+        "class First(Base):\n    def execute(self):\n        pass\n\n"
+        "class Second(First):\n    pass\n\n"
+        "class Third(commands.AsyncCommand):\n    pass\n\n"
+        "class Helper:\n    pass\n", encoding="utf-8")
+    manifest = PluginManifest(str(plugin_package), "fakeplugins")
+    manifest.refresh()
+
+    assert manifest.entries["aliased"]["classes"] == ["First", "Second", "Third"]
+    assert "fakeplugins.aliased" not in sys.modules
+
+
+def test_manifest_imports_plugins_the_scan_cannot_resolve(plugin_package):
+    """A command deriving from a base in another module is found by importing the plugin."""
+    plugin_dir = plugin_package / "split"
+    plugin_dir.mkdir()
+    (plugin_dir / "base.py").write_text(
+        "from app.commands import Command\n\nclass Shared(Command):\n    def execute(self):\n        print('split')\n",
+        encoding="utf-8")
+    (plugin_dir / "__init__.py").write_text(
+        "from .base import Shared\n\nclass SplitCommand(Shared):\n    pass\n", encoding="utf-8")
+    manifest = PluginManifest(str(plugin_package), "fakeplugins")
+    manifest.refresh()
+
+    assert manifest.entries["split"]["classes"] == ["Shared", "SplitCommand"]
+
+
+def test_manifest_cache_only_rescans_changed_plugins(plugin_package):
+    """A reloaded manifest skips unchanged plugins and picks up mtime changes."""
+    write_plugin(plugin_package, "Hello", "hi")
+    init_path = write_plugin(plugin_package, "Bye", "bye")
+    PluginManifest(str(plugin_package), "fakeplugins").refresh()
+
+    manifest = PluginManifest(str(plugin_package), "fakeplugins")
+    manifest.load()
+    assert manifest.refresh() == set()
+
+    stat = os.stat(init_path)
+    os.utime(init_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert manifest.refresh() == {"bye"}
+
+
+def test_lazy_command_imports_on_first_dispatch(plugin_package, capsys):
+    """The handler swaps the stub for the real command the first time it runs."""
+    write_plugin(plugin_package, "Hello", "hi there")
+    handler = CommandHandler()
+    handler.register_command("hello", LazyCommand("fakeplugins.hello", "HelloCommand"))
+
+    assert "fakeplugins.hello" not in sys.modules
+    assert handler.execute_command("hello")
+    assert "hi there" in capsys.readouterr().out
+    assert not isinstance(handler.commands["hello"], LazyCommand)
+
+
+def test_app_registers_plugin_stubs(capfd):
+    """App startup registers stubs; dispatch loads the real plugin command."""
+    app = App()
+    assert isinstance(app.command_handler.commands["email"], LazyCommand)
+
+    app.command_handler.execute_command("email").wait()  # email runs as a background job
+    assert "I will email you" in capfd.readouterr().out
+
+
+def test_reload_plugins_reports_changes(capsys):
+    """reload_plugins with no changes on disk reloads nothing."""
+    app = App()
+    app.do_reload_plugins("")
+    assert "Reloaded 0 changed plugin(s)" in capsys.readouterr().out
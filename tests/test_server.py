@@ -0,0 +1,69 @@
+import asyncio
+import json
+import pytest
+from app import App
+from app.server import CalculatorServer
+
+
+@pytest.fixture
+def server(history_manager):
+    return CalculatorServer(App())
+
+
+async def exchange(reader, writer, requests):
+    """Pipeline every request before reading any response."""
+    writer.write("".join(request + "\n" for request in requests).encode())
+    await writer.drain()
+    responses = [(await reader.readline()).decode().rstrip("\n") for _ in requests]
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def test_handle_line_responses(server):
+    assert server.handle_line("add 2 3") == "OK 5.0"
+    assert server.handle_line("DIVIDE 1 0") == "ERR Division by zero"
+    assert server.handle_line("divide 1,2 0,2") == "OK [null, 1.0]"
+    assert server.handle_line("calc (1+2)*x x=4") == "OK 12.0"
+    assert server.handle_line("multiply 2") == "ERR Invalid input: expected 2 operands, got 1"
+    assert server.handle_line("bogus 1") == "ERR Unknown command: bogus"
+    assert server.handle_line("greet") == 'OK "Hello, World!"'
+    assert json.loads(server.handle_line("stats").split(" ", 1)[1])["Add"]["count"] == 2  # add plus the calc step
+
+
+def test_pipelined_concurrent_tcp_clients(server, history_manager):
+    """Hundreds of clients pipelining requests get their own responses, in order."""
+    clients, per_client = 200, 25
+
+    async def client(number):
+        reader, writer = await asyncio.open_connection(*server.address)
+        requests = [f"add {number} {index}" for index in range(per_client)]
+        return number, await exchange(reader, writer, requests)
+
+    async def scenario():
+        await server.start(port=0)
+        try:
+            return await asyncio.gather(*(client(number) for number in range(clients)))
+        finally:
+            await server.stop()
+
+    for number, responses in asyncio.run(scenario()):
+        assert responses == [f"OK {float(number + index)}" for index in range(per_client)]
+    assert server.requests == clients * per_client
+    history_manager.disable_async_writes()
+    assert len(history_manager.buffer) == clients * per_client
+    assert history_manager.writer is None
+
+
+def test_unix_socket_client(server, tmp_path):
+    path = str(tmp_path / "calc.sock")
+
+    async def scenario():
+        await server.start(unix_socket=path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            return await exchange(reader, writer, ["ping", "subtract 5 7", "quit"])
+        finally:
+            await server.stop()
+
+    assert asyncio.run(scenario()) == ['OK "pong"', "OK -2.0", 'OK "bye"']
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+
+def test_app_startup_defers_heavy_imports():
+    """Constructing App should not import pandas or NumPy, or load history."""
+    out = run_python(
+        "import sys\n"
+        "from app import App\n"
+        "app = App()\n"
+        "from app.logging_setup import flush_logging\n"
+        "flush_logging()\n"
+        "print(f\"RESULT {'pandas' in sys.modules} {'numpy' in sys.modules} {app._history_manager is None}\")\n"
+    )
+    assert "RESULT False False True" in out
+
+
+def test_history_access_does_not_import_pandas():
+    """Recording calculations should not need pandas until history is displayed."""
+    out = run_python(
+        "import sys\n"
+        "from app import App\n"
+        "app = App()\n"
+        "app.history_manager.buffer\n"
+        "before = 'pandas' in sys.modules\n"
+        "app.history_manager.show_history()\n"
+        "from app.logging_setup import flush_logging\n"
+        "flush_logging()\n"
+        "print(f\"RESULT {before} {'pandas' in sys.modules}\")\n"
+    )
+    assert "RESULT False True" in out
+
+
+def test_profile_startup_reports_phases():
+    """main.py --profile-startup prints one timing line per phase."""
+    result = subprocess.run([sys.executable, "main.py", "--profile-startup"], capture_output=True, text=True, check=True)
+    for phase in ("import app", "logging", "plugins", "settings", "history", "total"):
+        assert phase in result.stdout
@@ -0,0 +1,62 @@
+import io
+import pytest
+from app.history_journal import HistoryJournal
+from app.history_manager import HistoryManager
+from app.parallel import run_parallel
+from app.stream import open_history_journal, read_blocks, run_stream
+
+
+def test_read_blocks_splits_on_line_boundaries():
+    """Blocks should always end on a newline, even when lines straddle chunks."""
+    blocks = list(read_blocks(io.StringIO("add 1 2\nmultiply 3 4\ndivide 8 2"), chunk_size=5))
+
+    assert "".join(blocks) == "add 1 2\nmultiply 3 4\ndivide 8 2"
+    assert all(block.endswith("\n") for block in blocks[:-1])
+
+
+def test_run_stream_writes_results_in_order(tmp_path):
+    """Results, division errors and invalid lines come out in input order."""
+    source = io.StringIO("add 4 5\ndivide 1 0\nbogus\nmultiply 2 6\n")
+    output = io.StringIO()
+    journal = HistoryJournal(str(tmp_path / "history.csv"))
+
+    total = run_stream(source, output, journal, chunk_size=16)
+    journal.close()
+
+    assert total == 3
+    assert output.getvalue().splitlines() == [
+        "Result: 9.0",
+        "Error: Division by zero",
+        "Invalid input on line 3: expected 'op x y', got 1 fields",
+        "Result: 12.0",
+    ]
+    with open(tmp_path / "history.csv", encoding="utf-8") as f:
+        rows = [line.rsplit(",", 1)[0] for line in f.read().splitlines()[1:]]
+    assert rows == ["Add,4.0,5.0,9.0", "Multiply,2.0,6.0,12.0"]
+
+
+def test_run_stream_without_journal():
+    """History persistence is optional in stream mode."""
+    output = io.StringIO()
+    assert run_stream(io.StringIO("subtract 10 3\n"), output) == 1
+    assert output.getvalue() == "Result: 7.0\n"
+
+
+@pytest.mark.parametrize("history_manager", ["csv", "binary", "sqlite", "segmented"], indirect=True)
+def test_stream_and_batch_append_to_the_configured_backend(history_manager, tmp_path, monkeypatch):
+    """--stream and --batch write where the REPL's HistoryManager reads, whatever the backend."""
+    history_manager.save_to_history("Add", 1, 1, 2)
+    history_manager.close()
+    monkeypatch.setattr(HistoryManager, "_instance", None)
+    operations = tmp_path / "ops.txt"
+    operations.write_text("multiply 2 3\ndivide 1 0\nsubtract 9 4\n", encoding="utf-8")
+
+    journal = open_history_journal()
+    run_stream(io.StringIO("add 4 5\n"), io.StringIO(), journal)
+    run_parallel(str(operations), io.StringIO(), journal, workers=2)
+    journal.close()
+
+    reloaded = HistoryManager()
+    assert reloaded.history["result"].tolist() == [2.0, 9.0, 6.0, 5.0]
+    assert reloaded.history["operation"].tolist() == ["Add", "Add", "Multiply", "Subtract"]
+    reloaded.close()